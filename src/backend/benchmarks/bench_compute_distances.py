@@ -0,0 +1,124 @@
+"""
+Regression check and benchmark of FillScores.compute_distances.
+
+Compares the previous implementation (one filtered copy and iterrows per
+category, dimension and date combination) with the vectorized
+database.internal.score_distances.compute_distances. Both results must be
+bit-identical (same rows, same order, same float bits).
+
+Usage (from src/backend):
+    python benchmarks/bench_compute_distances.py [n_locations]
+"""
+import os
+import sys
+import time
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from database.internal.score_distances import compute_distances
+import numpy as np
+import pandas as pd
+
+
+def compute_distances_loop(scores:pd.DataFrame) -> pd.DataFrame:
+    ''' Previous implementation of FillScores.compute_distances (for reference) '''
+    category_dimension_date_combs = scores[['category_id', 'dimension_id', 'start_date', 'end_date']].\
+    value_counts(ascending=True).reset_index(name='count').drop('count', axis=1)
+
+    df_list = []
+    for i in range(len(category_dimension_date_combs)):
+        cat_dim_df = scores[(scores["category_id"]==category_dimension_date_combs.loc[i, "category_id"]) &
+                                    (scores["dimension_id"]==category_dimension_date_combs.loc[i, "dimension_id"]) &
+                                    (scores["start_date"]==category_dimension_date_combs.loc[i, "start_date"]) &
+                                    (scores["end_date"]==category_dimension_date_combs.loc[i, "end_date"])].copy()
+
+        median = cat_dim_df["score"].quantile(0.5)
+        bottom_10 = cat_dim_df["score"].quantile(0.1)
+        top_10 = cat_dim_df["score"].quantile(0.9)
+        std = cat_dim_df["score"].std()
+
+        for idx, row in cat_dim_df.iterrows():
+            if row["score"] < bottom_10:
+                cat_dim_df.loc[idx, "distance_to_bound"] = (row["score"] - bottom_10) / std
+            elif row["score"] > top_10:
+                cat_dim_df.loc[idx, "distance_to_bound"] = (row["score"] - top_10) / std
+            else:
+                cat_dim_df.loc[idx, "distance_to_bound"] = None
+
+            if std != 0:
+                cat_dim_df.loc[idx, "distance_to_median"] = (row["score"] - median) / std
+            else:
+                cat_dim_df.loc[idx, "distance_to_median"] = 0
+
+        df_list.append(cat_dim_df)
+
+    return pd.concat(df_list).reset_index(drop=True)
+
+
+def generate_scores(n_locations:int = 200, n_dimensions:int = 40, n_months:int = 12, seed:int = 0) -> pd.DataFrame:
+    ''' Generate synthetic scores (before distances are computed)
+    Input:  - n_locations, n_dimensions, n_months: size of the score table
+            - seed: seed of the random number generator
+    Output: synthetic scores including edge cases (missing scores, ties, constant and single-score dimensions,
+            missing dates)
+    '''
+    rng = np.random.default_rng(seed)
+    idx = np.arange(n_locations * n_dimensions * n_months)
+    months = pd.date_range("2024-01-01", periods=n_months, freq="MS")
+    dimension = (idx // n_months) % n_dimensions
+    scores = pd.DataFrame({
+        "location_id": idx // (n_dimensions * n_months) + 1,
+        "category_id": dimension // 8 + 1,
+        "dimension_id": dimension + 1,
+        "start_date": months[idx % n_months].date,
+        "end_date": (months[idx % n_months] + pd.offsets.MonthEnd(0)).date,
+        "ref_start_location_id": -1,
+        "score": rng.random(len(idx)),
+        "raw_value": rng.normal(20, 10, len(idx))
+    })
+
+    # Ties, missing scores, a constant dimension and missing dates
+    scores.loc[dimension % 5 == 1, "score"] = scores["score"].round(1)
+    scores.loc[rng.random(len(idx)) < 0.01, "score"] = np.nan
+    scores.loc[dimension == 2, "score"] = 0.5
+    scores.loc[rng.random(len(idx)) < 0.001, "start_date"] = None
+
+    # Dimensions of a single location
+    extra = scores[scores["location_id"] == 1].copy()
+    extra["dimension_id"] += 1000
+    return pd.concat([scores, extra], ignore_index=True)
+
+
+def assert_bit_identical(expected:pd.DataFrame, result:pd.DataFrame):
+    ''' Assert that two results of compute_distances are bit-identical (same rows, same order, same float bits)
+    Input:  - expected: result of compute_distances_loop
+            - result: result of compute_distances
+    Output: None (AssertionError if the results differ)
+    '''
+    pd.testing.assert_frame_equal(expected.drop(columns=["distance_to_bound", "distance_to_median"]),
+                                  result.drop(columns=["distance_to_bound", "distance_to_median"]))
+    for column in ["distance_to_bound", "distance_to_median"]:
+        expected_bits = expected[column].to_numpy(dtype=np.float64).view(np.int64)
+        result_bits = result[column].to_numpy(dtype=np.float64).view(np.int64)
+        mismatches = np.count_nonzero(
+            (expected_bits != result_bits) & ~(np.isnan(expected[column].astype(float)) & np.isnan(result[column]))
+        )
+        assert mismatches == 0, f"{column}: {mismatches} values differ"
+
+
+if __name__ == "__main__":
+    scores = generate_scores(n_locations=int(sys.argv[1]) if len(sys.argv) > 1 else 200)
+    print(f"Score rows: {len(scores):,}")
+
+    timings = {}
+    results = {}
+    for name, function in [("loop", compute_distances_loop), ("vectorized", compute_distances)]:
+        start = time.perf_counter()
+        results[name] = function(scores.copy())
+        timings[name] = time.perf_counter() - start
+        print(f"{name:>10}: {timings[name]*1000:10.1f} ms")
+    print(f"   speedup: {timings['loop']/timings['vectorized']:10.1f}x")
+
+    # Bit-identical results
+    assert_bit_identical(results["loop"], results["vectorized"])
+    print("Results are bit-identical.")
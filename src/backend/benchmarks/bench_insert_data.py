@@ -0,0 +1,78 @@
+"""
+Benchmark of Database.insert_data: COPY vs. pandas to_sql.
+
+Inserts a synthetic core_scores table into a scratch copy of core_scores
+(bench_core_scores, dropped afterwards) with both methods.
+
+Usage (from src/backend):
+    python benchmarks/bench_insert_data.py [n_rows]
+"""
+import os
+import sys
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from database.db_helpers import Database
+import numpy as np
+import pandas as pd
+import time
+
+
+def generate_core_scores(n_rows:int, seed:int = 0) -> pd.DataFrame:
+    ''' Generate synthetic core_scores rows (unique primary keys)
+    Input:  - n_rows: number of rows
+            - seed: seed of the random number generator
+    Output: synthetic scores
+    '''
+    rng = np.random.default_rng(seed)
+    idx = np.arange(n_rows)
+    months = pd.date_range("2024-01-01", periods=24, freq="MS")
+    return pd.DataFrame({
+        "location_id": idx // (60 * 24) + 1,
+        "category_id": (idx // 24) % 60 // 8 + 1,
+        "dimension_id": (idx // 24) % 60 + 1,
+        "start_date": months[idx % 24],
+        "end_date": months[idx % 24] + pd.offsets.MonthEnd(0),
+        "ref_start_location_id": -1,
+        "score": rng.random(n_rows).round(5),
+        "raw_value": rng.normal(20, 10, n_rows),
+        "distance_to_median": rng.normal(0, 1, n_rows),
+        "distance_to_bound": np.where(rng.random(n_rows) < 0.8, np.nan, rng.normal(0, 1, n_rows))
+    })
+
+
+def benchmark(db:Database, n_rows:int = 1_000_000) -> dict:
+    ''' Time both insert methods
+    Input:  - db: connected Database object
+            - n_rows: number of rows to insert
+    Output: dict, method -> seconds
+    '''
+    data = generate_core_scores(n_rows)
+    table = "bench_core_scores"
+    timings = {}
+
+    # Table without foreign keys (the synthetic ids do not exist)
+    db.execute_sql(f"DROP TABLE IF EXISTS {table}")
+    db.execute_sql(f"CREATE TABLE {table} (LIKE core_scores INCLUDING DEFAULTS INCLUDING INDEXES)")
+    try:
+        for method in ["copy", "to_sql"]:
+            db.execute_sql(f"TRUNCATE {table}")
+            start = time.perf_counter()
+            db.insert_data(data.copy(), table, updated_at=True, method=method)
+            timings[method] = time.perf_counter() - start
+            db.cur.execute(f"SELECT COUNT(*) FROM {table}")
+            assert db.cur.fetchone()[0] == n_rows
+    finally:
+        db.execute_sql(f"DROP TABLE {table}")
+
+    for method, seconds in timings.items():
+        print(f"{method:>7}: {seconds:8.1f} s ({n_rows/seconds:,.0f} rows/s)")
+    print(f"speedup: {timings['to_sql']/timings['copy']:8.1f}x")
+    return timings
+
+
+if __name__ == "__main__":
+    db = Database()
+    db.connect()
+    benchmark(db, n_rows=int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
+    db.disconnect()
@@ -0,0 +1,123 @@
+"""
+Payload size and render-time benchmark of the route levels of the reachability
+map.
+
+Compares, for a sample of synthetic car and public transport routes, the
+GeoJSON stored in raw_reachability_land (parsed and serialized again by the
+detail view before it is inlined into the page) with the route levels of
+data.route_geometry.encode_route_levels (passed through as stored). Checks
+that the encoded polylines decode to the simplified coordinates.
+
+Usage (from src/backend):
+    python benchmarks/bench_route_levels.py [n_routes]
+"""
+import os
+import sys
+import gzip
+import json
+import time
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from data.route_geometry import (ROUTE_LEVEL_TOLERANCES, POLYLINE_PRECISION, decode_polyline,
+                                 encode_route_levels, simplify_route)
+import numpy as np
+
+
+def generate_route(distance_km:float, step_m:float = 30, rng:np.random.Generator = None) -> list:
+    ''' Generate a synthetic route (smoothly turning path with points every few meters, as returned
+        by OSRM and HERE)
+    Input:  - distance_km: length of the route
+            - step_m: distance between two points
+            - rng: random number generator
+    Output: list of (lat, lon) coordinates
+    '''
+    rng = rng or np.random.default_rng(0)
+    n = int(distance_km * 1000 / step_m)
+    heading = np.cumsum(rng.normal(scale=0.05, size=n)) + rng.uniform(0, 2 * np.pi)
+    steps = step_m / 111_000 * np.column_stack([np.sin(heading), np.cos(heading)])
+    coords = np.cumsum(steps, axis=0) + [rng.uniform(40, 55), rng.uniform(-5, 20)]
+    return np.round(coords, 6).tolist()
+
+
+def to_geojson(coords:list) -> str:
+    ''' GeoJSON of a route as stored by data.reachability.Route '''
+    return json.dumps({
+        "type": "Feature",
+        "properties": {},
+        "geometry": {
+            "type": "LineString",
+            "coordinates": [(lon, lat) for lat, lon in coords]
+        }
+    })
+
+
+def time_per_route(function, routes:list, repeat:int = 3) -> float:
+    ''' Minimum time per route (in milliseconds) of a function applied to all routes '''
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for route in routes:
+            function(route)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / len(routes) * 1000
+
+
+if __name__ == "__main__":
+    n_routes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = np.random.default_rng(0)
+
+    # Car routes of 50-1000 km, public transport routes of 50-1500 km
+    routes = {
+        "car": [generate_route(rng.uniform(50, 1000), rng=rng) for _ in range(n_routes)],
+        "pt": [generate_route(rng.uniform(50, 1500), step_m=20, rng=rng) for _ in range(n_routes)]
+    }
+
+    print(f"{'mode':>4} {'':>10} {'points':>8} {'payload':>10} {'gzip':>10} {'view':>10} {'ingest':>10}")
+    for mode, coords in routes.items():
+        geojsons = [to_geojson(route) for route in coords]
+        levels = [encode_route_levels(route) for route in coords]
+
+        # The encoded polylines decode to the simplified (rounded) coordinates
+        for route, route_levels in zip(coords[:5], levels[:5]):
+            rounded = np.round(np.asarray(route), POLYLINE_PRECISION)
+            for tolerance, encoded in zip(ROUTE_LEVEL_TOLERANCES, json.loads(route_levels)["polylines"]):
+                assert np.allclose(decode_polyline(encoded), simplify_route(rounded, tolerance), atol=1e-9)
+
+        # Average payload per route (inlined into the page), average number of points of each level
+        points = {"geojson": np.mean([len(route) for route in coords])}
+        for i, tolerance in enumerate(ROUTE_LEVEL_TOLERANCES):
+            points[tolerance] = np.mean([len(decode_polyline(json.loads(route_levels)["polylines"][i])) for route_levels in levels])
+        payload = {
+            "geojson": np.mean([len(json.dumps(json.loads(geojson))) for geojson in geojsons]),
+            "levels": np.mean([len(route_levels) for route_levels in levels])
+        }
+        payload_gzip = {
+            "geojson": np.mean([len(gzip.compress(json.dumps(json.loads(geojson)).encode())) for geojson in geojsons]),
+            "levels": np.mean([len(gzip.compress(route_levels.encode())) for route_levels in levels])
+        }
+
+        # Work of the detail view per route: parse and serialize again vs. pass through
+        view = {
+            "geojson": time_per_route(lambda geojson: json.dumps({f"{mode}_geojson": json.loads(geojson)}), geojsons),
+            "levels": time_per_route(lambda route_levels: '{%s}' % f'"{mode}":{route_levels}', levels)
+        }
+        ingest = {"levels": time_per_route(encode_route_levels, coords, repeat=1)}
+
+        print(
+            f"{mode:>4} {'geojson':>10} {points['geojson']:8.0f} {payload['geojson']/1000:7.1f} kB"
+            f" {payload_gzip['geojson']/1000:7.1f} kB {view['geojson']:7.3f} ms"
+        )
+        print(
+            f"{'':>4} {'levels':>10} {'':>8} {payload['levels']/1000:7.1f} kB"
+            f" {payload_gzip['levels']/1000:7.1f} kB {view['levels']:7.3f} ms {ingest['levels']:7.1f} ms"
+        )
+        for tolerance in ROUTE_LEVEL_TOLERANCES:
+            print(f"{'':>4} {tolerance:>10} {points[tolerance]:8.0f}")
+        print(
+            f"{'':>4} payload {payload['geojson']/payload['levels']:.1f}x smaller"
+            f" ({payload_gzip['geojson']/payload_gzip['levels']:.1f}x gzipped),"
+            f" view {view['geojson']/view['levels']:.0f}x faster,"
+            f" map draws {points['geojson']/points[ROUTE_LEVEL_TOLERANCES[-1]]:.0f}x-"
+            f"{points['geojson']/points[ROUTE_LEVEL_TOLERANCES[0]]:.0f}x fewer points"
+        )
@@ -0,0 +1,22 @@
+"""
+Regression test of FillScores.compute_distances: the vectorized
+database.internal.score_distances.compute_distances must be bit-identical
+to the previous implementation (see bench_compute_distances.py).
+
+Usage (from src/backend):
+    python -m pytest benchmarks
+"""
+import os
+import sys
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from benchmarks.bench_compute_distances import assert_bit_identical, compute_distances_loop, generate_scores
+from database.internal.score_distances import compute_distances
+import pytest
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_compute_distances_bit_identical(seed):
+    scores = generate_scores(n_locations=30, n_dimensions=16, n_months=3, seed=seed)
+    assert_bit_identical(compute_distances_loop(scores.copy()), compute_distances(scores.copy()))
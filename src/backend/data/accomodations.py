@@ -366,11 +366,10 @@ def process_period(period):
     cur_country, driver = None, None
     caps, options = configureChromeDriver()
 
-    db = Database()
-    db.connect()
-    locations = db.fetch_data("core_locations")[['location_id', 'city', 'country']]
-    raw_acc = db.fetch_data("raw_accommodation_costs")
-    db.disconnect()
+    # pooled: the connection is opened once per worker process
+    with Database(pooled=True) as db:
+        locations = db.fetch_data("core_locations")[['location_id', 'city', 'country']]
+        raw_acc = db.fetch_data("raw_accommodation_costs")
 
     # select rows from database that have start_date and end_date equal to the current period
     raw_acc = raw_acc[(pd.to_datetime(raw_acc['start_date']) == pd.to_datetime(period[0])) 
@@ -12,6 +12,7 @@ from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from dateutil.parser import parse
 from database.db_helpers import Database
+from data.route_geometry import encode_route_levels
 import numpy as np
 import json
 
@@ -537,6 +538,7 @@ def process_location_land_reachability(loc: pd.DataFrame, start_refs: pd.DataFra
             tmp_dict['car_duration'] = car_route['duration']
             tmp_dict['car_polyline'] = car_route['polyline']
             tmp_dict['car_geojson'] = car_route['geojson']
+            tmp_dict['car_route_levels'] = encode_route_levels(car_route['route'])
 
             # public transport route
             if car_route['duration'] < 3600*20:
@@ -547,6 +549,7 @@ def process_location_land_reachability(loc: pd.DataFrame, start_refs: pd.DataFra
                 tmp_dict['pt_polyline'] = pt_route['polyline']
                 tmp_dict['pt_total_transfers'] = pt_route['total_transfers']
                 tmp_dict['pt_geojson'] = pt_route['geojson']
+                tmp_dict['pt_route_levels'] = encode_route_levels(pt_route['route']) if pt_route['polyline'] else None
 
             else:
                 print("public transport route not available")
@@ -555,24 +558,26 @@ def process_location_land_reachability(loc: pd.DataFrame, start_refs: pd.DataFra
                 tmp_dict['pt_polyline'] = None
                 tmp_dict['pt_total_transfers'] = 0
                 tmp_dict['pt_geojson'] = None
+                tmp_dict['pt_route_levels'] = None
 
         else:
             tmp_dict['car_distance'] = 0
             tmp_dict['car_duration'] = 0
             tmp_dict['car_polyline'] = None
+            tmp_dict['car_route_levels'] = None
             tmp_dict['pt_distance'] = 0
             tmp_dict['pt_duration'] = 0
             tmp_dict['pt_polyline'] = None
             tmp_dict['pt_total_transfers'] = 0
             tmp_dict['pt_geojson'] = None
+            tmp_dict['pt_route_levels'] = None
         
         # return dataframe of results to be inserted into database
         res.append(pd.DataFrame(tmp_dict, index=[0]))
 
-    db = Database()
-    db.connect()
-    db.insert_data(pd.concat(res), "raw_reachability_land")
-    db.disconnect()
+    # pooled: the connection is opened once per worker process
+    with Database(pooled=True) as db:
+        db.insert_data(pd.concat(res), "raw_reachability_land")
     return None
     
 
@@ -586,7 +591,8 @@ def process_location_air_reachability(loc: pd.DataFrame, start_refs: pd.DataFram
         pd.DataFrame: The air reachability data.
     """
 
-    db = Database()
+    # pooled: connect/disconnect per route only borrow a connection
+    db = Database(pooled=True)
 
     # set periods manually: each day of the week one time per season (winter summer); Febrary and March twice (2024 and 2025) because they are closest to the start date
     start_dates = [
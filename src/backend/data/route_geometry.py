@@ -0,0 +1,152 @@
+import json
+import numpy as np
+import pandas as pd
+
+
+####----| Multi-resolution route geometries for the reachability map |----####
+
+# Simplification tolerances in degrees (roughly 1 km, 100 m and 10 m), coarsest first. The map draws the
+# coarsest level whose tolerance is below the size of a pixel at the current zoom level.
+ROUTE_LEVEL_TOLERANCES = [0.01, 0.001, 0.0001]
+# Precision of the encoded polylines (5 decimals, as in the Google/OSRM format)
+POLYLINE_PRECISION = 5
+
+
+def simplify_route(coords:np.ndarray, tolerance:float) -> np.ndarray:
+    ''' Simplify a line with the Douglas-Peucker algorithm
+    Input:  - coords: array of shape (n, 2) with the (lat, lon) coordinates of the line
+            - tolerance: maximum distance (in degrees) of a removed point to the simplified line
+    Output: coordinates of the simplified line (first and last point are always kept)
+    '''
+    n = len(coords)
+    if n < 3:
+        return coords
+
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        # Distance of the points in between to the segment from start to end
+        points = coords[start + 1:end] - coords[start]
+        segment = coords[end] - coords[start]
+        segment_length = segment @ segment
+        if segment_length > 0:
+            t = np.clip(points @ segment / segment_length, 0, 1)
+            points = points - t[:, None] * segment
+        distances = np.einsum('ij,ij->i', points, points)
+
+        # Keep the farthest point if it is too far away and simplify both halves
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance**2:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return coords[keep]
+
+
+def encode_polyline(coords:np.ndarray, precision:int = POLYLINE_PRECISION) -> str:
+    ''' Encode coordinates in the encoded polyline format (as used by Google and OSRM)
+    Input:  - coords: array of shape (n, 2) with (lat, lon) coordinates
+            - precision: number of decimals
+    Output: encoded polyline (only characters between "?" and "~")
+    '''
+    values = np.round(np.asarray(coords, dtype=float) * 10**precision).astype(np.int64)
+    deltas = np.diff(values, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    deltas = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    chars = []
+    for value in deltas.tolist():
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return ''.join(chars)
+
+
+def decode_polyline(encoded:str, precision:int = POLYLINE_PRECISION) -> np.ndarray:
+    ''' Decode an encoded polyline (inverse of encode_polyline)
+    Input:  - encoded: encoded polyline
+            - precision: number of decimals
+    Output: array of shape (n, 2) with (lat, lon) coordinates
+    '''
+    deltas = []
+    value = shift = 0
+    for char in encoded:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1f) << shift
+        shift += 5
+        if chunk < 0x20:
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    return np.cumsum(np.array(deltas, dtype=np.int64).reshape(-1, 2), axis=0) / 10**precision
+
+
+def encode_route_levels(coords, tolerances:list = ROUTE_LEVEL_TOLERANCES) -> str:
+    ''' Simplify a route at several tolerances and encode each level as polyline
+    Input:  - coords: (lat, lon) coordinates of the route (further dimensions are ignored)
+            - tolerances: simplification tolerances in degrees, coarsest first
+    Output: JSON string {"tolerances": [...], "polylines": [...]} (None if the route has no coordinates),
+            passed through to the reachability map as is
+    '''
+    coords = np.asarray(coords, dtype=float)
+    if coords.size == 0:
+        return None
+    coords = coords.reshape(len(coords), -1)[:, :2]
+
+    # Simplify the coordinates as they are encoded (without consecutive duplicates)
+    coords = np.round(coords, POLYLINE_PRECISION)
+    coords = coords[np.r_[True, np.any(coords[1:] != coords[:-1], axis=1)]]
+
+    return json.dumps({
+        'tolerances': tolerances,
+        'polylines': [encode_polyline(simplify_route(coords, tolerance)) for tolerance in tolerances]
+    }, separators=(',', ':'))
+
+
+def route_levels_from_geojson(geojson:str) -> str:
+    ''' Route levels (see encode_route_levels) of a route stored as GeoJSON LineString feature
+    Input:  - geojson: GeoJSON string with (lon, lat) coordinates (or None)
+    Output: JSON string of the route levels (None if there is no route)
+    '''
+    if geojson is None or pd.isna(geojson):
+        return None
+    lon_lat = json.loads(geojson)['geometry']['coordinates']
+    return encode_route_levels([(lat, lon) for lon, lat in lon_lat])
+
+
+def fill_route_levels(db, table_name:str = "raw_reachability_land") -> int:
+    ''' Add the route level columns to an existing land reachability table and fill them for all rows
+        with a route but without route levels (from the stored GeoJSON)
+    Input:  - db: connected Database object
+            - table_name: name of the land reachability table
+    Output: number of updated rows
+    '''
+    db.execute_sql(f"""
+        ALTER TABLE {table_name}
+            ADD COLUMN IF NOT EXISTS car_route_levels TEXT,
+            ADD COLUMN IF NOT EXISTS pt_route_levels TEXT
+        """)
+    routes = db.fetch_data(sql=f"""
+        SELECT loc_id, ref_id, car_geojson, pt_geojson, car_route_levels, pt_route_levels
+        FROM {table_name}
+        WHERE (car_geojson IS NOT NULL AND car_route_levels IS NULL)
+            OR (pt_geojson IS NOT NULL AND pt_route_levels IS NULL)
+        """)
+    if len(routes) == 0:
+        return 0
+
+    for mode in ['car', 'pt']:
+        missing = routes[f'{mode}_route_levels'].isna()
+        routes.loc[missing, f'{mode}_route_levels'] = routes.loc[missing, f'{mode}_geojson'].map(route_levels_from_geojson)
+
+    return db.update_data(
+        routes[['loc_id', 'ref_id', 'car_route_levels', 'pt_route_levels']],
+        table_name,
+        key_columns=['loc_id', 'ref_id']
+    )
@@ -14,7 +14,9 @@ from data.accomodations import generate_periods, process_period
 from data.reachability import (process_location_land_reachability, 
                                process_location_air_reachability, 
                                fill_reachibility_table)
+from data.route_geometry import fill_route_levels
 from database.db_helpers import Database
+from database.internal.weather_climatology import seed_climatology, update_climatology
 import datetime
 from dateutil.relativedelta import relativedelta
 import ee
@@ -346,6 +348,9 @@ def fill_raw_reachability_land(locations: pd.DataFrame, table_name: str, db: Dat
     start_refs = db.fetch_data("core_ref_start_locations")
     processed_locs = db.fetch_data("raw_reachability_land")
 
+    # backfill the route levels of routes that were stored before the route levels were added
+    fill_route_levels(db, table_name)
+
     # create default values using imported function from reachability module, insert that into "table_name"
     insert_data = fill_reachibility_table(locations, start_refs, processed_locs, table_name, db)
     db.insert_data(insert_data, table_name, if_exists='append')
@@ -379,6 +384,9 @@ def fill_raw_reachability_land_par(locations: pd.DataFrame, table_name: str, db:
     start_refs = db.fetch_data("core_ref_start_locations")
     processed_locs = db.fetch_data("raw_reachability_land")
 
+    # backfill the route levels of routes that were stored before the route levels were added
+    fill_route_levels(db, table_name)
+
     # create default values using imported function from reachability module, insert that into "table_name"
     #insert_data = fill_reachibility_table(locations, start_refs, processed_locs, table_name, db)
     #db.insert_data(insert_data, table_name, if_exists='append')
@@ -653,6 +661,9 @@ def fill_raw_weather_historical(locations: pd.DataFrame, table_name: str, db: Da
 					- hourly: 5,000 calls
 					- minute: 600 calls
     '''
+    # Fill the climatology from the existing data points once, new data points are added incrementally below
+    seed_climatology(db)
+
     while True:
     
         # Get the current state from the database
@@ -744,9 +755,10 @@ def fill_raw_weather_historical(locations: pd.DataFrame, table_name: str, db: Da
             print(f"Getting historical weather data for {city}, {country} ({target_year}-{str(target_month).zfill(2)})")
             weather_df = hw.get_data(location_id, lat, lon)
 
-            # Append the data to database table
+            # Append the data to database table and add it to the monthly climatology (in one transaction)
             if len(weather_df) > 0:
-                db.insert_data(weather_df, table_name, if_exists="append")
+                db.insert_data(weather_df, table_name, if_exists="append", method="copy", commit=False)
+                update_climatology(weather_df, db)
 
         # Get current time for logging and return it
         end_datetime = datetime.datetime.now()
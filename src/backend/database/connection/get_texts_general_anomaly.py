@@ -596,8 +596,6 @@ if __name__ == "__main__":
 
     # Iterate over groups
     for (loc, cat, ref_start_loc), group_df in grouped_data:
-
-        db.connect()
         prompt_engine.prompt(group_df)
 
     # Disconnect from database
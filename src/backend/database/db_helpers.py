@@ -1,17 +1,81 @@
 import getpass
+import io
+import json
+import numpy as np
 import os
 import pandas as pd
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 from sqlalchemy import create_engine
+import threading
+import weakref
+
+
+####----| Connection pools (one per process and database) |----####
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Database objects with an open (or borrowed) connection
+_connected = weakref.WeakSet()
+
+
+def _get_pool(db:str, host:str, user:str, password:str, port:str, maxconn:int) -> tuple:
+    ''' Get the connection pool of this process for a database (created on first use)
+    Input:  - db, host, user, password, port: connection parameters
+            - maxconn: int, maximum number of connections of the pool
+    Output: - pool: psycopg2 ThreadedConnectionPool
+            - engine: sqlalchemy engine (with its own QueuePool)
+    '''
+    key = (db, host, user, port)
+    with _pools_lock:
+        if key not in _pools:
+            pool = ThreadedConnectionPool(minconn=1,
+                                          maxconn=maxconn,
+                                          database=db,
+                                          host=host,
+                                          user=user,
+                                          password=password,
+                                          port=port)
+            engine = create_engine(f"postgresql+psycopg2://{user}:{password}@[{host}]:{port}/{db}",
+                                   pool_size=maxconn,
+                                   pool_pre_ping=True)
+            _pools[key] = (pool, engine)
+            print('\033[1m\033[92mSuccessfully created connection pool for database {}.\033[0m'.format(db))
+        return _pools[key]
+
+
+def _reset_pools_after_fork() -> None:
+    ''' Forget the pools and connections inherited from the parent process (e.g. in multiprocessing.Pool workers)
+        The inherited connections share their sockets with the parent, so they are only dereferenced and not closed
+        (psycopg2 does not close connections of another process on garbage collection), new pools are created on first use
+        and Database objects that were connected in the parent reconnect on first use of their connection
+    Input:  None
+    Output: None
+    '''
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+    for database in list(_connected):
+        database._forget_connection()
+    _connected.clear()
+
+
+os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
 
 class Database:
-    def __init__(self, db:str = "dsp", host:str = "193.196.55.109", user:str = "postgres", password:str = None, port:str = "5433"):
+    def __init__(self, db:str = "dsp", host:str = "193.196.55.109", user:str = "postgres", password:str = None, port:str = "5433", insert_method:str = "to_sql", pooled:bool = False, maxconn:int = 10):
         ''' Initialize the database
         Input:  - db: str, name of the database
                 - host: str, host of the database
                 - user: str, user of the database
                 - password: str, password of the database
                 - port: str, port of the database
+                - insert_method: str, default method of insert_data ("to_sql" or "copy", callers opt into "copy" per call)
+                - pooled: bool, whether connect borrows a connection from the pool of this process
+                          (connections are opened once per process instead of once per connect)
+                - maxconn: int, maximum number of connections of the pool (only if pooled)
         Output: None
         '''
         self.db = db
@@ -29,6 +93,27 @@ class Database:
         else:
             self.password = password
         self.port = port
+        self.insert_method = insert_method
+        self.pooled = pooled
+        self.maxconn = maxconn
+        self.conn = None
+
+
+    def __enter__(self):
+        ''' Connect when entering a with block (e.g. with Database(pooled=True) as db: ...)
+        Input:  None
+        Output: self
+        '''
+        self.connect()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        ''' Disconnect (or return the connection to the pool) when leaving a with block
+        Input:  exception information (not handled)
+        Output: None
+        '''
+        self.disconnect()
 
 
     def connect(self):
@@ -38,6 +123,16 @@ class Database:
                 - cur: cursor of the connection
                 - engine: engine of the connection (for function pandas_to_sql)
         '''
+        # Borrow a connection from the pool of this process
+        if self.pooled:
+            # Keep the borrowed connection if connect is called repeatedly
+            if self.conn is None or self.conn.closed:
+                self.pool, self.engine = _get_pool(self.db, self.host, self.user, self.password, self.port, self.maxconn)
+                self.conn = self.pool.getconn()
+                self.cur = self.conn.cursor()
+                _connected.add(self)
+            return self.conn, self.cur, self.engine
+
         # Connect to PostgreSQL database via psycopg2
         self.conn = psycopg2.connect(database=self.db,
                                      host=self.host,
@@ -48,6 +143,7 @@ class Database:
 
         # Connect via sqlalchemy
         self.engine = create_engine(f"postgresql+psycopg2://{self.user}:{self.password}@[{self.host}]:{self.port}/{self.db}")
+        _connected.add(self)
 
         print('\033[1m\033[92mSuccessfully connected to database.\033[0m')
         return self.conn, self.cur, self.engine
@@ -60,12 +156,52 @@ class Database:
                 - self.engine: engine of the connection
         Output: None
         '''
+        # Nothing to close in a forked process that did not use the connection of the parent
+        if self.__dict__.pop('_forked', False):
+            self.conn = None
+            return
+        _connected.discard(self)
+
+        # Return the connection to the pool (open transactions are rolled back), the pool stays open
+        if self.pooled:
+            if self.conn is not None:
+                self.cur.close()
+                self.pool.putconn(self.conn)
+                self.conn = None
+            return
+
         self.cur.close()
         self.conn.close()
         self.engine.dispose()
         print('\033[1m\033[92mSuccessfully disconnected from database.\033[0m')
 
 
+    def _forget_connection(self) -> None:
+        ''' Dereference the connection inherited from the parent process (after a fork, see _reset_pools_after_fork)
+            without closing it, the connection is reopened on first use (see __getattr__)
+        Input:  None
+        Output: None
+        '''
+        engine = self.__dict__.get('engine')
+        if engine is not None:
+            engine.dispose(close=False)
+        for name in ('conn', 'cur', 'engine', 'pool'):
+            self.__dict__.pop(name, None)
+        self._forked = True
+
+
+    def __getattr__(self, name:str):
+        ''' Reconnect on first use of the connection in a forked process (only called for missing attributes)
+        Input:  - name: name of the attribute
+        Output: value of the attribute
+        '''
+        if name in ('conn', 'cur', 'engine') and self.__dict__.pop('_forked', False):
+            self.conn = None
+            self.connect()
+            return getattr(self, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+
     def execute_sql(self, sql:str, commit:bool = True):
         ''' Execute an SQL query
         Input:  - self.conn: connection to the database
@@ -82,26 +218,239 @@ class Database:
         print('\033[1m\033[92mSuccessfully executed SQL query.\033[0m')
 
 
-    def insert_data(self, data:pd.DataFrame, table:str, if_exists:str = 'append', updated_at:bool = False):
+    def insert_data(self, data:pd.DataFrame, table:str, if_exists:str = 'append', updated_at:bool = False, method:str = None, chunksize:int = 100000, commit:bool = True):
         ''' Insert data into the database
         Input:  - self.engine: connection to the database (via sqlalchemy)
-                - data: data to insert
+                - self.conn: connection to the database (via psycopg2, for method "copy")
+                - data: data to insert (DataFrame or iterable of DataFrames, e.g. pd.read_csv(..., chunksize=...))
                 - table: name of the table to insert the data into
                 - if_exists: str, whether to append the data to the table or replace the table
                 - updated_at: bool, whether to add current date and time to the data
-                ! This function automatically commits the changes !
+                - method: str, "copy" (stream via COPY, types taken from the target table) or "to_sql" (pandas),
+                          defaults to self.insert_method. Falls back to "to_sql" if the table does not exist or should be replaced
+                - chunksize: int, number of rows sent per COPY
+                - commit: bool, whether to commit the changes (method "copy" only, e.g. to insert into several tables in one transaction)
+                ! This function automatically commits the changes (unless commit is False) !
         Output: None
         '''
         # Add current date and time to the data
         if updated_at:
-            data["updated_at"] = pd.to_datetime('today')
-        
+            if isinstance(data, pd.DataFrame):
+                data["updated_at"] = pd.to_datetime('today')
+            else:
+                data = (chunk.assign(updated_at=pd.to_datetime('today')) for chunk in data)
+
+        # COPY needs the definition of an existing table
+        method = method or self.insert_method
+        if method == "copy" and (if_exists == "replace" or not self._get_column_types(table)):
+            method = "to_sql"
+
         # Insert the data
-        data.to_sql(table, self.engine, if_exists=if_exists, index=False)
+        if method == "copy":
+            try:
+                self._copy_data(data, table, chunksize=chunksize)
+                if commit:
+                    self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        elif isinstance(data, pd.DataFrame):
+            data.to_sql(table, self.engine, if_exists=if_exists, index=False)
+        else:
+            for i, chunk in enumerate(data):
+                chunk.to_sql(table, self.engine, if_exists=if_exists if i == 0 else 'append', index=False)
 
         print('\033[1m\033[92mSuccessfully inserted data into table {}.\033[0m'.format(table))
 
 
+    def upsert_data(self, data:pd.DataFrame, table:str, conflict_columns:list, update_columns:list = None, updated_at:bool = False, update_expressions:dict = None) -> tuple:
+        ''' Insert new rows and update existing rows in one transaction
+            (COPY into a temporary staging table, then INSERT ... ON CONFLICT DO UPDATE)
+        Input:  - self.conn: connection to the database
+                - self.cur: cursor of the connection
+                - data: data to upsert
+                - table: name of the table to upsert the data into
+                - conflict_columns: list, columns of the primary key/unique constraint identifying a row
+                - update_columns: list, columns to update for existing rows (default: all other columns)
+                - updated_at: bool, whether to add current date and time to the data
+                - update_expressions: dict, SQL expressions for updated columns instead of the new value (EXCLUDED.<column>),
+                                      e.g. {"n": "<table>.n + EXCLUDED.n"} to add up values
+                ! This function automatically commits the changes (or rolls back on error) !
+        Output: - inserted: number of inserted rows
+                - updated: number of updated rows
+        '''
+        # Add current date and time to the data
+        if updated_at:
+            data = data.assign(updated_at=pd.to_datetime('today'))
+
+        # A row may only be affected once per statement
+        data = data.drop_duplicates(subset=conflict_columns, keep='last')
+
+        columns = list(data.columns)
+        update_expressions = update_expressions or {}
+        if update_columns is None:
+            update_columns = [col for col in columns if col not in conflict_columns]
+        staging_table = f"staging_{table}"
+
+        sql = f"""
+            WITH upserted AS (
+                INSERT INTO {table} ({", ".join(columns)})
+                SELECT {", ".join(columns)}
+                FROM {staging_table}
+                ON CONFLICT ({", ".join(conflict_columns)}) DO UPDATE
+                SET {", ".join(f"{col} = {update_expressions.get(col, f'EXCLUDED.{col}')}" for col in update_columns)}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                COUNT(*) FILTER (WHERE inserted),
+                COUNT(*) FILTER (WHERE NOT inserted)
+            FROM upserted
+            """
+
+        try:
+            # Stage the data
+            self.cur.execute(f"CREATE TEMPORARY TABLE {staging_table} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+            self._copy_data(data, staging_table)
+
+            # Upsert from the staging table
+            self.cur.execute(sql)
+            inserted, updated = self.cur.fetchone()
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        print('\033[1m\033[92mSuccessfully upserted data into table {} ({} inserted, {} updated).\033[0m'.format(table, inserted, updated))
+        return inserted, updated
+
+
+    def update_data(self, data:pd.DataFrame, table:str, key_columns:list, update_columns:list = None) -> int:
+        ''' Update existing rows in one transaction (COPY into a temporary staging table, then UPDATE ... FROM),
+            no primary key/unique constraint on the key columns is needed and no rows are inserted
+        Input:  - self.conn: connection to the database
+                - self.cur: cursor of the connection
+                - data: data to update the rows with
+                - table: name of the table to update
+                - key_columns: list, columns identifying a row
+                - update_columns: list, columns to update (default: all other columns)
+                ! This function automatically commits the changes (or rolls back on error) !
+        Output: number of updated rows
+        '''
+        data = data.drop_duplicates(subset=key_columns, keep='last')
+
+        if update_columns is None:
+            update_columns = [col for col in data.columns if col not in key_columns]
+        staging_table = f"staging_{table}"
+
+        sql = f"""
+            UPDATE {table}
+            SET {", ".join(f"{col} = {staging_table}.{col}" for col in update_columns)}
+            FROM {staging_table}
+            WHERE {" AND ".join(f"{table}.{col} = {staging_table}.{col}" for col in key_columns)}
+            """
+
+        try:
+            # Stage the data
+            self.cur.execute(f"CREATE TEMPORARY TABLE {staging_table} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+            self._copy_data(data[key_columns + update_columns], staging_table)
+
+            # Update from the staging table
+            self.cur.execute(sql)
+            updated = self.cur.rowcount
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        print('\033[1m\033[92mSuccessfully updated {} rows of table {}.\033[0m'.format(updated, table))
+        return updated
+
+
+    def _copy_data(self, data:pd.DataFrame, table:str, chunksize:int = None):
+        ''' Stream data into a table via COPY (does not commit)
+        Input:  - self.cur: cursor of the connection
+                - data: data to copy (DataFrame or iterable of DataFrames)
+                - table: name of the table to copy the data into
+                - chunksize: int, number of rows per COPY (None: one COPY per DataFrame)
+        Output: None
+        '''
+        column_types = self._get_column_types(table)
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+
+        for chunk in chunks:
+            # Check columns against the target table
+            unknown_columns = [col for col in chunk.columns if col not in column_types]
+            if unknown_columns:
+                raise ValueError(f"Columns {unknown_columns} do not exist in table {table}.")
+
+            for start in range(0, len(chunk), chunksize or max(len(chunk), 1)):
+                rows = chunk.iloc[start:start + chunksize] if chunksize else chunk
+
+                # Convert to the types of the target table and write to an in-memory CSV
+                buffer = io.StringIO()
+                self._convert_to_column_types(rows, column_types) \
+                    .to_csv(buffer, index=False, header=False, na_rep="\\N")
+                buffer.seek(0)
+
+                self.cur.copy_expert(
+                    f"COPY {table} ({', '.join(rows.columns)}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')",
+                    buffer
+                )
+
+
+    @staticmethod
+    def _convert_to_column_types(data:pd.DataFrame, column_types:dict) -> pd.DataFrame:
+        ''' Convert columns to a text representation PostgreSQL can parse for the column type
+        Input:  - data: data to convert
+                - column_types: dict, column name -> PostgreSQL type (see _get_column_types)
+        Output: converted data
+        '''
+        data = data.copy()
+        for col in data.columns:
+            # Dicts and lists as JSON (str() would give Python literals)
+            if data[col].dtype == object:
+                data[col] = data[col].map(lambda value: json.dumps(value) if isinstance(value, (dict, list)) else value)
+
+            # Integers may be stored as float (e.g. after merges with missing values)
+            if column_types[col] in ("smallint", "integer", "bigint"):
+                data[col] = pd.to_numeric(data[col]).round().astype("Int64")
+            # Dates and timestamps in ISO format (much faster than the datetime formatting of to_csv)
+            elif column_types[col] in ("date", "timestamp without time zone"):
+                unit = "D" if column_types[col] == "date" else "us"
+                values = pd.to_datetime(data[col])
+                data[col] = np.where(
+                    values.isna(),
+                    None,
+                    np.datetime_as_string(values.to_numpy(dtype=f"datetime64[{unit}]"), unit=unit)
+                )
+            # Booleans as t/f (to_csv writes True/False)
+            elif column_types[col] == "boolean":
+                data[col] = data[col].map(lambda value: None if pd.isna(value) else ("t" if value else "f"))
+        return data
+
+
+    def _get_column_types(self, table:str) -> dict:
+        ''' Get the column types of a table (empty if the table does not exist)
+        Input:  - self.cur: cursor of the connection
+                - table: name of the table
+        Output: dict, column name -> PostgreSQL type
+        '''
+        # Do not leave a transaction open if the query starts one (e.g. before to_sql on another connection)
+        in_transaction = self.conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.cur.execute("""
+            SELECT attname, format_type(atttypid, NULL)
+            FROM pg_attribute
+            WHERE
+                attrelid = to_regclass(%s)
+                AND attnum > 0
+                AND NOT attisdropped
+            """, (table,))
+        column_types = dict(self.cur.fetchall())
+        if not in_transaction:
+            self.conn.rollback()
+        return column_types
+
+
     def fetch_data(self, total_object:str = None, sql:str = None) -> pd.DataFrame:
         ''' Fetch data from the database
         Input:  - self.engine: connection to the database (via sqlalchemy)
@@ -0,0 +1,153 @@
+import os
+import sys
+# Add backend folder to path
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../../"))
+sys.path.append(parent_dir)
+
+from database.internal.slider_histograms import average_over_interval
+
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+####----| Distance tables (precomputed distances between locations per category for the relevance) |----####
+# The relevance of the list view is the weighted mean distance of each location to the previous locations (and
+# previous countries) per category, on the scores averaged over the travel interval (missing scores imputed with the
+# mean of the dimension). The score vectors of a category only change at the start and end dates of its scores, i.e.
+# they are constant within the time buckets between these dates. Per category, reference start location and time bucket
+# the distances between all locations are precomputed (float32, identical tables are stored once):
+#
+#     rows                            locations (location axis of the snapshot), then previous countries (mean vectors)
+#     columns                         locations, then the mean vector (distance of locations without scores)
+#
+# The web app only gathers the rows of the previous locations (and countries) and averages them, if the travel interval
+# lies within one time bucket of a category (see DistanceTables in the web app). Categories whose tables exceed the size
+# limit (MAX_BYTES, categories with the fewest distinct tables first) are left to the web app.
+
+DISTANCE_DTYPE = np.float32
+# Rows per block when computing the distances (bounds the memory of the float64 intermediate)
+BLOCK_ROWS = 1024
+# Size limit of all tables (bytes, each table is (locations + countries) x (locations + 1) x 4 bytes)
+MAX_BYTES = int(os.environ.get("DISTANCE_TABLES_MAX_BYTES", 4 * 2**30))
+
+
+def get_time_buckets(scores:pd.DataFrame) -> list:
+    ''' Get the time buckets within which the scores do not change (between consecutive start and end dates)
+    Input:  scores: scores with start_date and end_date (datetime64)
+    Output: list of (start_date, end_date), both included
+    '''
+    one_day = pd.Timedelta(days=1)
+    boundaries = np.unique(np.concatenate([
+        scores["start_date"].to_numpy(dtype="datetime64[ns]"),
+        (scores["end_date"] + one_day).to_numpy(dtype="datetime64[ns]")
+    ]))
+    buckets = [(pd.Timestamp(start), pd.Timestamp(end) - one_day) for start, end in zip(boundaries[:-1], boundaries[1:])]
+
+    # Only buckets with scores (no gaps between the scores)
+    starts = scores["start_date"].to_numpy(dtype="datetime64[ns]")
+    ends = scores["end_date"].to_numpy(dtype="datetime64[ns]")
+    return [(start, end) for start, end in buckets if ((starts <= start.to_datetime64()) & (ends >= end.to_datetime64())).any()]
+
+
+def impute_vectors(vectors:pd.DataFrame, location_ids:np.ndarray) -> np.ndarray:
+    ''' Score vectors of all locations, missing scores imputed with the mean of the dimension (as in compute_relevance)
+    Input:  - vectors: scores with location_id as index and dimension_id as columns
+            - location_ids: location axis
+    Output: array (locations x dimensions)
+    '''
+    vectors = vectors.dropna(axis=1, how="all").reindex(location_ids)
+    values = vectors.to_numpy(dtype=float)
+    return np.where(np.isnan(values), vectors.mean().to_numpy(), values)
+
+
+def compute_distance_table(rows:np.ndarray, columns:np.ndarray) -> np.ndarray:
+    ''' Euclidean distances between two sets of vectors
+    Input:  - rows: array (rows x dimensions)
+            - columns: array (columns x dimensions)
+    Output: array (rows x columns) of DISTANCE_DTYPE
+    '''
+    table = np.empty((len(rows), len(columns)), dtype=DISTANCE_DTYPE)
+    column_norms = np.einsum("ij,ij->i", columns, columns)
+    for start in range(0, len(rows), BLOCK_ROWS):
+        block = rows[start:start + BLOCK_ROWS]
+        dist = -2 * block @ columns.T
+        dist += np.einsum("ij,ij->i", block, block)[:, np.newaxis]
+        dist += column_norms[np.newaxis, :]
+        np.maximum(dist, 0, out=dist)
+        table[start:start + BLOCK_ROWS] = np.sqrt(dist)
+    return table
+
+
+def build_distance_tables(scores:pd.DataFrame, countries:pd.Series, max_bytes:int = MAX_BYTES) -> dict:
+    ''' Build the distance tables of all categories, reference start locations and time buckets
+    Input:  - scores: core_scores (location_id, category_id, dimension_id, start_date, end_date, ref_start_location_id, score)
+            - countries: country per location (location_id as index)
+            - max_bytes: size limit of all tables (categories with the fewest distinct tables first, the relevance of
+              the other categories is computed by the web app)
+    Output: dict with
+                - arrays: name -> array (row_countries and one table per distinct vectors)
+                - tables: list of dicts with category_id, ref_start_location_id, start_date, end_date and table (array name)
+    '''
+    scores = scores.assign(
+        start_date=pd.to_datetime(scores["start_date"]),
+        end_date=pd.to_datetime(scores["end_date"]),
+        score=scores["score"].astype(float)
+    )
+    location_ids = np.unique(scores["location_id"].to_numpy()).astype(np.int64)
+
+    # Previous countries (mean vectors of their locations)
+    location_countries = countries.reindex(location_ids)
+    row_countries = np.sort(location_countries.dropna().unique()).astype(str)
+    membership = (location_countries.to_numpy()[np.newaxis, :] == row_countries[:, np.newaxis]).astype(float)
+    membership /= membership.sum(axis=1, keepdims=True)
+    table_bytes = (len(location_ids) + len(row_countries)) * (len(location_ids) + 1) * np.dtype(DISTANCE_DTYPE).itemsize
+
+    # Score vectors per category, reference start location and time bucket (identical vectors share a table)
+    category_tables = {}
+    vectors_by_key = {}
+    for category_id, category_scores in scores.groupby("category_id"):
+        category_tables[category_id] = []
+        for ref_start_location_id in sorted(category_scores["ref_start_location_id"].unique()):
+            # Scores valid for the reference start location (as aggregated by the web app)
+            ref_scores = category_scores[category_scores["ref_start_location_id"].isin([-1, ref_start_location_id])]
+            for start_date, end_date in get_time_buckets(ref_scores):
+                vectors = impute_vectors(average_over_interval(ref_scores, start_date, end_date, value="score"), location_ids)
+                if vectors.shape[1] == 0:
+                    continue
+                key = hashlib.sha256(vectors.astype(DISTANCE_DTYPE).tobytes() + str(vectors.shape).encode()).hexdigest()
+                vectors_by_key.setdefault(key, vectors)
+                category_tables[category_id].append((ref_start_location_id, start_date, end_date, key))
+
+    # Categories within the size limit
+    selected_keys = set()
+    for category_id in sorted(category_tables, key=lambda category_id: len({t[3] for t in category_tables[category_id]})):
+        keys = {t[3] for t in category_tables[category_id]} - selected_keys
+        if (len(selected_keys) + len(keys)) * table_bytes > max_bytes:
+            print(f"Distance tables of category {category_id} skipped ({len(keys)} tables above the size limit).")
+            del category_tables[category_id]
+            continue
+        selected_keys |= keys
+
+    # Compute the tables
+    arrays = {"row_countries": row_countries}
+    table_names = {}
+    tables = []
+    for category_id in sorted(category_tables):
+        for ref_start_location_id, start_date, end_date, key in category_tables[category_id]:
+            if key not in table_names:
+                table_names[key] = f"table_{len(table_names)}"
+                vectors = vectors_by_key[key]
+                rows = np.concatenate([vectors, membership @ vectors])
+                columns = np.concatenate([vectors, vectors.mean(axis=0, keepdims=True)])
+                arrays[table_names[key]] = compute_distance_table(rows, columns)
+
+            tables.append({
+                "category_id": int(category_id),
+                "ref_start_location_id": int(ref_start_location_id),
+                "start_date": start_date.strftime("%Y-%m-%d"),
+                "end_date": end_date.strftime("%Y-%m-%d"),
+                "table": table_names[key]
+            })
+
+    return {"arrays": arrays, "tables": tables}
@@ -12,6 +12,9 @@ from database.internal.health_scores import HealthScores
 from database.internal.safety_scores import SafetyScores
 from database.internal.weather_scores import WeatherScores
 from database.internal.reachability_scores import ReachabilityScores
+from database.internal.score_distances import compute_distances
+from database.internal.slider_histograms import HISTOGRAM_DIMENSIONS, fill_slider_histograms
+from database.internal.score_snapshot import SNAPSHOT_DIR, publish_score_snapshot
 from datetime import datetime
 #from faker import Faker
 import numpy as np
@@ -258,49 +261,8 @@ class FillScores:
             scores = db.fetch_data("core_scores")
             db.disconnect()
 
-        # Get all unique combinations of category, dimension, start and end dates to find all separate scores
-        category_dimension_date_combs = scores[['category_id', 'dimension_id', 'start_date', 'end_date']].\
-        value_counts(ascending=True).reset_index(name='count').drop('count', axis=1)
-
-        df_list = []
-
-        # Loop through all unique scores
-        for i in range(len(category_dimension_date_combs)):
-
-            # Create a filtered dataframe, consisting only of the location scores for one unique combination
-            cat_dim_df = scores[(scores["category_id"]==category_dimension_date_combs.loc[i, "category_id"]) &
-                                        (scores["dimension_id"]==category_dimension_date_combs.loc[i, "dimension_id"]) &
-                                        (scores["start_date"]==category_dimension_date_combs.loc[i, "start_date"]) &
-                                        (scores["end_date"]==category_dimension_date_combs.loc[i, "end_date"])].copy()
-
-            # Compute relevant metrics
-            median = cat_dim_df["score"].quantile(0.5)
-            bottom_10 = cat_dim_df["score"].quantile(0.1)
-            top_10 = cat_dim_df["score"].quantile(0.9)
-            std = cat_dim_df["score"].std()
-
-            # For each score in one dimension, check if it lays in the bottom 10 or top 10 quantile
-            for idx, row in cat_dim_df.iterrows():
-                if row["score"] < bottom_10:
-                    # Compute distance like this to make sure that distance in bottom 10 are negative and top 10 are positive to be identifiable
-                    cat_dim_df.loc[idx, "distance_to_bound"] = (row["score"] - bottom_10) / std
-                elif row["score"] > top_10:
-                    cat_dim_df.loc[idx, "distance_to_bound"] = (row["score"] - top_10) / std
-                else:
-                    # If score is inside the bounds, assign a "None" value to distance_to_bound
-                    cat_dim_df.loc[idx, "distance_to_bound"] = None
-
-                # Compute distance_to_median for all
-                if std != 0:
-                    cat_dim_df.loc[idx, "distance_to_median"] = (row["score"] - median) / std
-                else:
-                    cat_dim_df.loc[idx, "distance_to_median"] = 0
-
-            # Add filtered dataframe with quantiles to list
-            df_list.append(cat_dim_df)
-
-        # Concat all combinations to reassemble the core_score table, now with computed distances
-        return pd.concat(df_list).reset_index(drop=True)
+        # Compute the quantiles, std and distances of all category, dimension and date combinations at once
+        return compute_distances(scores)
 
 
     def fill_scores(self, which_scores:dict, explicitely_update:bool = False):
@@ -309,7 +271,7 @@ class FillScores:
                 - self.locations: master data
                 - which_scores: dict, which scores to fill in
                 - explicitely_update: bool, whether to explicitly add scores to the database or not (and perhaps update existing scores)
-        Output: None
+        Output: number of inserted and updated scores (only if explicitely_update is False)
         '''
         # Get the scores
         scores = pd.DataFrame(columns=["location_id", "category_id", "dimension_id", "start_date", "end_date", "ref_start_location_id", "score", "raw_value", "distance_to_median", "distance_to_bound"])
@@ -331,6 +293,7 @@ class FillScores:
         scores["location_id"] = scores["location_id"].astype(int)
         scores["category_id"] = scores["category_id"].astype(int)
         scores["dimension_id"] = scores["dimension_id"].astype(int)
+        scores["ref_start_location_id"] = scores["ref_start_location_id"].astype(int)
         scores["start_date"] = pd.to_datetime(scores["start_date"], format='%Y-%m-%d')
         scores["end_date"] = pd.to_datetime(scores["end_date"], format='%Y-%m-%d')
 
@@ -349,59 +312,32 @@ class FillScores:
 
             # Insert the scores
             print("Inserting new scores...")
-            self.db.insert_data(data=scores, table="core_scores", updated_at=True)
+            self.db.insert_data(data=scores, table="core_scores", updated_at=True, method="copy")
 
-        # Else: check for all location_ids if there is a score in the database. If true, replace. If not, add
+        # Else: insert new scores and update existing ones (bulk upsert in one transaction)
         else:
-            for _, row in scores.iterrows():
-                location_id = row["location_id"]
-                category_id = row["category_id"]
-                dimension_id = row["dimension_id"]
-                start_date = row["start_date"]
-                end_date = row["end_date"]
-                ref_start_location_id = row["ref_start_location_id"]
-                score = row["score"]
-                raw_value = row["raw_value"]
-                distance_to_bound = row["distance_to_bound"]
-                distance_to_median = row["distance_to_median"]
-                if raw_value is None:
-                    raw_value = "NULL"
-
-                # Check if there is a score for this location, dimension and subcategory
-                sql = f"""
-                    SELECT location_id
-                    FROM core_scores
-                    WHERE
-                        location_id = {location_id}
-                        AND category_id = '{category_id}'
-                        AND dimension_id = '{dimension_id}'
-                        AND start_date = '{start_date}'
-                        AND end_date = '{end_date}'
-                        AND ref_start_location_id = '{ref_start_location_id}'
-                    """
-                if self.db.fetch_data(sql=sql).empty:
-                    # Add score
-                    print(f"Adding category_id {category_id} (dimension_id {dimension_id}) score for location_id {location_id}...")
-                    sql = sql = f"""
-                        INSERT INTO core_scores (location_id, category_id, dimension_id, start_date, end_date, ref_start_location_id, score, raw_value, distance_to_bound, distance_to_median)
-                        VALUES ({location_id}, '{category_id}', '{dimension_id}', '{start_date}', '{ref_start_location_id}', '{end_date}', {score}, {raw_value}, {distance_to_bound}, {distance_to_median})
-                        """
-                    self.db.execute_sql(sql, commit=True)
-                else:
-                    # Update score
-                    print(f"Updating category_id {category_id} (dimension_id {dimension_id}) score for location_id {location_id}...")
-                    sql = f"""
-                        UPDATE core_scores
-                        SET score = {score}, raw_value = {raw_value}, distance_to_bound = {distance_to_bound}, distance_to_median = {distance_to_median}
-                        WHERE
-                            location_id = {location_id}
-                            AND category_id = '{category_id}'
-                            AND dimension_id = '{dimension_id}'
-                            AND start_date = '{start_date}'
-                            AND end_date = '{end_date}'
-                            AND ref_start_location_id = '{ref_start_location_id}'
-                        """
-                    self.db.execute_sql(sql, commit=True)
+            print("Upserting scores...")
+            inserted, updated = self.db.upsert_data(
+                data=scores[["location_id", "category_id", "dimension_id", "start_date", "end_date", "ref_start_location_id", "score", "raw_value", "distance_to_median", "distance_to_bound"]],
+                table="core_scores",
+                conflict_columns=["location_id", "category_id", "dimension_id", "start_date", "end_date", "ref_start_location_id"],
+                updated_at=True
+            )
+            print(f"Inserted {inserted} and updated {updated} scores.")
+
+        # Recompute the slider histograms of the list filters if their raw values changed
+        histogram_dimensions = [d for dimensions in HISTOGRAM_DIMENSIONS.values() for d in dimensions]
+        if scores["dimension_id"].isin(histogram_dimensions).any():
+            print("Computing slider histograms...")
+            fill_slider_histograms(self.db)
+
+        # Publish the snapshot of the scores for the web workers
+        if SNAPSHOT_DIR:
+            print("Publishing score snapshot...")
+            publish_score_snapshot(self.db)
+
+        if not explicitely_update:
+            return inserted, updated
 
 
 db = Database()
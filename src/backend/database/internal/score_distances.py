@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+
+####----| Distances of each score to the quantiles and median of its dimension |----####
+
+GROUP_COLUMNS = ['category_id', 'dimension_id', 'start_date', 'end_date']
+
+
+def _group_sums(values:np.ndarray, group_starts:np.ndarray, group_sizes:np.ndarray) -> np.ndarray:
+    ''' Sum the values of each group (rows sorted by group)
+    Input:  - values: float array sorted by group
+            - group_starts: position of the first row of each group
+            - group_sizes: number of rows per group
+    Output: sum per group
+    '''
+    # Groups of the same size are summed as rows of one matrix, which uses the same pairwise
+    # summation as summing each group on its own (np.add.reduceat sums sequentially)
+    sums = np.empty(len(group_starts))
+    for size in np.unique(group_sizes):
+        groups = np.flatnonzero(group_sizes == size)
+        sums[groups] = values[group_starts[groups, None] + np.arange(size)].sum(axis=1)
+    return sums
+
+
+def _group_quantile(sorted_scores:np.ndarray, group_starts:np.ndarray, counts:np.ndarray, q:float) -> np.ndarray:
+    ''' Quantile of each group, computed exactly like pandas.Series.quantile (numpy "linear" method)
+    Input:  - sorted_scores: scores sorted by group and (within each group) by value, NaN last
+            - group_starts: position of the first row of each group
+            - counts: number of non-missing scores per group
+            - q: quantile
+    Output: quantile per group (NaN for groups without scores)
+    '''
+    # pandas passes the quantile as percentage to numpy, which divides it by 100 again
+    q = np.true_divide(q * 100.0, 100)
+
+    # Virtual index into the sorted scores and its neighbours
+    virtual_index = (counts - 1) * q
+    previous_index = np.floor(virtual_index)
+    gamma = virtual_index - previous_index
+    last_index = np.maximum(counts - 1, 0).astype(np.int64)
+    previous_index = np.clip(previous_index, 0, last_index).astype(np.int64)
+    next_index = np.clip(previous_index + 1, 0, last_index)
+
+    previous = sorted_scores[group_starts + previous_index]
+    next = sorted_scores[group_starts + next_index]
+
+    # Linear interpolation (same formula as numpy's _lerp)
+    diff = next - previous
+    quantile = np.where(gamma >= 0.5, next - diff * (1 - gamma), previous + diff * gamma)
+    return np.where(counts > 0, quantile, np.nan)
+
+
+def _group_std(scores:np.ndarray, group_starts:np.ndarray, counts:np.ndarray, group_sizes:np.ndarray) -> np.ndarray:
+    ''' Sample standard deviation of each group, computed exactly like pandas.Series.std (two-pass algorithm)
+    Input:  - scores: scores sorted by group (original order within each group)
+            - group_starts: position of the first row of each group
+            - counts: number of non-missing scores per group
+            - group_sizes: number of rows per group
+    Output: standard deviation per group (NaN for groups with less than two scores)
+    '''
+    missing = np.isnan(scores)
+    values = np.where(missing, 0, scores)
+
+    with np.errstate(invalid='ignore'):
+        avg = _group_sums(values, group_starts, group_sizes) / counts
+    sqr = (np.repeat(avg, group_sizes) - values) ** 2
+    sqr[missing] = 0
+    var = _group_sums(sqr, group_starts, group_sizes) / np.where(counts > 1, counts - 1, np.nan)
+
+    return np.sqrt(var)
+
+
+def compute_distances(scores:pd.DataFrame) -> pd.DataFrame:
+    ''' Compute the distance to the bottom 10 and top 10 quantile and to the median for each score
+    Input:  scores: dataframe with scores
+    Output: dataframe with scores and distances (rows without a complete category, dimension and date combination are dropped)
+    '''
+    # Get all unique combinations of category, dimension, start and end dates to find all separate scores
+    # (in the same order as before, i.e. by ascending number of scores)
+    category_dimension_date_combs = scores[GROUP_COLUMNS].value_counts(ascending=True).index
+    group = category_dimension_date_combs.get_indexer(pd.MultiIndex.from_frame(scores[GROUP_COLUMNS]))
+
+    # Sort rows by combination (keeping the original order within each combination)
+    rows = np.flatnonzero(group >= 0)
+    rows = rows[np.argsort(group[rows], kind='stable')]
+    group = group[rows]
+    score = scores['score'].to_numpy(dtype=np.float64)[rows]
+
+    if len(rows) == 0:
+        return scores.iloc[rows].reset_index(drop=True).assign(distance_to_bound=np.nan, distance_to_median=np.nan)
+
+    group_starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(rows)])
+    counts = np.add.reduceat((~np.isnan(score)).astype(np.float64), group_starts)
+
+    # Compute relevant metrics per combination
+    order = np.lexsort((score, group))
+    sorted_score = score[order]
+    median = _group_quantile(sorted_score, group_starts, counts, 0.5)
+    bottom_10 = _group_quantile(sorted_score, group_starts, counts, 0.1)
+    top_10 = _group_quantile(sorted_score, group_starts, counts, 0.9)
+    std = _group_std(score, group_starts, counts, group_sizes)
+
+    # Broadcast to the scores
+    median, bottom_10, top_10, std = (np.repeat(metric, group_sizes) for metric in (median, bottom_10, top_10, std))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Distances in the bottom 10 are negative and in the top 10 positive to be identifiable,
+        # scores inside the bounds have no distance_to_bound
+        distance_to_bound = np.where(
+            score < bottom_10, (score - bottom_10) / std,
+            np.where(score > top_10, (score - top_10) / std, np.nan)
+        )
+        distance_to_median = np.where(std != 0, (score - median) / std, 0.)
+
+    # Reassemble the core_score table, now with computed distances
+    scores = scores.iloc[rows].reset_index(drop=True)
+    scores["distance_to_bound"] = distance_to_bound
+    scores["distance_to_median"] = distance_to_median
+
+    return scores
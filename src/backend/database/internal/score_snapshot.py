@@ -0,0 +1,161 @@
+import os
+import sys
+# Add backend folder to path
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../../"))
+sys.path.append(parent_dir)
+
+from database.db_helpers import Database
+from database.internal.distance_tables import build_distance_tables
+
+from datetime import datetime
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+
+####----| Score snapshot (read-only copy of core_scores for the web workers) |----####
+# Layout of the snapshot directory (SCORE_SNAPSHOT_DIR, shared with the web app):
+#
+#     current -> versions/<name>      symlink to the published version (swapped atomically)
+#     versions/<name>/manifest.json   version (max(core_scores.updated_at)), arrays with shape and dtype
+#     versions/<name>/<array>.npy     arrays of the score cube (see ScoreCube in the web app)
+#     versions/<name>/distances/      distance tables of the relevance (manifest.json with the index of the tables,
+#                                     row_countries.npy and one .npy per table, see distance_tables.py)
+#
+# Arrays (n locations x m cells, a cell is a combination of category, dimension, start_date, end_date and
+# ref_start_location_id, sorted by these columns):
+#     location_ids                    (n,) int64, location_id per row
+#     cell_category_id, cell_dimension_id, cell_ref_start_location_id     (m,) int64
+#     cell_start_date, cell_end_date  (m,) datetime64[ns]
+#     score, raw_value                (n, m) float64, 0 if missing (raw_value NaN if NULL)
+#     present                         (n, m) bool, whether the location has a score in the cell
+#
+# The web workers memory-map the arrays (read-only, shared via the page cache) and switch to a new version
+# once the symlink points to it.
+#
+# build_snapshot_arrays builds the same arrays as ScoreCube.from_frame in the web app (checked by
+# src/frontend/destination_search/benchmarks/test_score_snapshot.py), changes of the layout go into both.
+
+SNAPSHOT_DIR = os.environ.get("SCORE_SNAPSHOT_DIR")
+CELL_COLUMNS = ["category_id", "dimension_id", "start_date", "end_date", "ref_start_location_id"]
+# Number of published versions kept (older versions are deleted, mapped files stay valid for running workers)
+KEEP_VERSIONS = 3
+
+
+def build_snapshot_arrays(scores:pd.DataFrame) -> dict:
+    ''' Build the arrays of the score cube from core_scores in long format
+    Input:  scores: location_id, category_id, dimension_id, start_date, end_date, ref_start_location_id, score, raw_value
+    Output: dict, name -> array (see layout above)
+    '''
+    scores = scores.astype({
+        "location_id": np.int64,
+        "category_id": np.int64,
+        "dimension_id": np.int64,
+        "ref_start_location_id": np.int64,
+        "score": float,
+        "raw_value": float
+    })
+    scores["start_date"] = pd.to_datetime(scores["start_date"])
+    scores["end_date"] = pd.to_datetime(scores["end_date"])
+
+    # Row (location) and column (cell) positions of each score
+    location_ids, location_pos = np.unique(scores["location_id"].to_numpy(), return_inverse=True)
+    cells = scores[CELL_COLUMNS].drop_duplicates().sort_values(CELL_COLUMNS).reset_index(drop=True)
+    cell_pos = pd.MultiIndex.from_frame(cells).get_indexer(pd.MultiIndex.from_frame(scores[CELL_COLUMNS]))
+
+    # Fill dense matrices
+    shape = (len(location_ids), len(cells))
+    score = np.zeros(shape)
+    raw_value = np.zeros(shape)
+    present = np.zeros(shape, dtype=bool)
+    score[location_pos, cell_pos] = scores["score"].to_numpy()
+    raw_value[location_pos, cell_pos] = scores["raw_value"].to_numpy()
+    present[location_pos, cell_pos] = True
+
+    return {
+        "location_ids": location_ids.astype(np.int64),
+        "cell_category_id": cells["category_id"].to_numpy(dtype=np.int64),
+        "cell_dimension_id": cells["dimension_id"].to_numpy(dtype=np.int64),
+        "cell_start_date": cells["start_date"].to_numpy(dtype="datetime64[ns]"),
+        "cell_end_date": cells["end_date"].to_numpy(dtype="datetime64[ns]"),
+        "cell_ref_start_location_id": cells["ref_start_location_id"].to_numpy(dtype=np.int64),
+        "score": score,
+        "raw_value": raw_value,
+        "present": present
+    }
+
+
+def save_arrays(path:str, arrays:dict, **manifest) -> None:
+    ''' Save arrays (one .npy file each) and their manifest into a directory
+    Input:  - path: directory (created)
+            - arrays: dict, name -> array
+            - manifest: further entries of the manifest
+    Output: None
+    '''
+    os.makedirs(path)
+    for array_name, array in arrays.items():
+        np.save(os.path.join(path, f"{array_name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+    manifest = {
+        **manifest,
+        "created_at": datetime.utcnow().isoformat(),
+        "arrays": {array_name: {"shape": list(array.shape), "dtype": array.dtype.str} for array_name, array in arrays.items()}
+    }
+    with open(os.path.join(path, "manifest.json"), "w") as file:
+        json.dump(manifest, file)
+
+
+def write_snapshot(arrays:dict, version:str, snapshot_dir:str, distance_tables:dict = None) -> str:
+    ''' Write a new version of the snapshot and publish it (atomic swap of the symlink "current")
+    Input:  - arrays: dict, name -> array (see build_snapshot_arrays)
+            - version: version of the data (stored in the manifest)
+            - snapshot_dir: snapshot directory
+            - distance_tables: distance tables of the relevance (see build_distance_tables), not written if None
+    Output: path of the published version
+    '''
+    versions_dir = os.path.join(snapshot_dir, "versions")
+    os.makedirs(versions_dir, exist_ok=True)
+
+    # Write into a temporary directory first (workers never see incomplete versions)
+    name = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    tmp_dir = os.path.join(versions_dir, f".{name}.tmp")
+    save_arrays(tmp_dir, arrays, version=version)
+    if distance_tables is not None:
+        save_arrays(os.path.join(tmp_dir, "distances"), distance_tables["arrays"], version=version, tables=distance_tables["tables"])
+    version_dir = os.path.join(versions_dir, name)
+    os.rename(tmp_dir, version_dir)
+
+    # Swap the symlink (rename is atomic)
+    tmp_link = os.path.join(snapshot_dir, f".current.{os.getpid()}")
+    os.symlink(os.path.join("versions", name), tmp_link)
+    os.replace(tmp_link, os.path.join(snapshot_dir, "current"))
+
+    # Delete old versions
+    names = sorted(entry for entry in os.listdir(versions_dir) if not entry.startswith("."))
+    for old_name in names[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(versions_dir, old_name), ignore_errors=True)
+
+    return version_dir
+
+
+def publish_score_snapshot(db:Database, snapshot_dir:str = SNAPSHOT_DIR) -> str:
+    ''' Publish a snapshot of core_scores (with the distance tables of the relevance) for the web workers (after filling in the scores)
+    Input:  - db: Database object
+            - snapshot_dir: snapshot directory (default: environment variable SCORE_SNAPSHOT_DIR)
+    Output: path of the published version
+    '''
+    scores = db.fetch_data(sql=f"""
+        SELECT location_id, {", ".join(CELL_COLUMNS)}, score, raw_value
+        FROM core_scores
+        """)
+    version = db.fetch_data(sql="SELECT MAX(updated_at) AS version FROM core_scores")["version"].iloc[0]
+    countries = db.fetch_data(sql="SELECT location_id, country FROM core_locations").set_index("location_id")["country"]
+
+    version_dir = write_snapshot(
+        build_snapshot_arrays(scores),
+        version=str(version),
+        snapshot_dir=snapshot_dir,
+        distance_tables=build_distance_tables(scores, countries)
+    )
+    print(f"Published score snapshot {version_dir}.")
+    return version_dir
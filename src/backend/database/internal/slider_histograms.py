@@ -0,0 +1,173 @@
+import os
+import sys
+# Add backend folder to path
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../../"))
+sys.path.append(parent_dir)
+
+from database.db_helpers import Database
+
+import json
+import numpy as np
+import pandas as pd
+
+
+####----| Slider histograms (raw values of the list filters per reference start location and month) |----####
+
+HISTOGRAM_TABLE = "core_slider_histograms"
+HISTOGRAM_BINS = 30
+# Histogram -> dimensions (several dimensions: minimum over the dimensions per location)
+HISTOGRAM_DIMENSIONS = {
+    "travel_cost": [41],
+    "accommodation_cost": [42],
+    "best_reachability": [61, 62, 63]
+}
+# End date of scores that are valid for an open-ended period
+OPEN_END_DATE = pd.Timestamp("2099-12-31")
+
+
+def get_month_buckets(scores:pd.DataFrame) -> pd.PeriodIndex:
+    ''' Get the months from the first start date to the last bounded date of the scores
+        (after the last bounded date, only open-ended scores are valid, i.e. the values do not change anymore)
+    Input:  scores: scores with start_date and end_date (datetime64)
+    Output: months
+    '''
+    dates = pd.concat([scores["start_date"], scores["end_date"]])
+    dates = dates[dates < OPEN_END_DATE]
+    return pd.period_range(scores["start_date"].min(), dates.max(), freq="M")
+
+
+def average_over_month(scores:pd.DataFrame, month:pd.Period) -> pd.DataFrame:
+    ''' Average the raw values over a month, weighted by the number of days each score interval overlaps with it
+        (like the list view does for the travel interval, missing raw values propagate)
+    Input:  - scores: scores with location_id, dimension_id, start_date, end_date (datetime64) and raw_value
+            - month: month
+    Output: raw values with location_id as index and dimension_id as columns
+    '''
+    return average_over_interval(scores, month.start_time, month.end_time.normalize())
+
+
+def average_over_interval(scores:pd.DataFrame, start_date:pd.Timestamp, end_date:pd.Timestamp, value:str = "raw_value") -> pd.DataFrame:
+    ''' Average a value over an interval, weighted by the number of days each score interval overlaps with it
+        (like the list view does for the travel interval, missing values propagate)
+    Input:  - scores: scores with location_id, dimension_id, start_date, end_date (datetime64) and the value column
+            - start_date, end_date: interval (both included)
+            - value: column to average (raw_value or score)
+    Output: averages with location_id as index and dimension_id as columns
+    '''
+    one_day = np.timedelta64(1, "D")
+    start_date = pd.Timestamp(start_date).to_datetime64()
+    end_date = pd.Timestamp(end_date).to_datetime64()
+
+    overlap_days = (
+        np.minimum(scores["end_date"].to_numpy(dtype="datetime64[ns]"), end_date)
+        - np.maximum(scores["start_date"].to_numpy(dtype="datetime64[ns]"), start_date)
+        + one_day
+    ) // one_day
+    scores = scores.assign(overlap_days=overlap_days)
+    scores = scores[scores["overlap_days"] > 0]
+
+    weighted = (scores[value] * scores["overlap_days"]).rename(value)
+    keys = [scores["location_id"], scores["dimension_id"]]
+    sums = weighted.groupby(keys).sum().mask(weighted.isna().groupby(keys).any())
+    values = sums / scores["overlap_days"].groupby(keys).sum()
+
+    return values.unstack("dimension_id")
+
+
+def compute_histograms(scores:pd.DataFrame, dimensions:list, decimals:dict, bins:int = HISTOGRAM_BINS) -> pd.DataFrame:
+    ''' Compute the histograms of one reference start location and histogram per month
+        (with the same bin edges for all months, such that histograms of several months can be added up)
+    Input:  - scores: scores of the dimensions valid for the reference start location
+            - dimensions: list, dimensions of the histogram (several dimensions: minimum per location)
+            - decimals: dict, dimension_id -> number of decimals the raw values are rounded to
+            - bins: number of bins
+    Output: month, bin_edges and heights (list of the number of locations per bin)
+    '''
+    # Values per location and month
+    values = {}
+    for month in get_month_buckets(scores):
+        month_values = average_over_month(scores, month)
+        month_values = month_values.reindex(columns=dimensions)
+        for dimension_id in dimensions:
+            month_values[dimension_id] = month_values[dimension_id].round(decimals.get(dimension_id, 0))
+        values[month] = month_values.min(axis=1).dropna().to_numpy(dtype=float)
+
+    all_values = np.concatenate(list(values.values()) or [np.empty(0)])
+    if len(all_values) == 0:
+        return pd.DataFrame(columns=["month", "bin_edges", "heights"])
+
+    # Bin edges over all months
+    bin_edges = np.histogram_bin_edges(all_values, bins=bins)
+
+    return pd.DataFrame([
+        {
+            "month": month.start_time,
+            "bin_edges": bin_edges.tolist(),
+            "heights": np.histogram(month_values, bins=bin_edges)[0].tolist()
+        }
+        for month, month_values in values.items()
+    ])
+
+
+def get_slider_histograms(scores:pd.DataFrame, decimals:dict, ref_start_location_ids:list) -> pd.DataFrame:
+    ''' Compute the slider histograms of all reference start locations and months
+        (histograms without reference start location specific scores are only computed once, for ref_start_location_id -1)
+    Input:  - scores: core_scores of the histogram dimensions (location_id, dimension_id, start_date, end_date, ref_start_location_id, raw_value)
+            - decimals: dict, dimension_id -> number of decimals the raw values are rounded to
+            - ref_start_location_ids: list, reference start locations
+    Output: rows of core_slider_histograms
+    '''
+    scores = scores.assign(
+        start_date=pd.to_datetime(scores["start_date"]),
+        end_date=pd.to_datetime(scores["end_date"]),
+        raw_value=pd.to_numeric(scores["raw_value"], errors="coerce")
+    )
+
+    histograms = []
+    for histogram, dimensions in HISTOGRAM_DIMENSIONS.items():
+        dimension_scores = scores[scores["dimension_id"].isin(dimensions)]
+        ref_specific = (dimension_scores["ref_start_location_id"] != -1).any()
+
+        for ref_start_location_id in (ref_start_location_ids if ref_specific else [-1]):
+            ref_scores = dimension_scores[dimension_scores["ref_start_location_id"].isin([-1, ref_start_location_id])]
+            if ref_scores.empty:
+                continue
+            result = compute_histograms(ref_scores, dimensions, decimals)
+            result["ref_start_location_id"] = ref_start_location_id
+            result["histogram"] = histogram
+            histograms.append(result)
+
+    if not histograms:
+        return pd.DataFrame(columns=["ref_start_location_id", "month", "histogram", "bin_edges", "heights"])
+
+    histograms = pd.concat(histograms, ignore_index=True)
+    histograms["bin_edges"] = histograms["bin_edges"].map(json.dumps)
+    histograms["heights"] = histograms["heights"].map(json.dumps)
+
+    return histograms[["ref_start_location_id", "month", "histogram", "bin_edges", "heights"]]
+
+
+def fill_slider_histograms(db:Database, table_name:str = HISTOGRAM_TABLE) -> None:
+    ''' Recompute the slider histograms from core_scores (after filling in the scores)
+        ! Replaces all histograms in one transaction !
+    Input:  - db: Database object
+            - table_name: name of the histogram table
+    Output: None
+    '''
+    dimension_ids = ", ".join(str(d) for dimensions in HISTOGRAM_DIMENSIONS.values() for d in dimensions)
+    scores = db.fetch_data(sql=f"""
+        SELECT location_id, dimension_id, start_date, end_date, ref_start_location_id, raw_value
+        FROM core_scores
+        WHERE dimension_id IN ({dimension_ids})
+        """)
+    decimals = db.fetch_data(sql=f"""
+        SELECT dimension_id, raw_value_decimals
+        FROM core_dimensions
+        WHERE dimension_id IN ({dimension_ids})
+        """).set_index("dimension_id")["raw_value_decimals"].fillna(0).astype(int).to_dict()
+    ref_start_location_ids = db.fetch_data(sql="SELECT location_id FROM core_ref_start_locations")["location_id"].tolist()
+
+    histograms = get_slider_histograms(scores, decimals, ref_start_location_ids)
+
+    db.execute_sql(f"DELETE FROM {table_name}", commit=False)
+    db.insert_data(histograms, table_name, updated_at=True, method="copy")
@@ -0,0 +1,110 @@
+import os
+import sys
+# Add backend folder to path
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../../"))
+sys.path.append(parent_dir)
+
+from database.db_helpers import Database
+
+import pandas as pd
+
+
+####----| Monthly climatology (running sums and counts of the historical weather per location and month) |----####
+
+CLIMATOLOGY_TABLE = "raw_weather_climatology"
+CLIMATOLOGY_COLUMNS = ["temperature_max", "temperature_min", "sunshine_duration", "daylight_duration", "precipitation_duration",
+                       "precipitation_sum", "rain_sum", "snowfall_sum", "wind_speed_max"]
+
+
+def aggregate_climatology(weather:pd.DataFrame) -> pd.DataFrame:
+    ''' Aggregate historical weather data points to sums and counts per location and month
+    Input:  weather: rows of raw_weather_historical (location_id, year, month and the weather columns)
+    Output: rows of raw_weather_climatology
+    '''
+    values = weather[CLIMATOLOGY_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    values = pd.concat([
+        weather[["location_id", "month"]],
+        weather["year"].rename("year_min"),
+        weather["year"].rename("year_max"),
+        weather["year"].rename("year_count"),
+        values.add_suffix("_sum"),
+        values.notna().add_suffix("_count")
+    ], axis=1)
+
+    return values.groupby(["location_id", "month"], as_index=False).agg({
+        "year_count": "count",
+        "year_min": "min",
+        "year_max": "max",
+        **{f"{col}_sum": "sum" for col in CLIMATOLOGY_COLUMNS},
+        **{f"{col}_count": "sum" for col in CLIMATOLOGY_COLUMNS}
+    })
+
+
+def update_climatology(weather:pd.DataFrame, db:Database, table_name:str = CLIMATOLOGY_TABLE) -> None:
+    ''' Add newly inserted historical weather data points to the climatology (without reading the history)
+        ! Commits the changes, i.e. also a preceding insert into raw_weather_historical with commit=False,
+          so that each data point is added exactly once !
+    Input:  - weather: inserted rows of raw_weather_historical
+            - db: Database object
+            - table_name: name of the climatology table
+    Output: None
+    '''
+    climatology = aggregate_climatology(weather)
+    update_expressions = {
+        "year_min": f"LEAST({table_name}.year_min, EXCLUDED.year_min)",
+        "year_max": f"GREATEST({table_name}.year_max, EXCLUDED.year_max)",
+        **{
+            col: f"{table_name}.{col} + EXCLUDED.{col}"
+            for col in climatology.columns if col.endswith(("_sum", "_count"))
+        }
+    }
+    db.upsert_data(climatology, table_name, conflict_columns=["location_id", "month"],
+                   updated_at=True, update_expressions=update_expressions)
+
+
+def rebuild_climatology(db:Database, table_name:str = CLIMATOLOGY_TABLE) -> None:
+    ''' Rebuild the climatology from all rows of raw_weather_historical (e.g. after creating the table or deleting data points)
+    Input:  - db: Database object
+            - table_name: name of the climatology table
+    Output: None
+    '''
+    db.execute_sql(f"""
+        DELETE FROM {table_name};
+        INSERT INTO {table_name} (location_id, month, year_count, year_min, year_max,
+            {", ".join(f"{col}_sum, {col}_count" for col in CLIMATOLOGY_COLUMNS)})
+        SELECT location_id, month, COUNT(*), MIN(year), MAX(year),
+            {", ".join(f"COALESCE(SUM({col}), 0), COUNT({col})" for col in CLIMATOLOGY_COLUMNS)}
+        FROM raw_weather_historical
+        GROUP BY location_id, month
+        """)
+
+
+def seed_climatology(db:Database, table_name:str = CLIMATOLOGY_TABLE) -> bool:
+    ''' Create the climatology table if it does not exist and fill it from raw_weather_historical if it is empty
+        (the climatology of an existing database, to which update_climatology then adds new data points)
+    Input:  - db: Database object
+            - table_name: name of the climatology table
+    Output: whether the climatology was rebuilt
+    '''
+    exists = db.fetch_data(sql=f"SELECT to_regclass('{table_name}') IS NOT NULL AS table_exists")["table_exists"][0]
+    if exists and len(db.fetch_data(sql=f"SELECT 1 FROM {table_name} LIMIT 1")) > 0:
+        return False
+
+    if not exists:
+        db.create_db_object(table_name)
+    rebuild_climatology(db, table_name)
+    return True
+
+
+def read_climatology(db:Database, table_name:str = CLIMATOLOGY_TABLE) -> pd.DataFrame:
+    ''' Read the average weather per location and month
+    Input:  - db: Database object
+            - table_name: name of the climatology table
+    Output: location_id, month, year_min, year_max and the average of each weather column (NaN without data points)
+    '''
+    return db.fetch_data(sql=f"""
+        SELECT location_id, month, year_min, year_max,
+            {", ".join(f"{col}_sum / NULLIF({col}_count, 0) AS {col}" for col in CLIMATOLOGY_COLUMNS)}
+        FROM {table_name}
+        ORDER BY location_id, month
+        """)
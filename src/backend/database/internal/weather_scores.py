@@ -5,6 +5,7 @@ parent_dir = os.path.dirname(os.path.realpath(__file__+"/../../"))
 sys.path.append(parent_dir)
 
 from database.db_helpers import Database
+from database.internal.weather_climatology import CLIMATOLOGY_COLUMNS, read_climatology
 
 import calendar
 from datetime import datetime
@@ -22,27 +23,19 @@ class WeatherScores:
         self.db = db
 
 
-    def prep_data(self, year:int) -> pd.DataFrame:
+    def prep_data(self, year:int, climatology:pd.DataFrame = None) -> pd.DataFrame:
         ''' Fetch the data
         Input:  - db
                 - year
+                - climatology: average weather per location and month (read from raw_weather_climatology if not given)
         Output: weather data
         '''
-        # Fetch the data
-        data = self.db.fetch_data(total_object="raw_weather_historical")
-
-        # Aggregate per location and month
-        data = data.pivot_table(index=["location_id", "month"],
-                                aggfunc={"temperature_max": "mean",
-                                         "temperature_min": "mean",
-                                         "sunshine_duration": "mean",
-                                         "daylight_duration": "mean",
-                                         "precipitation_duration": "mean",
-                                         "precipitation_sum": "mean",
-                                         "rain_sum": "mean",
-                                         "snowfall_sum": "mean",
-                                         "wind_speed_max": "mean"}) \
-            .reset_index(inplace=False)
+        # Fetch the data (aggregated per location and month), without locations and months without any data points
+        if climatology is None:
+            climatology = read_climatology(self.db)
+        data = climatology[["location_id", "month"] + CLIMATOLOGY_COLUMNS] \
+            .dropna(how="all", subset=CLIMATOLOGY_COLUMNS) \
+            .reset_index(drop=True)
 
         # Rename columns
         new_names = {
@@ -112,8 +105,9 @@ class WeatherScores:
         years = (datetime.now().year, datetime.now().year+1)
 
         # Get the data for the current and next year
-        current = self.prep_data(year=years[0])
-        next = self.prep_data(year=years[1])
+        climatology = read_climatology(self.db)
+        current = self.prep_data(year=years[0], climatology=climatology)
+        next = self.prep_data(year=years[1], climatology=climatology)
 
         # Merge the data
         return pd.concat([current, next], axis=0)
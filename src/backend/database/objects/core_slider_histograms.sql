@@ -0,0 +1,18 @@
+CREATE TABLE core_slider_histograms (
+    ref_start_location_id   INTEGER DEFAULT -1 NOT NULL,
+    month                   DATE NOT NULL,
+    histogram               VARCHAR(255) NOT NULL,
+    bin_edges               JSONB NOT NULL,
+    heights                 JSONB NOT NULL,
+    updated_at              TIMESTAMP WITHOUT TIME ZONE DEFAULT (now() AT TIME ZONE 'utc-01'),
+    PRIMARY KEY (ref_start_location_id, month, histogram)
+);
+
+COMMENT ON TABLE core_slider_histograms IS 'Table stores the histograms of the raw values shown above the sliders of the list filters, per reference start location and month (recomputed after filling in the scores). The histograms of one reference start location have the same bin edges in all months, i.e. the histogram of a travel interval is the sum of the histograms of its months.';
+
+COMMENT ON COLUMN core_slider_histograms.ref_start_location_id IS 'Foreign key to the start location table. -1 if the histogram does not depend on the start location';
+COMMENT ON COLUMN core_slider_histograms.month IS 'First day of the month the raw values are averaged over';
+COMMENT ON COLUMN core_slider_histograms.histogram IS 'Name of the histogram (travel_cost, accommodation_cost or best_reachability)';
+COMMENT ON COLUMN core_slider_histograms.bin_edges IS 'JSON array of the bin edges (number of bins + 1)';
+COMMENT ON COLUMN core_slider_histograms.heights IS 'JSON array of the number of locations per bin';
+COMMENT ON COLUMN core_slider_histograms.updated_at IS 'Timestamp of the last update of the record';
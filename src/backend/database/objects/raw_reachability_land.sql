@@ -14,6 +14,8 @@ CREATE TABLE raw_reachability_land (
     pt_polyline TEXT,
     pt_geojson TEXT,
     pt_total_transfers INTEGER,
+    car_route_levels TEXT,
+    pt_route_levels TEXT,
     updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT (now() AT TIME ZONE 'utc-01'),
     FOREIGN KEY (ref_id) REFERENCES core_ref_start_locations(location_id),
     FOREIGN KEY (loc_id) REFERENCES core_locations(location_id)
@@ -36,4 +38,6 @@ COMMENT ON COLUMN raw_reachability_land.pt_polyline IS 'Polyline for the public
 COMMENT ON COLUMN raw_reachability_land.pt_total_transfers IS 'Total number of transfers for the public transport route';
 COMMENT ON COLUMN raw_reachability_land.updated_at IS 'Timestamp of the last update of the record';
 COMMENT ON COLUMN raw_reachability_land.car_geojson IS 'GeoJSON of the car route';
-COMMENT ON COLUMN raw_reachability_land.pt_geojson IS 'GeoJSON of the public transport route';
\ No newline at end of file
+COMMENT ON COLUMN raw_reachability_land.pt_geojson IS 'GeoJSON of the public transport route';
+COMMENT ON COLUMN raw_reachability_land.car_route_levels IS 'Car route simplified at several tolerances, as JSON with the tolerances (in degrees) and one encoded polyline per tolerance';
+COMMENT ON COLUMN raw_reachability_land.pt_route_levels IS 'Public transport route simplified at several tolerances, as JSON with the tolerances (in degrees) and one encoded polyline per tolerance';
\ No newline at end of file
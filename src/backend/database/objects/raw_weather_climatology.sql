@@ -0,0 +1,57 @@
+DROP TABLE IF EXISTS raw_weather_climatology;
+
+CREATE TABLE raw_weather_climatology (
+    location_id                     INT,
+    month                           INT,
+    year_count                      INT DEFAULT 0 NOT NULL,
+    year_min                        INT,
+    year_max                        INT,
+    temperature_max_sum             NUMERIC DEFAULT 0 NOT NULL,
+    temperature_max_count           INT DEFAULT 0 NOT NULL,
+    temperature_min_sum             NUMERIC DEFAULT 0 NOT NULL,
+    temperature_min_count           INT DEFAULT 0 NOT NULL,
+    sunshine_duration_sum           NUMERIC DEFAULT 0 NOT NULL,
+    sunshine_duration_count         INT DEFAULT 0 NOT NULL,
+    daylight_duration_sum           NUMERIC DEFAULT 0 NOT NULL,
+    daylight_duration_count         INT DEFAULT 0 NOT NULL,
+    precipitation_duration_sum      NUMERIC DEFAULT 0 NOT NULL,
+    precipitation_duration_count    INT DEFAULT 0 NOT NULL,
+    precipitation_sum_sum           NUMERIC DEFAULT 0 NOT NULL,
+    precipitation_sum_count         INT DEFAULT 0 NOT NULL,
+    rain_sum_sum                    NUMERIC DEFAULT 0 NOT NULL,
+    rain_sum_count                  INT DEFAULT 0 NOT NULL,
+    snowfall_sum_sum                NUMERIC DEFAULT 0 NOT NULL,
+    snowfall_sum_count              INT DEFAULT 0 NOT NULL,
+    wind_speed_max_sum              NUMERIC DEFAULT 0 NOT NULL,
+    wind_speed_max_count            INT DEFAULT 0 NOT NULL,
+    updated_at                      TIMESTAMP WITHOUT TIME ZONE DEFAULT (now() AT TIME ZONE 'utc-01'),
+    PRIMARY KEY (location_id, month),
+    FOREIGN KEY (location_id) REFERENCES core_locations(location_id)
+);
+
+COMMENT ON TABLE raw_weather_climatology IS 'Table stores running sums and counts of the historical weather data per destination and month (updated with every insert into raw_weather_historical). The average of a column is <column>_sum / <column>_count.';
+
+COMMENT ON COLUMN raw_weather_climatology.location_id IS 'Foreign key to the location table';
+COMMENT ON COLUMN raw_weather_climatology.month IS 'Month of the aggregated weather data points';
+COMMENT ON COLUMN raw_weather_climatology.year_count IS 'Number of aggregated years (weather data points)';
+COMMENT ON COLUMN raw_weather_climatology.year_min IS 'First aggregated year';
+COMMENT ON COLUMN raw_weather_climatology.year_max IS 'Last aggregated year';
+COMMENT ON COLUMN raw_weather_climatology.temperature_max_sum IS 'Sum of the recorded maximum temperatures';
+COMMENT ON COLUMN raw_weather_climatology.temperature_max_count IS 'Number of recorded maximum temperatures';
+COMMENT ON COLUMN raw_weather_climatology.temperature_min_sum IS 'Sum of the recorded minimum temperatures';
+COMMENT ON COLUMN raw_weather_climatology.temperature_min_count IS 'Number of recorded minimum temperatures';
+COMMENT ON COLUMN raw_weather_climatology.sunshine_duration_sum IS 'Sum of the durations of sunshine';
+COMMENT ON COLUMN raw_weather_climatology.sunshine_duration_count IS 'Number of recorded durations of sunshine';
+COMMENT ON COLUMN raw_weather_climatology.daylight_duration_sum IS 'Sum of the durations of daylight';
+COMMENT ON COLUMN raw_weather_climatology.daylight_duration_count IS 'Number of recorded durations of daylight';
+COMMENT ON COLUMN raw_weather_climatology.precipitation_duration_sum IS 'Sum of the durations of percipitation';
+COMMENT ON COLUMN raw_weather_climatology.precipitation_duration_count IS 'Number of recorded durations of percipitation';
+COMMENT ON COLUMN raw_weather_climatology.precipitation_sum_sum IS 'Sum of the total amounts of percipitation';
+COMMENT ON COLUMN raw_weather_climatology.precipitation_sum_count IS 'Number of recorded total amounts of percipitation';
+COMMENT ON COLUMN raw_weather_climatology.rain_sum_sum IS 'Sum of the total amounts of rain';
+COMMENT ON COLUMN raw_weather_climatology.rain_sum_count IS 'Number of recorded total amounts of rain';
+COMMENT ON COLUMN raw_weather_climatology.snowfall_sum_sum IS 'Sum of the total amounts of snowfall';
+COMMENT ON COLUMN raw_weather_climatology.snowfall_sum_count IS 'Number of recorded total amounts of snowfall';
+COMMENT ON COLUMN raw_weather_climatology.wind_speed_max_sum IS 'Sum of the maximum windspeeds';
+COMMENT ON COLUMN raw_weather_climatology.wind_speed_max_count IS 'Number of recorded maximum windspeeds';
+COMMENT ON COLUMN raw_weather_climatology.updated_at IS 'Timestamp of the last update of the record';
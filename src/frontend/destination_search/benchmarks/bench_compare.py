@@ -0,0 +1,130 @@
+"""
+Regression check and micro-benchmark of the data assembly of CompareView.
+
+Compares the previous implementation (one .loc lookup in the MultiIndexed
+scores per location, dimension and value) with
+destinations.compare_data.get_compare_data for 2 to 10 compared locations.
+Both must return the same JSON.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_compare.py
+"""
+import os
+import sys
+import json
+import timeit
+from types import SimpleNamespace
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from benchmarks.synthetic_data import generate_scores
+from destinations.compare_data import get_compare_data
+import numpy as np
+import pandas as pd
+
+
+def get_compare_data_loop(categories, locations: list[dict], scores: pd.DataFrame) -> list[dict]:
+    """Previous implementation of CompareView.get_context_data (for reference)."""
+    scores = scores.set_index(['location_id', 'dimension_id'])
+
+    def get_value(location_id: int, dimension_id: int, col: str):
+        """Get row from scores."""
+        try:
+            return scores.loc[(location_id, dimension_id), col].item()
+        except:
+            return None
+
+    def format_raw_value(location, dimension) -> str:
+        """Format raw value."""
+        raw_value = get_value(location['location_id'], dimension.dimension_id, 'raw_value')
+        if pd.isna(raw_value):
+            return ''
+        return f' ({raw_value:.{dimension.raw_value_decimals}f}{dimension.raw_value_unit})'
+
+    return [
+        {
+            'category_id': category.category_id,
+            'category_name': category.category_name,
+            'category_description': category.description,
+            'axis_title': category.axis_title,
+            'axis_label_low': category.axis_label_low,
+            'axis_label_high': category.axis_label_high,
+            'locations': [
+                {
+                    'location_id': location.get('location_id'),
+                    'city': location.get('city'),
+                    'country': location.get('country'),
+                    'dimensions': [
+                        {
+                            'dimension_id': dimension.dimension_id,
+                            'dimension_name': dimension.dimension_name,
+                            'dimension_description': dimension.description,
+                            'dimension_icon_url': dimension.icon_url,
+                            'score': get_value(location.get('location_id'), dimension.dimension_id, 'score'),
+                            'raw_value_formatted': format_raw_value(location, dimension),
+                        }
+                        for dimension in category.coredimensions_set.all()
+                    ]
+                }
+                for location in locations
+            ],
+        }
+        for category in categories
+    ]
+
+
+def generate_inputs(n_locations: int, n_dimensions: int = 60, seed: int = 0) -> dict:
+    """Synthetic inputs of get_compare_data (as in CompareView)."""
+    rng = np.random.default_rng(seed)
+
+    # Aggregated scores of the compared locations with a few missing rows
+    scores = generate_scores(n_locations=n_locations, n_dimensions=n_dimensions, n_months=1, seed=seed)
+    scores = scores.loc[rng.random(len(scores)) > 0.05, ['location_id', 'dimension_id', 'score', 'raw_value']]
+
+    # Categories with their dimensions (as prefetched from the database)
+    dimensions = {}
+    for dimension_id in sorted(scores['dimension_id'].unique().tolist() + [9999], reverse=True):
+        dimensions.setdefault(dimension_id // 100, []).append(SimpleNamespace(
+            dimension_id=dimension_id,
+            dimension_name=f'Dimension {dimension_id}',
+            description='',
+            icon_url='',
+            raw_value_decimals=int(rng.integers(0, 3)),
+            raw_value_unit=' EUR'
+        ))
+    categories = [
+        SimpleNamespace(
+            category_id=category_id,
+            category_name=f'Category {category_id}',
+            description='',
+            axis_title='',
+            axis_label_low='',
+            axis_label_high='',
+            coredimensions_set=SimpleNamespace(all=lambda dimensions=category_dimensions: dimensions)
+        )
+        for category_id, category_dimensions in dimensions.items()
+    ]
+
+    locations = [
+        {'location_id': location_id, 'city': f'City {location_id}', 'country': 'Country'}
+        for location_id in range(1, n_locations + 1)
+    ]
+
+    return {'categories': categories, 'locations': locations, 'scores': scores}
+
+
+if __name__ == '__main__':
+    print(f'{"locations":>10} {"loop":>12} {"matrix":>12} {"speedup":>8}')
+    for n_locations in [2, 3, 5, 10]:
+        inputs = generate_inputs(n_locations=n_locations)
+
+        # Check that both implementations return the same result
+        assert json.dumps(get_compare_data_loop(**inputs)) == json.dumps(get_compare_data(**inputs))
+
+        timings = {}
+        for name, function in [('loop', get_compare_data_loop), ('matrix', get_compare_data)]:
+            timings[name] = min(timeit.repeat(lambda: function(**inputs), number=5, repeat=5)) / 5
+        print(
+            f'{n_locations:>10} {timings["loop"]*1000:9.2f} ms {timings["matrix"]*1000:9.2f} ms'
+            f' {timings["loop"]/timings["matrix"]:7.1f}x'
+        )
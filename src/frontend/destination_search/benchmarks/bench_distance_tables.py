@@ -0,0 +1,117 @@
+"""
+Check and benchmark of the distance tables of the relevance (see
+src/backend/database/internal/distance_tables.py and DistanceTables).
+
+Publishes a score snapshot with distance tables for a synthetic core_scores
+table (two months, some dimensions per reference start location) and
+checks that the category distances gathered from the tables match the
+category distances computed from the aggregated scores (up to the float32
+precision of the tables) and rank the locations the same way (Spearman
+correlation of the categories gathered from the tables; the distance to
+start is computed from the scores either way, its ties at the minimum only
+differ by rounding). Compares the time of compute_category_distances with
+and without the tables.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_distance_tables.py [n_locations ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import timeit
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+backend_dir = os.path.realpath(os.path.join(parent_dir, "../../backend"))
+sys.path.append(backend_dir)
+
+from benchmarks.synthetic_data import generate_scores
+from database.internal.distance_tables import build_distance_tables
+from database.internal.score_snapshot import build_snapshot_arrays, write_snapshot
+from destinations.compute_relevance import compute_category_distances
+from destinations.distance_tables import DistanceTables
+from destinations.score_cube import ScoreCube
+import numpy as np
+import pandas as pd
+
+START_DATE, END_DATE = pd.Timestamp('2024-06-03'), pd.Timestamp('2024-06-21')
+REF_START_LOCATION_ID = 10**6 + 1
+N_COUNTRIES = 40
+
+
+def get_inputs(
+        cube: ScoreCube,
+        n_locations: int,
+        rng: np.random.Generator,
+        start_date: pd.Timestamp = START_DATE,
+        end_date: pd.Timestamp = END_DATE
+    ) -> dict:
+    """Inputs of compute_category_distances (as in LocationsListView)."""
+    scores = cube.aggregate(start_date=start_date, end_date=end_date, ref_start_location_id=REF_START_LOCATION_ID)
+    scores = scores[['location_id', 'category_id', 'dimension_id', 'score']]
+    distance_to_start = pd.DataFrame({
+        'location_id': np.arange(1, n_locations + 1),
+        'category_id': 999,
+        'dimension_id': 9999,
+        'score': rng.random(n_locations)
+    })
+    country = 'Country 7'
+    return {
+        'previous_locations': [3, 17, 42],
+        'previous_countries': {country: [i for i in range(1, n_locations + 1) if f'Country {i % N_COUNTRIES}' == country]},
+        'scores': pd.concat([scores, distance_to_start])
+    }
+
+
+if __name__ == '__main__':
+    sizes = [int(size) for size in sys.argv[1:]] or [1000, 4000]
+    for n_locations in sizes:
+        rng = np.random.default_rng(0)
+        scores = generate_scores(n_locations=n_locations, n_dimensions=40, n_months=2, start='2024-06-01', n_ref_start_locations=1)
+        countries = pd.Series(
+            [f'Country {i % N_COUNTRIES}' for i in range(1, n_locations + 1)],
+            index=pd.Index(np.arange(1, n_locations + 1), name='location_id')
+        )
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            started = time.perf_counter()
+            distance_tables = build_distance_tables(scores, countries)
+            build_time = time.perf_counter() - started
+            path = write_snapshot(build_snapshot_arrays(scores), version='1', snapshot_dir=snapshot_dir, distance_tables=distance_tables)
+            tables = DistanceTables.from_snapshot(path)
+            cube = ScoreCube.from_snapshot(path)
+            inputs = get_inputs(cube, n_locations, rng)
+
+            def gather():
+                return tables.mean_distances(
+                    previous_locations=inputs['previous_locations'],
+                    previous_countries=inputs['previous_countries'],
+                    location_ids=inputs['scores']['location_id'].unique(),
+                    start_date=START_DATE,
+                    end_date=END_DATE,
+                    ref_start_location_id=REF_START_LOCATION_ID
+                )
+
+            # Check
+            precomputed = gather()
+            expected = compute_category_distances(**inputs)
+            result = compute_category_distances(**inputs, precomputed=precomputed)
+            assert len(precomputed.columns) == expected.shape[1] - 1  # All but distance to start
+            pd.testing.assert_index_equal(result.index, expected.index)
+            pd.testing.assert_index_equal(result.columns, expected.columns)
+            max_diff = np.abs(result.to_numpy() - expected.to_numpy()).max()
+            assert max_diff < 1e-5, max_diff
+            rank_correlation = min(result[category].corr(expected[category], method='spearman') for category in precomputed.columns)
+            assert rank_correlation >= 0.999, rank_correlation
+            size_mb = sum(array.nbytes for array in distance_tables['arrays'].values()) / 1e6
+            print(f'{n_locations} locations: {len(distance_tables["tables"])} tables '
+                  f'({len(distance_tables["arrays"]) - 1} distinct, {size_mb:.0f} MB, built in {build_time:.1f} s), '
+                  f'max. difference {max_diff:.1e}, min. rank correlation {rank_correlation:.6f}')
+
+            number = 10
+            computed = timeit.timeit(lambda: compute_category_distances(**inputs), number=number) / number
+            gathered = timeit.timeit(
+                lambda: compute_category_distances(**inputs, precomputed=gather()), number=number
+            ) / number
+            print(f'{n_locations} locations: category distances from scores {computed*1000:7.2f} ms, '
+                  f'with distance tables {gathered*1000:7.2f} ms')
@@ -0,0 +1,104 @@
+"""
+Check and benchmark of the list filters (LocationsListView.filter_locations).
+
+Compares the previous implementation (one boolean filter and DataFrame copy
+per slider) with destinations.filter_index.FilterIndex on synthetic location
+lists of the current size and 10 times the current size, for random filter
+settings as sent while dragging a slider.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_filter_index.py
+"""
+import os
+import sys
+import timeit
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from benchmarks.synthetic_data import generate_locations_list
+from destinations.filter_index import FilterIndex
+import numpy as np
+import pandas as pd
+
+HIST_VALUE_FILTERS = {
+    'distance': 'distance_to_start',
+    'population': 'population',
+    'travel_cost': 'dim_41',
+    'accommodation_cost': 'dim_42',
+    'best_reachability': 'best_reachability'
+}
+MODES_OF_TRANSPORT = ['dim_61', 'dim_62', 'dim_63']
+
+
+def filter_previous(locations_list: pd.DataFrame, filters_form_data: dict) -> pd.DataFrame:
+    """Previous implementation of filter_locations (for reference)."""
+    for filter_name, variable in HIST_VALUE_FILTERS.items():
+        value = filters_form_data.get(f'min_{filter_name}')
+        if value is not None:
+            locations_list = locations_list[locations_list[variable] >= value]
+    for filter_name, variable in HIST_VALUE_FILTERS.items():
+        value = filters_form_data.get(f'max_{filter_name}')
+        if value is not None:
+            locations_list = locations_list[locations_list[variable] <= value]
+    if filters_form_data['min_temperature'] is not None:
+        locations_list = locations_list[locations_list['dim_22'] >= filters_form_data['min_temperature']]
+    if filters_form_data['max_temperature'] is not None:
+        locations_list = locations_list[locations_list['dim_21'] <= filters_form_data['max_temperature']]
+    mode_of_transport = filters_form_data.get('mode_of_transport')
+    if len(mode_of_transport) > 0:
+        locations_list = locations_list[locations_list[mode_of_transport].notna().any(axis=1)]
+    return locations_list
+
+
+def filter_index(index: FilterIndex, locations_list: pd.DataFrame, filters_form_data: dict) -> pd.DataFrame:
+    """Same as LocationsListView.filter_locations."""
+    ranges = {
+        variable: (filters_form_data.get(f'min_{filter_name}'), filters_form_data.get(f'max_{filter_name}'))
+        for filter_name, variable in HIST_VALUE_FILTERS.items()
+    }
+    ranges['dim_22'] = (filters_form_data['min_temperature'], None)
+    ranges['dim_21'] = (None, filters_form_data['max_temperature'])
+    rows = index.filter(ranges=ranges, any_present=filters_form_data.get('mode_of_transport'))
+    return locations_list.take(rows) if len(rows) < len(locations_list) else locations_list
+
+
+def random_filters(locations_list: pd.DataFrame, rng: np.random.Generator) -> dict:
+    """Random slider settings (about half of the sliders moved)."""
+    filters_form_data = {'min_temperature': None, 'max_temperature': None, 'mode_of_transport': []}
+    for filter_name, variable in HIST_VALUE_FILTERS.items():
+        low, high = np.nanquantile(locations_list[variable], sorted(rng.uniform(0, 1, 2)))
+        filters_form_data[f'min_{filter_name}'] = round(low) if rng.random() < 0.5 else None
+        filters_form_data[f'max_{filter_name}'] = round(high) if rng.random() < 0.5 else None
+    if rng.random() < 0.5:
+        filters_form_data['min_temperature'] = rng.uniform(0, 20)
+    if rng.random() < 0.5:
+        filters_form_data['max_temperature'] = rng.uniform(20, 40)
+    if rng.random() < 0.5:
+        filters_form_data['mode_of_transport'] = list(rng.choice(MODES_OF_TRANSPORT, size=rng.integers(1, 4), replace=False))
+    return filters_form_data
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    columns = list(HIST_VALUE_FILTERS.values()) + ['dim_21', 'dim_22'] + MODES_OF_TRANSPORT
+
+    for n_locations in [800, 8000]:
+        locations_list = generate_locations_list(n_locations)
+        index = FilterIndex(locations_list, columns)
+        filters = [random_filters(locations_list, rng) for _ in range(200)]
+
+        for filters_form_data in filters:
+            expected = filter_previous(locations_list, filters_form_data)
+            result = filter_index(index, locations_list, filters_form_data)
+            assert expected.equals(result), filters_form_data
+
+        number = 3
+        build = timeit.timeit(lambda: FilterIndex(locations_list, columns), number=number) / number
+        previous = timeit.timeit(
+            lambda: [filter_previous(locations_list, f) for f in filters], number=number
+        ) / number / len(filters)
+        indexed = timeit.timeit(
+            lambda: [filter_index(index, locations_list, f) for f in filters], number=number
+        ) / number / len(filters)
+        print(f'{n_locations:>5} locations: previous {previous*1000:5.2f} ms, filter index {indexed*1000:5.2f} ms '
+              f'per request (index built once in {build*1000:.2f} ms)')
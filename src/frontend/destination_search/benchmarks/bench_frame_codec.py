@@ -0,0 +1,53 @@
+"""
+Benchmark of the encodings of the cached location list.
+
+Compares the previous session encoding (JSON of to_dict(orient='list') and
+pd.DataFrame on every request) with pickle and the .npz encoding of
+destinations.frame_codec: encode/decode time and payload size.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_frame_codec.py [n_locations]
+"""
+import os
+import sys
+import json
+import pickle
+import timeit
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from benchmarks.synthetic_data import generate_locations_list
+from destinations.frame_codec import encode_frame, decode_frame
+import pandas as pd
+
+
+def encode_json(frame: pd.DataFrame) -> bytes:
+    return json.dumps(frame.to_dict(orient='list'), separators=(',', ':')).encode()
+
+
+def decode_json(data: bytes) -> pd.DataFrame:
+    return pd.DataFrame(json.loads(data))
+
+
+def encode_pickle(frame: pd.DataFrame) -> bytes:
+    return pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+if __name__ == '__main__':
+    n_locations = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+    locations = generate_locations_list(n_locations=n_locations)
+    print(f'Location list: {locations.shape[0]:,} rows x {locations.shape[1]} columns')
+
+    # Check that the encoding round trips
+    pd.testing.assert_frame_equal(decode_frame(encode_frame(locations)), locations)
+
+    print(f'{"":>8} {"encode":>12} {"decode":>12} {"size":>12}')
+    for name, encode, decode in [
+        ('json', encode_json, decode_json),
+        ('pickle', encode_pickle, pickle.loads),
+        ('npz', encode_frame, decode_frame)
+    ]:
+        data = encode(locations)
+        encode_time = min(timeit.repeat(lambda: encode(locations), number=20, repeat=5)) / 20
+        decode_time = min(timeit.repeat(lambda: decode(data), number=20, repeat=5)) / 20
+        print(f'{name:>8} {encode_time*1000:9.2f} ms {decode_time*1000:9.2f} ms {len(data)/1024:9.1f} kB')
@@ -0,0 +1,74 @@
+"""
+Regression check and benchmark of a preference change in the list view.
+
+If only the preferences change, LocationsListView.get takes the cached
+category distances (compute_category_distances) of the travellers input and
+only reweights them (weight_category_distances), instead of recomputing the
+location list. Checks that the reweighted relevance is exactly the relevance
+of the previous implementation for random preferences, and compares the
+time of a full computation of the relevance with the time of a preference
+change (decode the cached location list, reweight, encode the new list).
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_preference_change.py [n_locations]
+"""
+import os
+import sys
+import timeit
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from benchmarks.bench_relevance import compute_relevance_loop, generate_inputs
+from benchmarks.synthetic_data import generate_locations_list
+from destinations.compute_relevance import compute_category_distances, compute_relevance, weight_category_distances
+from destinations.frame_codec import decode_frame, encode_frame
+import numpy as np
+import pandas as pd
+
+
+def random_preferences(categories: list, rng: np.random.Generator) -> dict:
+    """Random importance and direction per category (as set with the sliders)."""
+    preferences = {}
+    for category in categories:
+        preferences[f'importance_{category}'] = float(rng.integers(0, 5))
+        preferences[f'direction_{category}'] = bool(rng.integers(0, 2))
+    preferences[f'importance_{categories[0]}'] = float(rng.integers(1, 5))
+    return preferences
+
+
+def preference_change(encoded_list: bytes, distances: pd.DataFrame, preferences: dict) -> bytes:
+    """Same as LocationsListView.get if only the preferences changed (without the cache lookups)."""
+    locations_list = decode_frame(encoded_list)
+    relevance = weight_category_distances(distances=distances, preferences=preferences)
+    locations_list['relevance'] = relevance.reindex(locations_list['location_id']).to_numpy()
+    return encode_frame(locations_list)
+
+
+if __name__ == '__main__':
+    n_locations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    inputs = generate_inputs(n_locations=n_locations)
+    categories = sorted(inputs['scores']['category_id'].unique())
+    rng = np.random.default_rng(1)
+
+    # Check
+    distances = compute_category_distances(inputs['previous_locations'], inputs['previous_countries'], inputs['scores'])
+    for _ in range(20):
+        preferences = random_preferences(categories, rng)
+        pd.testing.assert_series_equal(
+            compute_relevance_loop(**{**inputs, 'preferences': preferences}),
+            weight_category_distances(distances, preferences),
+            check_exact=True
+        )
+    print('Results are identical.')
+
+    # Cached location list of the travellers input (without relevance)
+    locations_list = generate_locations_list(n_locations).drop(columns='relevance')
+    locations_list['location_id'] = np.arange(1, n_locations + 1)
+    encoded_list = encode_frame(locations_list)
+
+    number = 20
+    full = timeit.timeit(lambda: compute_relevance(**{**inputs, 'preferences': preferences}), number=number) / number
+    reweight = timeit.timeit(lambda: weight_category_distances(distances, preferences), number=number) / number
+    change = timeit.timeit(lambda: preference_change(encoded_list, distances, preferences), number=number) / number
+    print(f'{n_locations} locations: relevance from scores {full*1000:6.2f} ms, reweighting {reweight*1000:5.2f} ms, '
+          f'preference change incl. location list codec {change*1000:5.2f} ms')
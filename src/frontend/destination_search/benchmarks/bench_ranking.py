@@ -0,0 +1,104 @@
+"""
+Check and benchmark of the ranking and pagination of the list view.
+
+Compares the previous implementation (sort the filtered location list,
+convert all rows to dicts, paginate) with destinations.filter_index.RankedLocations
+(argpartition for the first pages, presorted permutations otherwise, dicts only
+for the rows of the page) on synthetic location lists of the current size and
+10 times the current size.
+
+Checks that every page equals the page of the stable sort of the filtered list
+and that the pages of a ranking do not overlap.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_ranking.py
+"""
+import os
+import sys
+import timeit
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from django.conf import settings
+if not settings.configured:
+    settings.configure()
+
+from benchmarks.synthetic_data import generate_locations_list
+from destinations.filter_index import FilterIndex, RankedLocations
+from django.core.paginator import Paginator
+import numpy as np
+import pandas as pd
+
+PER_PAGE = 36
+SORT_OPTIONS = {
+    'relevance_desc': ('relevance', False),
+    'distance_asc': ('distance_to_start', True),
+    'distance_desc': ('distance_to_start', False),
+    'name_asc': ('city', True),
+    'name_desc': ('city', False),
+}
+FILTER_COLUMNS = ['distance_to_start', 'population', 'dim_41', 'dim_42', 'best_reachability', 'dim_21', 'dim_22']
+
+
+def page_previous(locations_list: pd.DataFrame, sort_column: str, ascending: bool, page: int, kind: str = 'quicksort'):
+    """Previous implementation of the ranking and pagination (for reference)."""
+    locations_list = locations_list.sort_values(by=sort_column, ascending=ascending, ignore_index=True, kind=kind)
+    object_list = (
+        locations_list
+        .reset_index().rename(columns={'index': 'rank'})
+        .assign(rank=lambda x: x['rank'] + 1)
+        .to_dict('records')
+    )
+    return Paginator(object_list=object_list, per_page=PER_PAGE).get_page(page)
+
+
+def page_ranked(locations_list: pd.DataFrame, index: FilterIndex, mask: np.ndarray, sort_column: str, ascending: bool, page: int):
+    object_list = RankedLocations(locations=locations_list, index=index, mask=mask, column=sort_column, ascending=ascending)
+    return Paginator(object_list=object_list, per_page=PER_PAGE).get_page(page)
+
+
+if __name__ == '__main__':
+    for n_locations in [800, 8000]:
+        locations_list = generate_locations_list(n_locations)
+        # Ties in the relevance (as for locations with the same scores)
+        locations_list.loc[::10, 'relevance'] = 0.5
+        masks = {
+            'no filter': np.ones(n_locations, dtype=bool),
+            'filtered': (locations_list['dim_41'] <= 25).to_numpy() & (locations_list['population'] >= 10**6).to_numpy()
+        }
+
+        # Check
+        for mask in masks.values():
+            filtered = locations_list[mask]
+            index = FilterIndex(locations_list, FILTER_COLUMNS, ['relevance', 'distance_to_start', 'city'])
+            for sort_column, ascending in SORT_OPTIONS.values():
+                num_pages = Paginator(range(mask.sum()), PER_PAGE).num_pages
+                seen = {}
+                # First pages (argpartition), last page (permutation), first pages again
+                for page in [1, 2, 3, num_pages, 1, 2]:
+                    expected = page_previous(filtered, sort_column, ascending, page, kind='stable')
+                    result = page_ranked(locations_list, index, mask, sort_column, ascending, page)
+                    assert result.paginator.count == expected.paginator.count == mask.sum()
+                    assert pd.DataFrame(list(result)).equals(pd.DataFrame(list(expected))), (sort_column, ascending, page)
+                    if page not in seen:
+                        assert not {row['location_id'] for row in result} & set().union(*seen.values())
+                        seen[page] = {row['location_id'] for row in result}
+                    # Same order of the sort values as the previous (unstable) sort
+                    previous = page_previous(filtered, sort_column, ascending, page)
+                    assert [row[sort_column] for row in result] == [row[sort_column] for row in previous]
+
+        # Benchmark (first page, default order and deeper pages)
+        index = FilterIndex(locations_list, FILTER_COLUMNS, ['relevance', 'distance_to_start', 'city'])
+        number = 20
+        print(f'{n_locations} locations')
+        for name, mask in masks.items():
+            filtered = locations_list[mask]
+            for sort_param, page in [('relevance_desc', 1), ('relevance_desc', 5), ('distance_asc', 1), ('name_asc', 1)]:
+                sort_column, ascending = SORT_OPTIONS[sort_param]
+                previous = timeit.timeit(
+                    lambda: list(page_previous(filtered, sort_column, ascending, page)), number=number
+                ) / number
+                ranked = timeit.timeit(
+                    lambda: list(page_ranked(locations_list, index, mask, sort_column, ascending, page)), number=number
+                ) / number
+                print(f'  {name:>9}, {sort_param:>14}, page {page}: previous {previous*1000:6.2f} ms, ranked {ranked*1000:5.2f} ms')
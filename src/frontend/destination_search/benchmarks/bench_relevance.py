@@ -0,0 +1,106 @@
+"""
+Regression check and micro-benchmark of compute_relevance.
+
+Compares the previous implementation (pandas slicing and one
+sklearn.metrics.pairwise_distances call per category) with the batched
+destinations.compute_relevance on synthetic scores. Both must return exactly
+the same relevance Series.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_relevance.py [n_locations]
+"""
+import os
+import sys
+import timeit
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from benchmarks.synthetic_data import generate_scores
+from destinations.compute_relevance import compute_relevance
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import pairwise_distances
+
+
+def compute_relevance_loop(
+        previous_locations: list[int],
+        previous_countries: dict,
+        scores: pd.DataFrame,
+        preferences: dict,
+        factor: float = 100.
+    ) -> pd.Series:
+    """Previous implementation of compute_relevance (for reference)."""
+    scores = scores.pivot(index='location_id', columns=['category_id', 'dimension_id'], values='score')
+    scores = scores.fillna(scores.mean())
+    if len(previous_countries) > 0:
+        score_previous_countries = []
+        for location_ids in previous_countries.values():
+            score_previous_countries.append(scores.loc[location_ids].mean(axis=0).to_frame().T)
+        scores_previous_countries = pd.concat(score_previous_countries)
+    scores_previous = scores.loc[previous_locations]
+    if len(previous_countries) > 0:
+        scores_previous = pd.concat([scores_previous, scores_previous_countries])
+    scores_new = scores.drop(previous_locations)
+    relevance = 0
+    importance_sum = 0
+    for category in scores.columns.levels[0]:
+        cat_scores_previous = scores_previous.loc[:,category]
+        cat_scores_new = scores_new.loc[:,category]
+        dist = pairwise_distances(cat_scores_previous, cat_scores_new, metric='euclidean')
+        mean_dist = dist.mean(axis=0)
+        mean_dist = (mean_dist - mean_dist.min()) / (mean_dist.max() - mean_dist.min())
+        if not preferences[f'direction_{category}']:
+            mean_dist = 1 - mean_dist
+        weight = preferences[f'importance_{category}']
+        relevance += weight * mean_dist
+        importance_sum += weight
+    relevance = relevance / importance_sum
+    relevance = factor * relevance
+    return pd.Series(relevance, index=scores_new.index, name='relevance')
+
+
+def generate_inputs(n_locations: int = 1000, seed: int = 0) -> dict:
+    """Synthetic inputs of compute_relevance (as in LocationsListView)."""
+    rng = np.random.default_rng(seed)
+
+    # Aggregated scores (one per location and dimension) with a few missings
+    scores = generate_scores(n_locations=n_locations, n_dimensions=60, n_months=1, seed=seed)
+    scores = scores.loc[rng.random(len(scores)) > 0.01, ['location_id', 'category_id', 'dimension_id', 'score']]
+
+    # Distance to start as additional category
+    distance_to_start = pd.DataFrame({
+        'location_id': np.arange(1, n_locations + 1),
+        'category_id': 999,
+        'dimension_id': 9999,
+        'score': rng.random(n_locations)
+    })
+    scores = pd.concat([scores, distance_to_start])
+
+    categories = sorted(scores['category_id'].unique())
+    preferences = {}
+    for category in categories:
+        preferences[f'importance_{category}'] = float(rng.integers(0, 5))
+        preferences[f'direction_{category}'] = bool(rng.integers(0, 2))
+    preferences[f'importance_{categories[0]}'] = 2.5
+
+    return {
+        'previous_locations': [3, 17, 42],
+        'previous_countries': {'Country A': [5, 6, 7], 'Country B': [8]},
+        'scores': scores,
+        'preferences': preferences
+    }
+
+
+if __name__ == '__main__':
+    inputs = generate_inputs(n_locations=int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
+    print(f'Score rows: {len(inputs["scores"]):,}')
+
+    # Check that both implementations return exactly the same result
+    pd.testing.assert_series_equal(compute_relevance_loop(**inputs), compute_relevance(**inputs), check_exact=True)
+    print('Results are identical.')
+
+    timings = {}
+    for name, function in [('loop', compute_relevance_loop), ('batched', compute_relevance)]:
+        timings[name] = min(timeit.repeat(lambda: function(**inputs), number=5, repeat=5)) / 5
+        print(f'{name:>10}: {timings[name]*1000:10.1f} ms')
+    print(f'   speedup: {timings["loop"]/timings["batched"]:10.1f}x')
@@ -0,0 +1,86 @@
+"""
+Check and benchmark of the score snapshot (see
+src/backend/database/internal/score_snapshot.py and ScoreCube.from_snapshot).
+
+Publishes a snapshot of a synthetic core_scores table and checks that the
+memory-mapped cube aggregates like the cube built from the table, and that a
+new publish is picked up through the symlink. Compares the load time and the
+private memory per worker process (Private_Clean + Private_Dirty of
+/proc/self/smaps_rollup, Linux only) of both ways to load the cube, with
+several worker processes answering the same request.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_score_snapshot.py [n_locations] [n_workers]
+"""
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+backend_dir = os.path.realpath(os.path.join(parent_dir, "../../backend"))
+sys.path.append(backend_dir)
+
+from benchmarks.synthetic_data import generate_scores
+from database.internal.score_snapshot import build_snapshot_arrays, write_snapshot
+from destinations.score_cube import ScoreCube
+import numpy as np
+import pandas as pd
+
+START_DATE, END_DATE = pd.Timestamp('2024-06-01'), pd.Timestamp('2024-08-14')
+
+
+def private_memory_mb() -> float:
+    """Private memory of this process (MB)."""
+    with open('/proc/self/smaps_rollup') as file:
+        fields = dict(line.split(':', 1) for line in file if ':' in line)
+    return sum(int(fields[key].split()[0]) for key in ['Private_Clean', 'Private_Dirty']) / 1024
+
+
+def worker(args) -> tuple:
+    """Load the cube as a web worker would and answer one request."""
+    source, path = args
+    baseline = private_memory_mb()
+    started = time.perf_counter()
+    if source == 'snapshot':
+        cube = ScoreCube.from_snapshot(os.path.realpath(os.path.join(path, 'current')))
+    else:
+        cube = ScoreCube.from_frame(pd.read_pickle(path))
+    load_time = time.perf_counter() - started
+    cube.aggregate(start_date=START_DATE, end_date=END_DATE, ref_start_location_id=-1)
+    return load_time, private_memory_mb() - baseline
+
+
+if __name__ == '__main__':
+    n_locations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    scores = generate_scores(n_locations=n_locations)
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        # Publish and check
+        write_snapshot(build_snapshot_arrays(scores), version='1', snapshot_dir=snapshot_dir)
+        cube = ScoreCube.from_snapshot(os.path.realpath(os.path.join(snapshot_dir, 'current')))
+        assert isinstance(cube.score, np.memmap) and not cube.score.flags.writeable
+        expected = ScoreCube.from_frame(scores).aggregate(start_date=START_DATE, end_date=END_DATE, ref_start_location_id=-1)
+        result = cube.aggregate(start_date=START_DATE, end_date=END_DATE, ref_start_location_id=-1)
+        pd.testing.assert_frame_equal(result, expected)
+
+        # A new publish is picked up through the symlink, the old mapping stays valid
+        previous = os.path.realpath(os.path.join(snapshot_dir, 'current'))
+        write_snapshot(build_snapshot_arrays(scores.assign(score=scores['score'] / 2)), version='2', snapshot_dir=snapshot_dir)
+        current = os.path.realpath(os.path.join(snapshot_dir, 'current'))
+        assert current != previous
+        assert ScoreCube.from_snapshot(current).version == '2'
+        pd.testing.assert_frame_equal(cube.aggregate(start_date=START_DATE, end_date=END_DATE, ref_start_location_id=-1), expected)
+
+        # Workers
+        frame_path = os.path.join(snapshot_dir, 'scores.pkl')
+        scores.to_pickle(frame_path)
+        print(f'{len(scores)} scores, cube of {cube.score.nbytes * 2 / 1e6 + cube.present.nbytes / 1e6:.0f} MB, {n_workers} workers')
+        for source, path in [('database', frame_path), ('snapshot', snapshot_dir)]:
+            with get_context('spawn').Pool(n_workers) as pool:
+                results = pool.map(worker, [(source, path)] * n_workers)
+            load_time = max(result[0] for result in results)
+            memory = sum(result[1] for result in results)
+            print(f'{source:>9}: load {load_time*1000:7.1f} ms, private memory of all workers {memory:6.0f} MB')
@@ -0,0 +1,115 @@
+"""
+Check and benchmark of the similarity text stream (openai_proxy) against a
+local fake completion server (see fake_completion_server.py).
+
+N concurrent requests for the same prompt input are served
+- as before: one blocking, non-streamed completion per request
+- by destinations.similarity_text.stream_similarity_text: one streamed
+  upstream call shared by all requests, then from the cache
+
+Checks that all requests get the same text, that the prompt is built and the
+completion API is called once, and that failed completions are not cached.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_similarity_text.py [n_requests]
+"""
+import os
+import sys
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from django.conf import settings
+settings.configure(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'similarity_text': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'similarity_text'},
+})
+
+from benchmarks.fake_completion_server import FakeCompletionServer, TEXT
+from destinations.similarity_text import COMPLETION_PARAMS, get_prompt_key, stream_similarity_text
+from openai import OpenAI
+
+MESSAGES = [{'role': 'user', 'content': 'Compare the target destination with my previous destinations.'}]
+PROMPT_TIME = 0.05  # time to build the prompt (scores of all locations)
+
+
+def get_completion_blocking() -> str:
+    """Previous implementation of openai_proxy (prompt and completion per request, for reference)."""
+    time.sleep(PROMPT_TIME)
+    completion = OpenAI().chat.completions.create(messages=MESSAGES, **COMPLETION_PARAMS)
+    return completion.choices[0].message.content
+
+
+async def request_stream(key: str, get_messages, started: float) -> dict:
+    """Consume the event stream of one request."""
+    result = {'text': '', 'first_text': None, 'events': []}
+    async for event in stream_similarity_text(key, get_messages):
+        data = json.loads(event.decode().removeprefix('data: '))
+        result['events'].append(data)
+        if 'text' in data:
+            result['text'] += data['text']
+            if result['first_text'] is None:
+                result['first_text'] = time.perf_counter() - started
+    result['total'] = time.perf_counter() - started
+    return result
+
+
+async def run_streams(n_requests: int, key: str, prompts: list) -> list[dict]:
+    """Run concurrent requests for the same prompt input."""
+    async def get_messages():
+        prompts.append(key)
+        await asyncio.sleep(PROMPT_TIME)
+        return MESSAGES, None
+
+    started = time.perf_counter()
+    return await asyncio.gather(*[request_stream(key, get_messages, started) for _ in range(n_requests)])
+
+
+if __name__ == '__main__':
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    server = FakeCompletionServer(chunk_delay=0.01).start()
+    os.environ['OPENAI_BASE_URL'] = server.base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'fake')
+
+    # Previous implementation: one blocking completion per request (in the threads of a WSGI server)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_requests) as executor:
+        texts = list(executor.map(lambda _: get_completion_blocking(), range(n_requests)))
+    blocking_time = time.perf_counter() - started
+    assert texts == [TEXT] * n_requests
+    blocking_calls = len(server.requests)
+    server.requests.clear()
+
+    # Streamed and coalesced
+    prompt_input = {'location_id': 1, 'previous_locations': ['2', 'DE'], 'start_date': '2024-06-01', 'end_date': '2024-06-14'}
+    key = get_prompt_key(prompt_input)
+    assert key == get_prompt_key(dict(reversed(prompt_input.items())))
+    prompts = []
+    streamed = asyncio.run(run_streams(n_requests, key, prompts))
+    assert all(result['text'] == TEXT and result['events'][-1] == {'done': True} for result in streamed)
+    assert len(prompts) == 1 and len(server.requests) == 1 and server.requests[0]['stream']
+
+    # Cached
+    cached = asyncio.run(run_streams(n_requests, key, prompts))
+    assert all(result['text'] == TEXT for result in cached)
+    assert len(prompts) == 1 and len(server.requests) == 1
+
+    # Failed completions are reported and not cached
+    server.fail = True
+    failed = asyncio.run(run_streams(2, get_prompt_key({**prompt_input, 'location_id': 2}), prompts))
+    assert all('error' in result['events'][-1] for result in failed)
+    server.fail = False
+    retried = asyncio.run(run_streams(2, get_prompt_key({**prompt_input, 'location_id': 2}), prompts))
+    assert all(result['text'] == TEXT for result in retried)
+
+    print(f'{n_requests} concurrent requests for the same prompt input (fake model: {len(TEXT)//4} chunks of 10 ms)')
+    print(f'{"":>10} {"upstream calls":>15} {"first text":>12} {"all done":>10}')
+    print(f'{"blocking":>10} {blocking_calls:>15} {blocking_time*1000:9.0f} ms {blocking_time*1000:7.0f} ms')
+    for name, results, calls in [('streamed', streamed, 1), ('cached', cached, 0)]:
+        print(
+            f'{name:>10} {calls:>15} {max(result["first_text"] for result in results)*1000:9.0f} ms'
+            f' {max(result["total"] for result in results)*1000:7.0f} ms'
+        )
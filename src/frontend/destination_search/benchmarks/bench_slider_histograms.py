@@ -0,0 +1,122 @@
+"""
+Check and benchmark of the precomputed slider histograms of the list view.
+
+The monthly histograms are computed as after FillScores (see
+src/backend/database/internal/slider_histograms.py) on a synthetic score
+table with reference start location specific travel cost and reachability.
+
+Checks that the merged histogram of a travel interval of one month equals the
+histogram of the raw values averaged over that month (with the precomputed
+bin edges) and that the range of the merged histogram of longer travel
+intervals covers the averaged raw values. Compares the time per list
+recompute of the previous histograms (create_hist_for_slider on the raw
+values of the travel interval) with merging the monthly histograms.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_slider_histograms.py [n_locations]
+"""
+import os
+import sys
+import timeit
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+backend_dir = os.path.realpath(os.path.join(parent_dir, "../../backend"))
+sys.path.append(backend_dir)
+
+from benchmarks.synthetic_data import generate_scores
+from database.internal.slider_histograms import HISTOGRAM_DIMENSIONS, get_slider_histograms
+from destinations.score_cube import ScoreCube
+from destinations.slider_histograms import SliderHistograms, create_hist_for_slider
+import json
+import numpy as np
+import pandas as pd
+
+REF_START_LOCATION_IDS = [1, 2]
+HISTOGRAM_COLUMNS = {'travel_cost': 'dim_41', 'accommodation_cost': 'dim_42', 'best_reachability': 'best_reachability'}
+
+
+def generate_histogram_scores(n_locations: int) -> pd.DataFrame:
+    """Synthetic scores of the histogram dimensions (travel cost and reachability per reference start location)."""
+    dimension_ids = [d for dimensions in HISTOGRAM_DIMENSIONS.values() for d in dimensions]
+    scores = generate_scores(n_locations=n_locations, n_dimensions=len(dimension_ids), n_months=12, dimensions_per_category=1)
+    scores['dimension_id'] = scores['dimension_id'].map(dict(zip(sorted(scores['dimension_id'].unique()), dimension_ids)))
+    scores['category_id'] = scores['dimension_id'] // 10
+    scores['raw_value'] = scores['raw_value'].abs() * 10
+
+    ref_specific = scores['dimension_id'] != 42
+    return pd.concat(
+        [scores[~ref_specific]]
+        + [
+            scores[ref_specific].assign(
+                ref_start_location_id=ref_start_location_id,
+                raw_value=scores.loc[ref_specific, 'raw_value'] * ref_start_location_id
+            )
+            for ref_start_location_id in REF_START_LOCATION_IDS
+        ],
+        ignore_index=True
+    )
+
+
+def raw_values_of_interval(cube: ScoreCube, ref_start_location_id: int, start_date, end_date) -> pd.DataFrame:
+    """Raw values of the travel interval, as in get_locations_list."""
+    scores = cube.aggregate(start_date=start_date, end_date=end_date, ref_start_location_id=ref_start_location_id)
+    raw_values = scores.pivot(columns='dimension_id', index='location_id', values='raw_value').round(0)
+    raw_values.rename(columns=lambda x: 'dim_' + str(x), inplace=True)
+    raw_values['best_reachability'] = raw_values[['dim_61', 'dim_62', 'dim_63']].min(axis=1)
+    return raw_values
+
+
+def histograms_previous(raw_values: pd.DataFrame) -> dict:
+    """Previous implementation (histograms of the raw values of every recompute, for reference)."""
+    return {histogram: create_hist_for_slider(raw_values[column]) for histogram, column in HISTOGRAM_COLUMNS.items()}
+
+
+def histograms_merged(slider_histograms: SliderHistograms, ref_start_location_id: int, start_date, end_date) -> dict:
+    return {
+        histogram: slider_histograms.merge(histogram, ref_start_location_id, start_date, end_date)
+        for histogram in HISTOGRAM_COLUMNS
+    }
+
+
+if __name__ == '__main__':
+    n_locations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    scores = generate_histogram_scores(n_locations)
+    cube = ScoreCube.from_frame(scores)
+
+    # Precompute (as after FillScores)
+    decimals = {dimension_id: 0 for dimensions in HISTOGRAM_DIMENSIONS.values() for dimension_id in dimensions}
+    precompute_time = timeit.timeit(lambda: get_slider_histograms(scores, decimals, REF_START_LOCATION_IDS), number=1)
+    rows = get_slider_histograms(scores, decimals, REF_START_LOCATION_IDS)
+    rows['bin_edges'] = rows['bin_edges'].map(json.loads)
+    rows['heights'] = rows['heights'].map(json.loads)
+    slider_histograms = SliderHistograms(rows)
+
+    for ref_start_location_id in REF_START_LOCATION_IDS:
+        for histogram, column in HISTOGRAM_COLUMNS.items():
+            months = slider_histograms.histograms[histogram, ref_start_location_id if histogram != 'accommodation_cost' else -1]
+
+            # One month: equal to the histogram of the averaged raw values
+            start_date, end_date = pd.Timestamp('2024-03-01'), pd.Timestamp('2024-03-31')
+            raw_values = raw_values_of_interval(cube, ref_start_location_id, start_date, end_date)
+            expected = np.histogram(raw_values[column].dropna(), bins=months['bin_edges'])[0]
+            merged = slider_histograms.merge(histogram, ref_start_location_id, start_date, end_date)
+            first = np.searchsorted(months['bin_edges'], merged['binLimits'][0])
+            assert np.array_equal(expected[first:first + len(merged['heights'])], merged['heights'])
+            assert expected.sum() == sum(merged['heights'])
+
+            # Longer intervals: the bins cover the averaged raw values
+            for start_date, end_date in [('2024-02-10', '2024-05-20'), ('2023-11-01', '2025-03-01')]:
+                raw_values = raw_values_of_interval(cube, ref_start_location_id, start_date, end_date)
+                merged = slider_histograms.merge(histogram, ref_start_location_id, start_date, end_date)
+                assert merged['binLimits'][0] <= raw_values[column].min() and raw_values[column].max() <= merged['binLimits'][-1]
+
+    start_date, end_date = pd.Timestamp('2024-02-10'), pd.Timestamp('2024-05-20')
+    number = 50
+    raw_values = raw_values_of_interval(cube, 1, start_date, end_date)
+    previous = timeit.timeit(lambda: histograms_previous(raw_values), number=number) / number
+    merged = timeit.timeit(lambda: histograms_merged(slider_histograms, 1, start_date, end_date), number=number) / number
+
+    print(f'{n_locations} locations, {len(REF_START_LOCATION_IDS)} reference start locations, {len(rows)} monthly histograms '
+          f'(precomputed in {precompute_time:.2f} s)')
+    print(f'histograms of the raw values: {previous*1000:6.2f} ms')
+    print(f'merged monthly histograms:    {merged*1000:6.2f} ms')
@@ -0,0 +1,84 @@
+"""
+Check and benchmark of the vector index of the similar destinations endpoint
+(destinations.vector_index.VectorIndex).
+
+Checks that the exact blocked search finds the same neighbours as brute
+force (sklearn.metrics.pairwise_distances and a full sort per query), and
+measures the recall@k of the IVF index against the exact search and the
+latency per query for several numbers of probed lists. Vectors are either
+uniform random scores (no structure, worst case of the IVF index) or
+clustered scores (locations with similar climate, costs, ...), with the
+number of dimensions of the score vectors of all categories.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_vector_index.py [n_locations ...]
+"""
+import os
+import sys
+import time
+import timeit
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from destinations.vector_index import VectorIndex
+import numpy as np
+import pandas as pd
+from sklearn.metrics import pairwise_distances
+
+N_DIMENSIONS = 60
+K = 10
+N_QUERIES = 200
+PROBES = [1, 2, 4, 8, 16, 32]
+
+
+def generate_vectors(n_locations: int, clustered: bool, seed: int = 0) -> pd.DataFrame:
+    """Synthetic score vectors (location_id as index)."""
+    rng = np.random.default_rng(seed)
+    if clustered:
+        centers = rng.random((max(n_locations // 200, 1), N_DIMENSIONS))
+        vectors = centers[rng.integers(0, len(centers), n_locations)] + rng.normal(scale=0.1, size=(n_locations, N_DIMENSIONS))
+        vectors = np.clip(vectors, 0, 1)
+    else:
+        vectors = rng.random((n_locations, N_DIMENSIONS))
+    return pd.DataFrame(vectors, index=pd.Index(np.arange(1, n_locations + 1), name='location_id'))
+
+
+def brute_force(vectors: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    """Rows of the k closest vectors (pairwise_distances and a full sort)."""
+    distances = pairwise_distances(query[np.newaxis, :], vectors)[0]
+    return np.argsort(distances, kind='stable')[:k]
+
+
+if __name__ == '__main__':
+    sizes = [int(size) for size in sys.argv[1:]] or [8000, 50000]
+    for n_locations in sizes:
+        for clustered in [False, True]:
+            vectors = generate_vectors(n_locations, clustered)
+            started = time.perf_counter()
+            index = VectorIndex(vectors, n_lists=int(np.sqrt(n_locations)))
+            build_time = time.perf_counter() - started
+            queries = index.vectors[np.random.default_rng(1).choice(n_locations, N_QUERIES, replace=False)]
+            print(f'{n_locations} locations, {"clustered" if clustered else "uniform"} vectors '
+                  f'({index.n_lists} lists, index built in {build_time:.2f} s):')
+
+            # Check
+            exact = [index.exact_search(query, K)[0] for query in queries]
+            for query, rows in zip(queries[:20], exact):
+                expected = brute_force(index.vectors, query, K)
+                np.testing.assert_allclose(
+                    pairwise_distances(query[np.newaxis, :], index.vectors[rows])[0],
+                    pairwise_distances(query[np.newaxis, :], index.vectors[expected])[0],
+                    rtol=1e-9, atol=1e-9
+                )
+
+            def latency(search) -> float:
+                """Mean time per query (ms)."""
+                return timeit.timeit(lambda: [search(query) for query in queries], number=1) / len(queries) * 1000
+
+            print(f'{"brute force":>13}: {latency(lambda query: brute_force(index.vectors, query, K)):6.3f} ms per query')
+            print(f'{"exact":>13}: {latency(lambda query: index.exact_search(query, K)):6.3f} ms per query')
+            for n_probes in PROBES:
+                approximate = [index.approximate_search(query, K, n_probes)[0] for query in queries]
+                recall = np.mean([len(np.intersect1d(a, e)) / K for a, e in zip(approximate, exact)])
+                print(f'{f"IVF {n_probes} probes":>13}: {latency(lambda query: index.approximate_search(query, K, n_probes)):6.3f} ms '
+                      f'per query, recall@{K} {recall:.3f}')
@@ -0,0 +1,73 @@
+"""
+Micro-benchmark of the overlap-day weighting in get_scores.
+
+Compares the previous row-wise implementation (apply + groupby with lambdas)
+with destinations.compute_weighted_scores on a synthetic score table.
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/bench_weighted_scores.py
+"""
+import os
+import sys
+import timeit
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+
+from benchmarks.synthetic_data import generate_scores
+from destinations.compute_weighted_scores import compute_weighted_scores
+import pandas as pd
+
+
+def compute_weighted_scores_rowwise(scores: pd.DataFrame, start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
+    """Previous implementation of the weighting in get_scores (for reference)."""
+    scores = scores.copy()
+    scores['overlap_days'] = scores.apply(
+        lambda row: min(row['end_date'], end_date) -
+                    max(row['start_date'], start_date) +
+                    pd.Timedelta(days=1),
+        axis=1
+    ).dt.days
+    value_cols = ['score', 'raw_value']
+    for col in value_cols:
+        scores[col] *= scores['overlap_days']
+    scores = (
+        scores
+        .groupby(['location_id', 'category_id', 'dimension_id'])
+        .agg({
+            'score': lambda x: x.sum(skipna=False),
+            'raw_value': lambda x: x.sum(skipna=False),
+            'overlap_days': lambda x: x.sum(skipna=False)
+        })
+    )
+    for col in value_cols:
+        scores[col] /= scores['overlap_days']
+    scores.drop(columns=['overlap_days'], inplace=True)
+    scores.reset_index(inplace=True)
+    return scores
+
+
+if __name__ == '__main__':
+    # 1k locations x 60 dimensions x 24 months
+    scores = generate_scores(n_locations=1000, n_dimensions=60, n_months=24)
+    start_date, end_date = pd.Timestamp('2024-03-10'), pd.Timestamp('2024-05-20')
+
+    # Only scores overlapping with the travel interval (as filtered in SQL)
+    scores = scores[(scores['start_date'] <= end_date) & (scores['end_date'] >= start_date)]
+    print(f'Score rows: {len(scores):,}')
+
+    # Check that both implementations return the same result
+    pd.testing.assert_frame_equal(
+        compute_weighted_scores_rowwise(scores, start_date, end_date),
+        compute_weighted_scores(scores, start_date, end_date)
+    )
+
+    timings = {}
+    for name, function, number in [
+        ('row-wise', compute_weighted_scores_rowwise, 1),
+        ('vectorized', compute_weighted_scores, 10)
+    ]:
+        timings[name] = min(timeit.repeat(
+            lambda: function(scores, start_date, end_date), number=number, repeat=3
+        )) / number
+        print(f'{name:>10}: {timings[name]*1000:10.1f} ms')
+    print(f'   speedup: {timings["row-wise"]/timings["vectorized"]:10.1f}x')
@@ -0,0 +1,66 @@
+"""
+Fixtures of the benchmark suite (see test_hot_paths.py).
+
+Every benchmark runs on a synthetic data set per scale. A scale multiplies
+the number of locations of the base size (BASE_SIZE), the number of
+dimensions, months and reference start locations stay the same (as in the
+data model).
+"""
+import os
+import sys
+parent_dir = os.path.dirname(os.path.realpath(__file__+"/../"))
+sys.path.append(parent_dir)
+backend_dir = os.path.realpath(os.path.join(parent_dir, "../../backend"))
+sys.path.append(backend_dir)
+
+from benchmarks.synthetic_data import generate_climatology, generate_database, generate_locations_list, generate_scores
+import django
+import pytest
+
+BASE_SIZE = {
+    'n_locations': 200,
+    'n_dimensions': 24,
+    'n_months': 12,
+    'n_ref_start_locations': 3
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--scales', default='1,10,100',
+        help='Comma-separated scales (multiples of the base number of locations) to benchmark.'
+    )
+
+
+def pytest_configure(config):
+    # Settings of the web app for the tests of views and settings-dependent
+    # modules (no database is queried, the connection settings are placeholders)
+    for name in ['SECRET_KEY', 'DB_NAME', 'DB_USER', 'DB_PASSWORD', 'DB_HOST', 'DB_PORT']:
+        os.environ.setdefault(name, 'benchmarks')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'destination_search.settings')
+    django.setup()
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = [int(scale) for scale in metafunc.config.getoption('scales').split(',')]
+        metafunc.parametrize('scale', scales, ids=[f'{scale}x' for scale in scales], scope='session')
+
+
+@pytest.fixture(scope='session')
+def dataset(scale: int) -> dict:
+    """Synthetic data set of a scale (generated once, dropped before the next scale)."""
+    n_locations = BASE_SIZE['n_locations'] * scale
+    return {
+        'scale': scale,
+        'n_locations': n_locations,
+        'scores': generate_scores(
+            n_locations=n_locations,
+            n_dimensions=BASE_SIZE['n_dimensions'],
+            n_months=BASE_SIZE['n_months'],
+            n_ref_start_locations=BASE_SIZE['n_ref_start_locations']
+        ),
+        'locations_list': generate_locations_list(n_locations),
+        'climatology': generate_climatology(n_locations),
+        'database': generate_database(n_locations)
+    }
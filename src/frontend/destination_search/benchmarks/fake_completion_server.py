@@ -0,0 +1,123 @@
+"""
+Local fake of the OpenAI chat completion API (POST /v1/chat/completions,
+streamed or not), for testing openai_proxy without calling OpenAI.
+
+The completion is a fixed text, sent in chunks of a few characters with a
+delay per chunk. Point the app to the server with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 (and any OPENAI_API_KEY).
+
+Usage (from src/frontend/destination_search):
+    python benchmarks/fake_completion_server.py [port]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+TEXT = (
+    'Like your previous destinations, this destination offers warm and sunny weather.\n\n'
+    'It is cheaper than your previous destinations, but it takes longer to get there.'
+)
+
+
+class FakeCompletionServer(ThreadingHTTPServer):
+    """
+    Fake completion server, counting the requests.
+
+    Args:
+    -----
+    port: int
+        Port (0: any free port).
+
+    chunk_size: int
+        Number of characters per chunk.
+
+    chunk_delay: float
+        Seconds between two chunks (time per token of the fake model).
+
+    fail: bool
+        Respond with an error (HTTP 500).
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, chunk_size: int = 4, chunk_delay: float = 0.01, fail: bool = False):
+        super().__init__(('127.0.0.1', port), FakeCompletionHandler)
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.fail = fail
+        self.requests = []
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/v1'
+
+    def start(self):
+        """Serve in a background thread."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class FakeCompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body)
+
+        if self.server.fail:
+            content = json.dumps({'error': {'message': 'Fake error', 'type': 'server_error'}}).encode()
+            self.send_response(500)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+
+        chunks = [TEXT[i:i + self.server.chunk_size] for i in range(0, len(TEXT), self.server.chunk_size)]
+        completion = {'id': 'chatcmpl-fake', 'created': int(time.time()), 'model': body['model']}
+
+        if not body.get('stream'):
+            time.sleep(self.server.chunk_delay * len(chunks))
+            content = json.dumps({
+                **completion,
+                'object': 'chat.completion',
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': TEXT}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': len(chunks), 'total_tokens': len(chunks)}
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(data: str):
+            event = f'data: {data}\n\n'.encode()
+            self.wfile.write(f'{len(event):x}\r\n'.encode() + event + b'\r\n')
+            self.wfile.flush()
+
+        for chunk in chunks:
+            time.sleep(self.server.chunk_delay)
+            send(json.dumps({
+                **completion,
+                'object': 'chat.completion.chunk',
+                'choices': [{'index': 0, 'delta': {'content': chunk}, 'finish_reason': None}]
+            }))
+        send('[DONE]')
+        self.wfile.write(b'0\r\n\r\n')
+
+
+if __name__ == '__main__':
+    server = FakeCompletionServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8001)
+    print(f'Fake completion server at {server.base_url}')
+    server.serve_forever()
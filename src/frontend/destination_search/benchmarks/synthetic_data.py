@@ -0,0 +1,292 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+
+
+def generate_scores(
+        n_locations: int = 1000,
+        n_dimensions: int = 60,
+        n_months: int = 24,
+        start: str = '2024-01-01',
+        dimensions_per_category: int = 8,
+        missing_raw_values: float = 0.02,
+        n_ref_start_locations: int = 0,
+        ref_dimensions: int = 2,
+        seed: int = 0
+    ) -> pd.DataFrame:
+    """
+    Generate a synthetic core_scores table with one score per location,
+    dimension and month (reference start location -1, or one score per
+    reference start location for the last ref_dimensions dimensions, as
+    travel costs and reachability).
+
+    Args:
+    -----
+    n_locations, n_dimensions, n_months: int
+        Size of the table (n_locations x n_dimensions x n_months rows).
+
+    start: str
+        First month.
+
+    dimensions_per_category: int
+        Number of dimensions per category.
+
+    missing_raw_values: float
+        Share of missing raw values.
+
+    n_ref_start_locations: int
+        Number of reference start locations (ids 1000001, 1000002, ...), all
+        scores with -1 if 0.
+
+    ref_dimensions: int
+        Number of dimensions with scores per reference start location.
+
+    seed: int
+        Seed of the random number generator.
+
+    Returns:
+    --------
+    scores: pandas.DataFrame
+        DataFrame with the columns of core_scores (without updated_at).
+    """
+    rng = np.random.default_rng(seed)
+
+    location_ids = np.arange(1, n_locations + 1)
+    category_ids = np.arange(n_dimensions) // dimensions_per_category + 1
+    dimension_ids = category_ids * 100 + np.arange(n_dimensions) % dimensions_per_category + 1
+    start_dates = pd.date_range(start, periods=n_months, freq='MS')
+    end_dates = start_dates + pd.offsets.MonthEnd(0)
+
+    # Full grid of location x dimension x month
+    location_pos, dimension_pos, month_pos = np.meshgrid(
+        np.arange(n_locations), np.arange(n_dimensions), np.arange(n_months), indexing='ij'
+    )
+    location_pos, dimension_pos, month_pos = location_pos.ravel(), dimension_pos.ravel(), month_pos.ravel()
+    n_rows = len(location_pos)
+
+    raw_value = rng.normal(loc=20, scale=10, size=n_rows)
+    raw_value[rng.random(n_rows) < missing_raw_values] = np.nan
+
+    scores = pd.DataFrame({
+        'location_id': location_ids[location_pos],
+        'category_id': category_ids[dimension_pos],
+        'dimension_id': dimension_ids[dimension_pos],
+        'start_date': start_dates[month_pos],
+        'end_date': end_dates[month_pos],
+        'ref_start_location_id': -1,
+        'score': rng.random(n_rows).round(5),
+        'raw_value': raw_value
+    })
+    if n_ref_start_locations == 0:
+        return scores
+
+    # Replace the scores of the last dimensions by one score per reference start location
+    is_ref_dimension = dimension_pos >= n_dimensions - ref_dimensions
+    ref_scores = pd.concat(
+        [scores[is_ref_dimension].assign(ref_start_location_id=10**6 + i) for i in range(1, n_ref_start_locations + 1)],
+        ignore_index=True
+    )
+    ref_scores['score'] = rng.random(len(ref_scores)).round(5)
+    ref_scores['raw_value'] = rng.normal(loc=20, scale=10, size=len(ref_scores))
+    return pd.concat([scores[~is_ref_dimension], ref_scores], ignore_index=True)
+
+
+def generate_locations_list(n_locations: int = 800, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a synthetic location list as returned by
+    LocationsListView.get_locations_list.
+
+    Args:
+    -----
+    n_locations: int
+        Number of locations (rows).
+
+    seed: int
+        Seed of the random number generator.
+
+    Returns:
+    --------
+    locations: pandas.DataFrame
+        DataFrame with location master data, distance to start, the raw values
+        used by the filters, best reachability and relevance.
+    """
+    rng = np.random.default_rng(seed)
+
+    locations = pd.DataFrame({
+        'location_id': rng.choice(10**9, size=n_locations, replace=False),
+        'city': [f'City {i}' for i in range(n_locations)],
+        'country': [f'Country {i % 150}' for i in range(n_locations)],
+        'country_code': [f'C{i % 150:03d}' for i in range(n_locations)],
+        'lat': rng.uniform(-60, 70, n_locations).round(7).astype(str),
+        'lon': rng.uniform(-180, 180, n_locations).round(7).astype(str),
+        'population': rng.integers(10**4, 10**7, n_locations),
+        'distance_to_start': rng.uniform(10, 15000, n_locations).round(0)
+    })
+    for dimension_id in [21, 22, 41, 42, 61, 62, 63]:
+        raw_value = rng.normal(loc=20, scale=10, size=n_locations).round(1)
+        raw_value[rng.random(n_locations) < 0.1] = np.nan
+        locations[f'dim_{dimension_id}'] = raw_value
+    locations['best_reachability'] = locations[['dim_61', 'dim_62', 'dim_63']].min(axis=1)
+    locations['relevance'] = rng.random(n_locations)
+
+    return locations
+
+
+# Weather dimensions (columns of raw_weather_climatology and dimension names
+# in core_dimensions, see WeatherScores.prep_data)
+WEATHER_DIMENSIONS = {
+    'temperature_max': 'Maximum temperature',
+    'temperature_min': 'Minimum temperature',
+    'sunshine_duration': 'Sunshine duration',
+    'daylight_duration': 'Daylight duration',
+    'precipitation_duration': 'Precipitation duration',
+    'precipitation_sum': 'Precipitation amount',
+    'rain_sum': 'Rain amount',
+    'snowfall_sum': 'Snowfall amount',
+    'wind_speed_max': 'Maximum wind speed'
+}
+
+
+def generate_climatology(n_locations: int = 1000, missing_values: float = 0.02, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a synthetic weather climatology (as returned by
+    weather_climatology.read_climatology).
+
+    Args:
+    -----
+    n_locations: int
+        Number of locations (12 months each).
+
+    missing_values: float
+        Share of missing values.
+
+    seed: int
+        Seed of the random number generator.
+
+    Returns:
+    --------
+    climatology: pandas.DataFrame
+        DataFrame with location_id, month, year_min, year_max and the average
+        of each weather column.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = n_locations * 12
+
+    climatology = pd.DataFrame({
+        'location_id': np.repeat(np.arange(1, n_locations + 1), 12),
+        'month': np.tile(np.arange(1, 13), n_locations),
+        'year_min': 2015,
+        'year_max': 2023
+    })
+    for column in WEATHER_DIMENSIONS:
+        values = rng.gamma(shape=2., scale=10., size=n_rows)
+        values[rng.random(n_rows) < missing_values] = np.nan
+        climatology[column] = values
+
+    return climatology
+
+
+def generate_numbeo_costs(
+        n_locations: int = 1000,
+        n_features: int = 50,
+        n_dimensions: int = 6,
+        seed: int = 0
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Generate a synthetic raw_costs_numbeo table and the cost of living
+    dimensions (with the features of each dimension in extras, see
+    CostScores.numbeo_scores).
+
+    Args:
+    -----
+    n_locations: int
+        Number of locations (rows).
+
+    n_features: int
+        Number of cost features (columns).
+
+    n_dimensions: int
+        Number of cost of living dimensions (the features are split evenly).
+
+    seed: int
+        Seed of the random number generator.
+
+    Returns:
+    --------
+    costs: pandas.DataFrame
+        DataFrame with the columns of raw_costs_numbeo (generic feature names).
+
+    dimensions: pandas.DataFrame
+        DataFrame with the columns of core_dimensions (category 4).
+    """
+    rng = np.random.default_rng(seed)
+    features = [f'cost_{i}' for i in range(n_features)]
+
+    costs = pd.DataFrame({
+        'location_id': np.arange(1, n_locations + 1),
+        'city': [f'City {i}' for i in range(n_locations)],
+        'country': [f'Country {i % 150}' for i in range(n_locations)]
+    })
+    costs[features] = rng.lognormal(mean=2., sigma=1., size=(n_locations, n_features)).round(5)
+    costs['updated_at'] = pd.Timestamp('2024-01-01')
+
+    dimensions = pd.DataFrame({
+        'dimension_id': 43 + np.arange(n_dimensions),
+        'category_id': 4,
+        'dimension_name': [f'Cost {i}' for i in range(n_dimensions)],
+        'extras': [str(list(columns)) for columns in np.array_split(features, n_dimensions)]
+    })
+
+    return costs, dimensions
+
+
+class SyntheticDatabase:
+    """
+    In-memory SQLite database with the same fetch_data interface as
+    database.db_helpers.Database, to run the backend score computations on
+    synthetic tables.
+    """
+
+    def __init__(self, tables: dict[str, pd.DataFrame]):
+        """
+        Args:
+        -----
+        tables: dict
+            Table name -> DataFrame.
+        """
+        self.connection = sqlite3.connect(':memory:')
+        for name, table in tables.items():
+            table.to_sql(name, self.connection, index=False)
+
+    def fetch_data(self, total_object: str = None, sql: str = None) -> pd.DataFrame:
+        """Fetch a whole table or the result of a query (see Database.fetch_data)."""
+        if total_object is not None:
+            sql = f'SELECT * FROM {total_object}'
+        return pd.read_sql(sql, self.connection)
+
+
+def generate_database(n_locations: int = 1000, seed: int = 0) -> SyntheticDatabase:
+    """
+    Generate the tables read by the backend score computations
+    (raw_costs_numbeo, core_dimensions, core_categories).
+
+    Args:
+    -----
+    n_locations: int
+        Number of locations.
+
+    seed: int
+        Seed of the random number generator.
+    """
+    costs, cost_dimensions = generate_numbeo_costs(n_locations=n_locations, seed=seed)
+    weather_dimensions = pd.DataFrame({
+        'dimension_id': 21 + np.arange(len(WEATHER_DIMENSIONS)),
+        'category_id': 2,
+        'dimension_name': list(WEATHER_DIMENSIONS.values()),
+        'extras': None
+    })
+    return SyntheticDatabase({
+        'raw_costs_numbeo': costs,
+        'core_dimensions': pd.concat([weather_dimensions, cost_dimensions], ignore_index=True),
+        'core_categories': pd.DataFrame({'category_id': [1, 2, 3, 4, 5, 6, 7]})
+    })
@@ -0,0 +1,19 @@
+"""
+Regression test of get_compare_data: the matrix implementation must return
+the same compare table as the previous implementation of
+CompareView.get_context_data (see bench_compare.py).
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_compare.py --benchmark-disable
+"""
+import json
+from benchmarks.bench_compare import generate_inputs, get_compare_data_loop
+from destinations.compare_data import get_compare_data
+import pytest
+
+
+@pytest.mark.parametrize('n_locations', [1, 2, 3, 5, 10])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_get_compare_data(n_locations, seed):
+    inputs = generate_inputs(n_locations=n_locations, seed=seed)
+    assert json.dumps(get_compare_data_loop(**inputs)) == json.dumps(get_compare_data(**inputs))
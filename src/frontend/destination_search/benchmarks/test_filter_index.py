@@ -0,0 +1,27 @@
+"""
+Regression test of the list filters: filtering with
+destinations.filter_index.FilterIndex must return the same rows as the
+previous implementation of filter_locations (see bench_filter_index.py).
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_filter_index.py --benchmark-disable
+"""
+from benchmarks.bench_filter_index import HIST_VALUE_FILTERS, MODES_OF_TRANSPORT, filter_index, filter_previous, random_filters
+from benchmarks.synthetic_data import generate_locations_list
+from destinations.filter_index import FilterIndex
+import numpy as np
+import pytest
+
+COLUMNS = list(HIST_VALUE_FILTERS.values()) + ['dim_21', 'dim_22'] + MODES_OF_TRANSPORT
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_filter_index(seed):
+    rng = np.random.default_rng(seed)
+    locations_list = generate_locations_list(300, seed=seed)
+    index = FilterIndex(locations_list, COLUMNS)
+    for _ in range(100):
+        filters_form_data = random_filters(locations_list, rng)
+        expected = filter_previous(locations_list, filters_form_data)
+        result = filter_index(index, locations_list, filters_form_data)
+        assert expected.equals(result), filters_form_data
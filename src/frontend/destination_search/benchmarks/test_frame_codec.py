@@ -0,0 +1,40 @@
+"""
+Regression test of the encoding of the cached location lists: decode_frame
+must return the DataFrame given to encode_frame, with missing values of string
+columns as None (see bench_frame_codec.py).
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_frame_codec.py --benchmark-disable
+"""
+from benchmarks.synthetic_data import generate_locations_list
+from destinations.frame_codec import decode_frame, encode_frame
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize('n_locations', [0, 1, 300])
+def test_round_trip(n_locations):
+    locations = generate_locations_list(n_locations=n_locations)
+    pd.testing.assert_frame_equal(decode_frame(encode_frame(locations)), locations)
+
+
+def test_missing_strings():
+    frame = pd.DataFrame({
+        'city': ['Berlin', None, np.nan, '', pd.NA],
+        'country_code': pd.array(['DE', None, 'FR', 'IT', 'ES'], dtype='string'),
+        'county': [None] * 5,
+        'population': [3.6e6, np.nan, 2.1e6, 1.0, 2.0]
+    })
+    result = decode_frame(encode_frame(frame))
+
+    # Missing values stay missing (not 'None' or 'nan') and differ from empty strings
+    assert result['city'].tolist() == ['Berlin', None, None, '', None]
+    assert result['country_code'].tolist() == ['DE', None, 'FR', 'IT', 'ES']
+    assert result['county'].tolist() == [None] * 5
+    pd.testing.assert_series_equal(result['population'], frame['population'])
+
+
+def test_non_string_objects():
+    with pytest.raises(TypeError, match='raw_value'):
+        encode_frame(pd.DataFrame({'city': ['Berlin', 'Paris'], 'raw_value': [1, '2']}))
@@ -0,0 +1,178 @@
+"""
+Benchmark suite (pytest-benchmark) of the scoring and ranking hot paths at
+1x, 10x and 100x the base size of the synthetic data (see conftest.py).
+
+Results are saved as JSON (.benchmarks/, one file per run, named by the
+commit), so regressions can be compared between commits.
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks                     # run and save
+    python -m pytest benchmarks --scales=1,10       # smaller scales only
+    python -m pytest benchmarks --benchmark-compare # compare with the last saved run
+    pytest-benchmark compare --group-by=func        # compare saved runs
+"""
+import itertools
+from benchmarks.bench_filter_index import HIST_VALUE_FILTERS, MODES_OF_TRANSPORT, random_filters
+from database.internal.cost_scores import CostScores
+from database.internal.score_distances import compute_distances
+from database.internal.weather_scores import WeatherScores
+from destinations.compute_haversine import haversine
+from destinations.compute_relevance import compute_category_distances, compute_relevance, weight_category_distances
+from destinations.compute_weighted_scores import compute_weighted_scores
+from destinations.filter_index import FilterIndex
+from destinations.score_cube import ScoreCube
+from destinations.vector_index import VectorIndex, pivot_score_vectors
+import numpy as np
+import pandas as pd
+import pytest
+
+START_DATE, END_DATE = pd.Timestamp('2024-03-10'), pd.Timestamp('2024-05-20')
+REF_START_LOCATION_ID = 10**6 + 1
+FILTER_COLUMNS = list(HIST_VALUE_FILTERS.values()) + ['dim_21', 'dim_22'] + MODES_OF_TRANSPORT
+SORT_COLUMNS = ['relevance', 'distance_to_start', 'city']
+# Scales above this are skipped (row-wise, about 10 ms per location and round)
+NUMBEO_MAX_SCALE = 10
+
+
+@pytest.fixture(scope='session')
+def score_cube(dataset: dict) -> ScoreCube:
+    return ScoreCube.from_frame(dataset['scores'])
+
+
+@pytest.fixture(scope='session')
+def aggregated_scores(score_cube: ScoreCube) -> pd.DataFrame:
+    return score_cube.aggregate(start_date=START_DATE, end_date=END_DATE, ref_start_location_id=REF_START_LOCATION_ID)
+
+
+def test_get_scores_cube(benchmark, dataset, score_cube):
+    """Aggregation of get_scores with the score cube (SCORE_CUBE_ENABLED)."""
+    benchmark.extra_info['cells'] = score_cube.score.size
+    result = benchmark(
+        score_cube.aggregate,
+        start_date=START_DATE,
+        end_date=END_DATE,
+        ref_start_location_id=REF_START_LOCATION_ID
+    )
+    assert result['location_id'].nunique() == dataset['n_locations']
+
+
+def test_get_scores_query(benchmark, dataset):
+    """Aggregation of get_scores on the rows of the query (without the score cube)."""
+    scores = dataset['scores']
+    scores = scores[
+        (scores['start_date'] <= END_DATE)
+        & (scores['end_date'] >= START_DATE)
+        & scores['ref_start_location_id'].isin([-1, REF_START_LOCATION_ID])
+    ]
+    benchmark.extra_info['rows'] = len(scores)
+    result = benchmark(compute_weighted_scores, scores, START_DATE, END_DATE)
+    assert result['location_id'].nunique() == dataset['n_locations']
+
+
+def test_compute_relevance(benchmark, dataset, aggregated_scores):
+    """Relevance of all locations (3 previous locations and 1 previous country)."""
+    location_ids = aggregated_scores['location_id'].unique()
+    categories = aggregated_scores['category_id'].unique()
+    preferences = {}
+    for category in categories:
+        preferences[f'importance_{category}'] = int(category) % 4
+        preferences[f'direction_{category}'] = int(category) % 2
+    benchmark.extra_info['rows'] = len(aggregated_scores)
+    relevance = benchmark(
+        compute_relevance,
+        previous_locations=location_ids[:3].tolist(),
+        previous_countries={'Country 1': location_ids[3:8].tolist()},
+        scores=aggregated_scores,
+        preferences=preferences
+    )
+    assert len(relevance) == dataset['n_locations'] - 3
+
+
+def test_weight_category_distances(benchmark, dataset, aggregated_scores):
+    """Relevance of all locations after a preference change (category distances cached)."""
+    location_ids = aggregated_scores['location_id'].unique()
+    distances = compute_category_distances(
+        previous_locations=location_ids[:3].tolist(),
+        previous_countries={'Country 1': location_ids[3:8].tolist()},
+        scores=aggregated_scores
+    )
+    preferences = {}
+    for category in distances.columns:
+        preferences[f'importance_{category}'] = int(category) % 4
+        preferences[f'direction_{category}'] = int(category) % 2
+    relevance = benchmark(weight_category_distances, distances=distances, preferences=preferences)
+    assert len(relevance) == dataset['n_locations'] - 3
+
+
+def test_vector_index_search(benchmark, dataset, aggregated_scores):
+    """Exact search of the similar destinations of a location (vector index cached)."""
+    index = VectorIndex(pivot_score_vectors(aggregated_scores))
+    queries = itertools.cycle(index.location_ids[:50])
+    rows, _ = benchmark(lambda: index.exact_search(index.vectors[index.location_index.get_loc(next(queries))], 11))
+    assert len(rows) == 11
+
+
+def test_haversine(benchmark, dataset):
+    """Distances of all locations to each reference start location."""
+    locations = dataset['locations_list']
+    lat = locations['lat'].to_numpy(dtype=float)
+    lon = locations['lon'].to_numpy(dtype=float)
+    ref_lat, ref_lon = lat[:3, np.newaxis], lon[:3, np.newaxis]
+    distances = benchmark(haversine, lon1=ref_lon, lat1=ref_lat, lon2=lon, lat2=lat)
+    assert distances.shape == (3, dataset['n_locations'])
+
+
+def test_compute_distances(benchmark, dataset):
+    """
+    Distances to the median and the bounds of all scores (as
+    FillScores.compute_distances, which runs the pipeline on import).
+    """
+    benchmark.extra_info['rows'] = len(dataset['scores'])
+    result = benchmark.pedantic(compute_distances, args=(dataset['scores'],), rounds=3)
+    assert len(result) == len(dataset['scores'])
+
+
+def test_numbeo_scores(benchmark, dataset):
+    """Cost of living scores of all locations (CostScores.numbeo_scores)."""
+    if dataset['scale'] > NUMBEO_MAX_SCALE:
+        pytest.skip(f'numbeo_scores only benchmarked up to {NUMBEO_MAX_SCALE}x')
+    result = benchmark.pedantic(CostScores(dataset['database']).numbeo_scores, rounds=3)
+    assert result['location_id'].nunique() == dataset['n_locations']
+
+
+def test_weather_prep_data(benchmark, dataset):
+    """Weather scores of all locations for one year (WeatherScores.prep_data)."""
+    result = benchmark.pedantic(
+        WeatherScores(dataset['database']).prep_data,
+        kwargs={'year': 2024, 'climatology': dataset['climatology']},
+        rounds=3
+    )
+    assert result['location_id'].nunique() == dataset['n_locations']
+
+
+def test_filter_index_build(benchmark, dataset):
+    """Filter index of a new location list (first request of filter_locations)."""
+    locations = dataset['locations_list']
+    index = benchmark(FilterIndex, locations, FILTER_COLUMNS, SORT_COLUMNS)
+    assert index.n_rows == dataset['n_locations']
+
+
+def test_filter_locations(benchmark, dataset):
+    """Filters of filter_locations for random slider settings (filter index cached)."""
+    locations = dataset['locations_list']
+    index = FilterIndex(locations, FILTER_COLUMNS, SORT_COLUMNS)
+    rng = np.random.default_rng(0)
+    filters = itertools.cycle([random_filters(locations, rng) for _ in range(50)])
+
+    def filter_locations():
+        filters_form_data = next(filters)
+        ranges = {
+            variable: (filters_form_data.get(f'min_{filter_name}'), filters_form_data.get(f'max_{filter_name}'))
+            for filter_name, variable in HIST_VALUE_FILTERS.items()
+        }
+        ranges['dim_22'] = (filters_form_data['min_temperature'], None)
+        ranges['dim_21'] = (None, filters_form_data['max_temperature'])
+        return index.filter_mask(ranges=ranges, any_present=filters_form_data.get('mode_of_transport'))
+
+    mask = benchmark(filter_locations)
+    assert len(mask) == dataset['n_locations']
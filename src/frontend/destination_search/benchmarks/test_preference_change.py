@@ -0,0 +1,39 @@
+"""
+Regression test of a preference change in the list view: reweighting the
+cached category distances (weight_category_distances) must return exactly
+the relevance of the previous implementation (see
+bench_preference_change.py), also after the category distances went
+through the encoding of the location list cache.
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_preference_change.py --benchmark-disable
+"""
+from benchmarks.bench_preference_change import random_preferences
+from benchmarks.bench_relevance import compute_relevance_loop, generate_inputs
+from destinations.compute_relevance import compute_category_distances, weight_category_distances
+from destinations.result_cache import decode_category_distances, encode_category_distances
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_weight_category_distances(seed):
+    inputs = generate_inputs(n_locations=100, seed=seed)
+    categories = sorted(inputs['scores']['category_id'].unique())
+    rng = np.random.default_rng(seed + 1)
+
+    distances = compute_category_distances(inputs['previous_locations'], inputs['previous_countries'], inputs['scores'])
+    for _ in range(20):
+        preferences = random_preferences(categories, rng)
+        pd.testing.assert_series_equal(
+            compute_relevance_loop(**{**inputs, 'preferences': preferences}),
+            weight_category_distances(distances, preferences),
+            check_exact=True
+        )
+
+
+def test_category_distances_encoding():
+    inputs = generate_inputs(n_locations=100)
+    distances = compute_category_distances(inputs['previous_locations'], inputs['previous_countries'], inputs['scores'])
+    pd.testing.assert_frame_equal(decode_category_distances(encode_category_distances(distances)), distances, check_exact=True)
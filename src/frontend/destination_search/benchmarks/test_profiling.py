@@ -0,0 +1,50 @@
+"""
+Regression test of the profiling middleware: the queries of a request are
+counted in its spans, also the queries the location bundle runs concurrently
+in worker threads (see profiling.py and location_bundle.run_concurrently).
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_profiling.py --benchmark-disable
+"""
+import re
+from destinations.location_bundle import run_concurrently
+from destinations.profiling import ProfilingMiddleware, execute_wrapper, span
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+N_FUNCTIONS = 8
+N_QUERIES = 200
+
+
+def query() -> int:
+    """Queries of a bundle function (through the execute wrapper of the connections)."""
+    for _ in range(N_QUERIES):
+        execute_wrapper(lambda sql, params, many, context: None, 'SELECT 1', None, False, {})
+    return N_QUERIES
+
+
+def view(request):
+    with span('main'):
+        query()
+    with span('bundle'):
+        results = run_concurrently({f'function_{i}': query for i in range(N_FUNCTIONS)})
+    assert sum(results.values()) == N_FUNCTIONS * N_QUERIES
+    return HttpResponse('ok')
+
+
+def get_query_counts(server_timing: str) -> dict:
+    return {name: int(count) for name, count in re.findall(r'(\w+);dur=[\d.]+;desc="(\d+) queries', server_timing)}
+
+
+def test_query_count_of_concurrent_queries():
+    with override_settings(PROFILING_ENABLED=True, PROFILING_TRACE_MEMORY=False):
+        middleware = ProfilingMiddleware(view)
+
+    # Second request in the worker threads of the first one
+    for _ in range(2):
+        response = middleware(RequestFactory().get('/details/1'))
+        assert get_query_counts(response['Server-Timing']) == {
+            'total': (N_FUNCTIONS + 1) * N_QUERIES,
+            'main': N_QUERIES,
+            'bundle': N_FUNCTIONS * N_QUERIES
+        }
@@ -0,0 +1,49 @@
+"""
+Regression test of the ranking and pagination of the list view: every page
+of destinations.filter_index.RankedLocations must equal the page of the
+stable sort of the filtered location list, and the pages of a ranking must
+not overlap (see bench_ranking.py).
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_ranking.py --benchmark-disable
+"""
+from benchmarks.bench_ranking import FILTER_COLUMNS, PER_PAGE, SORT_OPTIONS, page_previous, page_ranked
+from benchmarks.synthetic_data import generate_locations_list
+from destinations.filter_index import FilterIndex
+from django.core.paginator import Paginator
+import numpy as np
+import pandas as pd
+import pytest
+
+N_LOCATIONS = 400
+
+
+@pytest.fixture(scope='module')
+def locations_list() -> pd.DataFrame:
+    locations_list = generate_locations_list(N_LOCATIONS)
+    # Ties in the relevance (as for locations with the same scores)
+    locations_list.loc[::10, 'relevance'] = 0.5
+    return locations_list
+
+
+@pytest.mark.parametrize('sort_option', SORT_OPTIONS)
+@pytest.mark.parametrize('filtered', [False, True], ids=['no filter', 'filtered'])
+def test_ranked_pages(locations_list, sort_option, filtered):
+    sort_column, ascending = SORT_OPTIONS[sort_option]
+    if filtered:
+        mask = (locations_list['dim_41'] <= 25).to_numpy() & (locations_list['population'] >= 10**6).to_numpy()
+    else:
+        mask = np.ones(N_LOCATIONS, dtype=bool)
+    index = FilterIndex(locations_list, FILTER_COLUMNS, ['relevance', 'distance_to_start', 'city'])
+    num_pages = Paginator(range(mask.sum()), PER_PAGE).num_pages
+
+    seen = {}
+    # First pages (argpartition), last page (permutation), first pages again
+    for page in [1, 2, 3, num_pages, 1, 2]:
+        expected = page_previous(locations_list[mask], sort_column, ascending, page, kind='stable')
+        result = page_ranked(locations_list, index, mask, sort_column, ascending, page)
+        assert result.paginator.count == expected.paginator.count == mask.sum()
+        assert pd.DataFrame(list(result)).equals(pd.DataFrame(list(expected))), page
+        if page not in seen:
+            assert not {row['location_id'] for row in result} & set().union(*seen.values())
+            seen[page] = {row['location_id'] for row in result}
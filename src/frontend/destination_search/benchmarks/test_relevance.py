@@ -0,0 +1,98 @@
+"""
+Regression test of compute_relevance: the batched implementation must
+return exactly the same relevance as the previous implementation (see
+bench_relevance.py), and the category distances gathered from the distance
+tables must match the category distances computed from the scores (see
+bench_distance_tables.py).
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_relevance.py --benchmark-disable
+"""
+import tempfile
+from benchmarks.bench_distance_tables import N_COUNTRIES, REF_START_LOCATION_ID, get_inputs
+from benchmarks.bench_relevance import compute_relevance_loop, generate_inputs
+from benchmarks.synthetic_data import generate_scores
+from database.internal.distance_tables import build_distance_tables
+from database.internal.score_snapshot import build_snapshot_arrays, write_snapshot
+from destinations.compute_relevance import compute_category_distances, compute_relevance
+from destinations.distance_tables import DistanceTables
+from destinations.score_cube import ScoreCube
+import numpy as np
+import pandas as pd
+import pytest
+
+N_LOCATIONS = 120
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_compute_relevance(seed):
+    inputs = generate_inputs(n_locations=100, seed=seed)
+    pd.testing.assert_series_equal(compute_relevance_loop(**inputs), compute_relevance(**inputs), check_exact=True)
+
+
+def test_compute_relevance_without_previous_countries():
+    inputs = {**generate_inputs(n_locations=100), 'previous_countries': {}}
+    pd.testing.assert_series_equal(compute_relevance_loop(**inputs), compute_relevance(**inputs), check_exact=True)
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    # Two months, i.e. two time buckets per category (some categories with
+    # scores of the reference start location)
+    scores = generate_scores(n_locations=N_LOCATIONS, n_dimensions=16, n_months=2, start='2024-06-01', n_ref_start_locations=1)
+    countries = pd.Series(
+        [f'Country {i % N_COUNTRIES}' for i in range(1, N_LOCATIONS + 1)],
+        index=pd.Index(np.arange(1, N_LOCATIONS + 1), name='location_id')
+    )
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        path = write_snapshot(
+            build_snapshot_arrays(scores),
+            version='1',
+            snapshot_dir=snapshot_dir,
+            distance_tables=build_distance_tables(scores, countries)
+        )
+        yield ScoreCube.from_snapshot(path), DistanceTables.from_snapshot(path)
+
+
+def get_category_distances(snapshot, start_date: pd.Timestamp, end_date: pd.Timestamp) -> tuple:
+    cube, tables = snapshot
+    inputs = get_inputs(cube, N_LOCATIONS, np.random.default_rng(0), start_date=start_date, end_date=end_date)
+    precomputed = tables.mean_distances(
+        previous_locations=inputs['previous_locations'],
+        previous_countries=inputs['previous_countries'],
+        location_ids=inputs['scores']['location_id'].unique(),
+        start_date=start_date,
+        end_date=end_date,
+        ref_start_location_id=REF_START_LOCATION_ID
+    )
+    return (
+        precomputed,
+        compute_category_distances(**inputs),
+        compute_category_distances(**inputs, precomputed=precomputed)
+    )
+
+
+@pytest.mark.parametrize('start_date, end_date', [
+    ('2024-06-03', '2024-06-21'),
+    ('2024-07-01 14:30', '2024-07-31')
+])
+def test_compute_category_distances_precomputed(snapshot, start_date, end_date):
+    _, tables = snapshot
+    assert any(ref_start_location_id == REF_START_LOCATION_ID for _, ref_start_location_id in tables.buckets)
+    precomputed, expected, result = get_category_distances(snapshot, pd.Timestamp(start_date), pd.Timestamp(end_date))
+
+    # All categories but the distance to start come from the tables
+    assert sorted(precomputed.columns) == tables.categories
+    assert len(precomputed.columns) == expected.shape[1] - 1
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, atol=1e-5)
+
+
+def test_compute_category_distances_across_time_buckets(snapshot):
+    _, tables = snapshot
+    start_date, end_date = pd.Timestamp('2024-06-25'), pd.Timestamp('2024-07-05')
+
+    # No category has a table for the whole travel interval
+    assert tables.select(start_date, end_date, REF_START_LOCATION_ID) == {}
+    precomputed, expected, result = get_category_distances(snapshot, start_date, end_date)
+    assert len(precomputed.columns) == 0
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
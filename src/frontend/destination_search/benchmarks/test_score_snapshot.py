@@ -0,0 +1,61 @@
+"""
+Regression test of the score snapshot: the arrays written by the scoring
+pipeline (build_snapshot_arrays in src/backend/database/internal/score_snapshot.py)
+must have the layout of ScoreCube.from_frame, so the memory-mapped cube
+answers like the cube built from core_scores (see bench_score_snapshot.py).
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_score_snapshot.py --benchmark-disable
+"""
+import tempfile
+from benchmarks.synthetic_data import generate_scores
+from database.internal import score_snapshot
+from database.internal.score_snapshot import build_snapshot_arrays, write_snapshot
+from destinations import score_cube
+from destinations.score_cube import ScoreCube
+import numpy as np
+import pandas as pd
+import pytest
+
+CUBE_ARRAYS = [
+    'location_ids', 'cell_category_id', 'cell_dimension_id', 'cell_start_date', 'cell_end_date',
+    'cell_ref_start_location_id', 'score', 'raw_value', 'present'
+]
+
+
+@pytest.fixture(scope='module')
+def scores() -> pd.DataFrame:
+    scores = generate_scores(n_locations=60, n_dimensions=16, n_months=6, n_ref_start_locations=2)
+    # Rows in the order of the database (not sorted by cell)
+    return scores.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def test_cell_columns():
+    assert score_snapshot.CELL_COLUMNS == score_cube.CELL_COLUMNS
+
+
+def test_build_snapshot_arrays(scores):
+    arrays = build_snapshot_arrays(scores)
+    cube = ScoreCube.from_frame(scores)
+    assert set(arrays) == set(CUBE_ARRAYS)
+    for name in CUBE_ARRAYS:
+        expected = np.asarray(getattr(cube, name))
+        assert arrays[name].dtype == expected.dtype, name
+        np.testing.assert_array_equal(arrays[name], expected, err_msg=name)
+
+
+def test_from_snapshot(scores):
+    cube = ScoreCube.from_frame(scores)
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        path = write_snapshot(build_snapshot_arrays(scores), version='1', snapshot_dir=snapshot_dir)
+        snapshot_cube = ScoreCube.from_snapshot(path)
+        pd.testing.assert_frame_equal(snapshot_cube.cells, cube.cells)
+        for ref_start_location_id in [-1, 10**6 + 1]:
+            window = {
+                'start_date': pd.Timestamp('2024-02-10'),
+                'end_date': pd.Timestamp('2024-04-20'),
+                'ref_start_location_id': ref_start_location_id
+            }
+            expected = cube.aggregate(**window)
+            assert len(expected) > 0
+            pd.testing.assert_frame_equal(snapshot_cube.aggregate(**window), expected)
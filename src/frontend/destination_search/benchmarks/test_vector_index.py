@@ -0,0 +1,74 @@
+"""
+Regression test of the vector index of the similar destinations endpoint:
+the exact blocked search must find the same neighbours as brute force, the
+IVF index must fall back to the exact search if all lists are probed, and
+similar locations never include the location itself (see
+bench_vector_index.py).
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_vector_index.py --benchmark-disable
+"""
+from benchmarks.bench_vector_index import K, brute_force, generate_vectors
+from destinations import vector_index, views
+from destinations.vector_index import VectorIndex
+from django.test import Client
+import numpy as np
+import pytest
+from sklearn.metrics import pairwise_distances
+
+N_LOCATIONS = 600
+
+
+@pytest.fixture(scope='module', params=[False, True], ids=['uniform', 'clustered'])
+def index(request) -> VectorIndex:
+    return VectorIndex(generate_vectors(N_LOCATIONS, clustered=request.param), n_lists=int(np.sqrt(N_LOCATIONS)))
+
+
+@pytest.fixture
+def queries(index: VectorIndex) -> np.ndarray:
+    return index.vectors[np.random.default_rng(1).choice(len(index), 20, replace=False)]
+
+
+def test_exact_search(index, queries, monkeypatch):
+    # Several blocks per search
+    monkeypatch.setattr(vector_index, 'BLOCK_ROWS', 64)
+    for query in queries:
+        rows, distances = index.exact_search(query, K)
+        expected = brute_force(index.vectors, query, K)
+        np.testing.assert_array_equal(rows, expected)
+        # Distances from the squared norms (the rounding error of a distance
+        # close to 0, e.g. of the query to itself, is about the square root of
+        # the float precision)
+        np.testing.assert_allclose(distances, pairwise_distances(query[np.newaxis, :], index.vectors[expected])[0], atol=1e-6)
+
+
+@pytest.mark.parametrize('exact', [False, True])
+def test_similar(index, exact):
+    for location_id in index.location_ids[:20]:
+        similar = index.similar(location_id, k=K, exact=exact)
+        assert len(similar) == K
+        assert location_id not in similar['location_id'].to_numpy()
+        assert similar['distance'].is_monotonic_increasing
+    if exact:
+        row = index.location_index.get_loc(location_id)
+        expected = brute_force(index.vectors, index.vectors[row], K + 1)
+        np.testing.assert_array_equal(similar['location_id'], index.location_ids[expected[expected != row]][:K])
+
+
+@pytest.mark.parametrize('n_probes', [0, 1])
+def test_approximate_search_all_lists(index, queries, n_probes):
+    assert index.n_lists > 1
+    for query in queries:
+        rows, distances = index.approximate_search(query, K, n_probes=index.n_lists + n_probes)
+        expected_rows, expected_distances = index.exact_search(query, K)
+        np.testing.assert_array_equal(rows, expected_rows)
+        np.testing.assert_array_equal(distances, expected_distances)
+
+
+def test_similar_locations_unknown_location(index, monkeypatch):
+    monkeypatch.setattr(views, 'get_score_cube', lambda: None)
+    monkeypatch.setattr(views, 'get_vector_index', lambda cube, start_date, end_date, category_id=None: index)
+    location_id = int(index.location_ids.max()) + 1
+    assert index.similar(location_id) is None
+    response = Client(HTTP_HOST='localhost').get(f'/api/locations/{location_id}/similar')
+    assert response.status_code == 404
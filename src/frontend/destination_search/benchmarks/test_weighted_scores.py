@@ -0,0 +1,59 @@
+"""
+Regression test of the overlap-day weighting in get_scores: the vectorized
+destinations.compute_weighted_scores must return the same result as the
+previous row-wise implementation (see bench_weighted_scores.py), and
+destinations.score_cube.ScoreCube.aggregate the same result as
+compute_weighted_scores on the scores selected in SQL.
+
+Usage (from src/frontend/destination_search):
+    python -m pytest benchmarks/test_weighted_scores.py --benchmark-disable
+"""
+from benchmarks.bench_weighted_scores import compute_weighted_scores_rowwise
+from benchmarks.synthetic_data import generate_scores
+from destinations.compute_weighted_scores import compute_weighted_scores
+from destinations.score_cube import ScoreCube
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize('start_date, end_date', [
+    ('2024-03-10', '2024-05-20'),
+    ('2024-01-01', '2024-01-31'),
+    ('2023-12-20', '2024-01-05'),
+    ('2024-02-29', '2024-02-29')
+])
+def test_compute_weighted_scores(start_date, end_date):
+    scores = generate_scores(n_locations=50, n_dimensions=12, n_months=24)
+    start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
+    # Only scores overlapping with the travel interval (as filtered in SQL)
+    scores = scores[(scores['start_date'] <= end_date) & (scores['end_date'] >= start_date)]
+    pd.testing.assert_frame_equal(
+        compute_weighted_scores_rowwise(scores, start_date, end_date),
+        compute_weighted_scores(scores, start_date, end_date)
+    )
+
+
+@pytest.mark.parametrize('start_date, end_date', [
+    ('2024-03-10', '2024-05-20'),
+    ('2024-01-01', '2024-01-31'),
+    ('2023-12-20', '2024-01-05'),
+    ('2024-02-29', '2024-02-29')
+])
+def test_score_cube_aggregate(start_date, end_date):
+    scores = generate_scores(n_locations=50, n_dimensions=12, n_months=24, n_ref_start_locations=2)
+    start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    ref_start_location_id = scores['ref_start_location_id'].max()
+    keys = ['location_id', 'category_id', 'dimension_id']
+
+    # Scores overlapping with the travel interval for the reference start location (as filtered in SQL)
+    selected = scores[
+        (scores['start_date'] <= end_date) & (scores['end_date'] >= start_date)
+        & scores['ref_start_location_id'].isin([-1, ref_start_location_id])
+    ]
+    expected = compute_weighted_scores(selected, start_date, end_date)
+    result = ScoreCube.from_frame(scores).aggregate(start_date, end_date, ref_start_location_id)
+    pd.testing.assert_frame_equal(
+        result.sort_values(keys).reset_index(drop=True),
+        expected.sort_values(keys).reset_index(drop=True)
+    )
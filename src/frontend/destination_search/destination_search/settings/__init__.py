@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'destinations.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +89,10 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),
         'PORT': env('DB_PORT'),
+        # Seconds a connection is kept open (also by the worker threads of
+        # destinations/location_bundle.py), checked before reuse
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -133,3 +138,128 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Score cube
+# In-memory copy of core_scores used by get_scores (see destinations/score_cube.py)
+
+SCORE_CUBE_ENABLED = True
+
+# Seconds between two checks of core_scores.updated_at (cube is reloaded on change)
+SCORE_CUBE_REFRESH_INTERVAL = 60
+
+# Directory of the score snapshot published by the scoring pipeline
+# (FillScores.fill_scores with the same SCORE_SNAPSHOT_DIR). If set, the cube
+# is memory-mapped from the snapshot (shared by all worker processes) instead
+# of loaded from core_scores
+SCORE_SNAPSHOT_DIR = env('SCORE_SNAPSHOT_DIR', default=None)
+
+# Use the distance tables of the score snapshot for the relevance (categories
+# whose scores do not change within the travel interval, float32 precision)
+DISTANCE_TABLES_ENABLED = True
+
+
+# Spatial indexes
+# In-memory ball trees over (reference start) locations (see destinations/spatial_index.py)
+
+# Seconds between two checks of the location tables (indexes are rebuilt on change)
+SPATIAL_INDEX_REFRESH_INTERVAL = 60
+
+
+# Filter indexes
+# Presorted columns of location lists for the list filters (see destinations/filter_index.py)
+
+# Number of location lists whose filter index is kept per process
+FILTER_INDEX_CACHE_SIZE = 64
+
+
+# Vector indexes
+# Score vectors of all locations for the similar destinations endpoint (see destinations/vector_index.py)
+
+# Approximate search (IVF index) from this number of locations on, exact search below
+# (the exact search takes about 2 ms per query with 50000 locations, the k-means
+# clustering of the IVF index several seconds, see benchmarks/bench_vector_index.py)
+VECTOR_INDEX_IVF_MIN_LOCATIONS = 100000
+
+# Lists (of about sqrt(locations)) searched per query of the IVF index
+VECTOR_INDEX_IVF_PROBES = 8
+
+# Number of vector indexes (date window and category) kept per process
+VECTOR_INDEX_CACHE_SIZE = 16
+
+
+# Location details
+# Date-independent data of LocationDetailView, cached per location
+# (see destinations/location_bundle.py)
+
+# Seconds between two checks of the underlying tables (bundles are reloaded on change)
+LOCATION_DETAIL_REFRESH_INTERVAL = 300
+
+# Number of threads running the queries of a bundle concurrently (each keeps
+# its own database connection open)
+LOCATION_DETAIL_MAX_WORKERS = 8
+
+
+# Profiling
+# Per-stage timings of the views (see destinations/profiling.py), sent as
+# Server-Timing header and logged by the logger destinations.profiling
+
+PROFILING_ENABLED = env.bool('PROFILING_ENABLED', default=False)
+
+# Trace the peak memory allocation per stage (tracemalloc, slows down requests)
+PROFILING_TRACE_MEMORY = env.bool('PROFILING_TRACE_MEMORY', default=False)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'destinations.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Location lists of LocationsListView (see destinations/result_cache.py),
+    # per process (LRU) and shared by all processes
+    'locations_list': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'locations_list',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 200},
+    },
+    'locations_list_shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': env('LOCATIONS_LIST_CACHE_DIR', default=os.path.join(BASE_DIR, 'cache', 'locations_list')),
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Date-independent data of LocationDetailView (see destinations/location_bundle.py)
+    'location_detail': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'location_detail',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+    # Completed similarity texts of openai_proxy (see destinations/similarity_text.py)
+    'similarity_text': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'similarity_text',
+        'TIMEOUT': env.int('SIMILARITY_TEXT_CACHE_TIMEOUT', default=60 * 60 * 24),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
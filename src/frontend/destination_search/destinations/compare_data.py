@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+
+class ScoreMatrix:
+    """
+    Scores and raw values pivoted into (location x dimension) matrices for
+    direct lookups.
+    """
+
+    def __init__(self, scores: pd.DataFrame):
+        """
+        Args:
+        -----
+        scores: pandas.DataFrame
+            DataFrame with location_id, dimension_id (int), score and raw_value.
+            Cells with more than one row are treated as missing.
+        """
+        scores = scores.drop_duplicates(['location_id', 'dimension_id'], keep=False)
+        location_ids = pd.Index(scores['location_id'].unique())
+        dimension_ids = pd.Index(scores['dimension_id'].unique())
+        self.location_pos = {location_id: i for i, location_id in enumerate(location_ids.tolist())}
+        self.dimension_pos = {dimension_id: j for j, dimension_id in enumerate(dimension_ids.tolist())}
+
+        # Pivot (positions of each row in the matrices)
+        rows = location_ids.get_indexer(scores['location_id'])
+        cols = dimension_ids.get_indexer(scores['dimension_id'])
+        shape = (len(location_ids), len(dimension_ids))
+        self.present = np.zeros(shape, dtype=bool)
+        self.present[rows, cols] = True
+        self.values = {}
+        for col in ['score', 'raw_value']:
+            self.values[col] = np.full(shape, np.nan)
+            self.values[col][rows, cols] = scores[col].to_numpy(dtype=float)
+
+    def get(self, location_id: int, dimension_id: int, col: str):
+        """Get a score or raw value (None if there is no row)."""
+        i = self.location_pos.get(location_id)
+        j = self.dimension_pos.get(dimension_id)
+        if i is None or j is None or not self.present[i, j]:
+            return None
+        return self.values[col][i, j].item()
+
+
+def get_compare_data(categories, locations: list[dict], scores: pd.DataFrame) -> list[dict]:
+    """
+    Assemble the data of the comparison (per category, location and
+    dimension).
+
+    Args:
+    -----
+    categories: iterable of CoreCategories
+        Categories (in display order) with prefetched coredimensions_set.
+
+    locations: list[dict]
+        Compared locations with location_id, city and country.
+
+    scores: pandas.DataFrame
+        DataFrame with location_id, dimension_id (int), score and raw_value.
+
+    Returns:
+    --------
+    data: list[dict]
+    """
+    matrix = ScoreMatrix(scores)
+
+    def format_raw_value(location, dimension) -> str:
+        """Format raw value."""
+        raw_value = matrix.get(location['location_id'], dimension.dimension_id, 'raw_value')
+        if pd.isna(raw_value):
+            return ''
+        return f' ({raw_value:.{dimension.raw_value_decimals}f}{dimension.raw_value_unit})'
+
+    return [
+        {
+            'category_id': category.category_id,
+            'category_name': category.category_name,
+            'category_description': category.description,
+            'axis_title': category.axis_title,
+            'axis_label_low': category.axis_label_low,
+            'axis_label_high': category.axis_label_high,
+            'locations': [
+                {
+                    'location_id': location.get('location_id'),
+                    'city': location.get('city'),
+                    'country': location.get('country'),
+                    'dimensions': [
+                        {
+                            'dimension_id': dimension.dimension_id,
+                            'dimension_name': dimension.dimension_name,
+                            'dimension_description': dimension.description,
+                            'dimension_icon_url': dimension.icon_url,
+                            'score': matrix.get(location.get('location_id'), dimension.dimension_id, 'score'),
+                            'raw_value_formatted': format_raw_value(location, dimension),
+                        }
+                        for dimension in category.coredimensions_set.all()
+                    ]
+                }
+                for location in locations
+            ],
+        }
+        for category in categories
+    ]
@@ -1,6 +1,9 @@
 import numpy as np
 
 
+EARTH_RADIUS_KM = 6378.137
+
+
 def haversine(lon1, lat1, lon2, lat2):
     """
     Calculate the great circle distance (km) between two points on the earth
@@ -16,5 +19,5 @@ def haversine(lon1, lat1, lon2, lat2):
     a = np.sin(dlat/2.0)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2.0)**2
     
     c = 2 * np.arcsin(np.sqrt(a))
-    km = 6378.137 * c
+    km = EARTH_RADIUS_KM * c
     return km
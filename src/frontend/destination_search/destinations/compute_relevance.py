@@ -1,17 +1,77 @@
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import pairwise_distances
 
 
-def compute_relevance(
+def mean_category_distances(
+        previous: np.ndarray,
+        new: np.ndarray,
+        column_categories: np.ndarray,
+        categories: np.ndarray
+    ) -> np.ndarray:
+    """
+    Compute the mean Euclidean distance of each new location to the previous
+    locations, separately for each category (i.e. on the dimensions of the
+    category only).
+
+    Categories with the same number of dimensions are stacked to a
+    (categories x locations x dimensions) tensor and handled at once with the
+    squared norm expansion |x|^2 - 2 x.y + |y|^2 (as in
+    sklearn.metrics.pairwise_distances, which gives the same results).
+    Categories are not padded to a common number of dimensions, as the zeros
+    would change the floating point rounding.
+
+    Args:
+    -----
+    previous: numpy.ndarray
+        Scores of the previous locations (previous locations x dimensions).
+
+    new: numpy.ndarray
+        Scores of the new locations (new locations x dimensions).
+
+    column_categories: numpy.ndarray
+        Category of each dimension (column).
+
+    categories: numpy.ndarray
+        Categories to compute the distances for.
+
+    Returns:
+    --------
+    mean_dist: numpy.ndarray
+        Mean distances (categories x new locations).
+    """
+    mean_dist = np.empty((len(categories), len(new)))
+
+    positions = [np.flatnonzero(column_categories == category) for category in categories]
+    sizes = np.array([len(position) for position in positions])
+    for size in np.unique(sizes):
+        group = np.flatnonzero(sizes == size)
+        columns = np.concatenate([positions[i] for i in group])
+
+        # Tensors of shape (categories x locations x dimensions)
+        x = previous[:, columns].reshape(len(previous), len(group), size).transpose(1, 0, 2)
+        y = new[:, columns].reshape(len(new), len(group), size).transpose(1, 0, 2)
+
+        # Squared distances via squared norms and dot products
+        dist = -2 * np.matmul(x, y.transpose(0, 2, 1))
+        dist += np.einsum('cij,cij->ci', x, x)[:, :, np.newaxis]
+        dist += np.einsum('cij,cij->ci', y, y)[:, np.newaxis, :]
+        np.maximum(dist, 0, out=dist)
+
+        mean_dist[group] = np.sqrt(dist).mean(axis=1)
+
+    return mean_dist
+
+
+def compute_category_distances(
         previous_locations: list[int],
         previous_countries: dict,
         scores: pd.DataFrame,
-        preferences: dict,
-        factor: float = 100.
-    ) -> pd.Series:
+        precomputed: pd.DataFrame = None
+    ) -> pd.DataFrame:
     """
-    Compute relevance score for each location in scores.
+    Compute the normalized mean distance of each new location to the previous
+    locations for each category (the part of the relevance that does not
+    depend on the preferences).
 
     Args:
     -----
@@ -24,32 +84,47 @@ def compute_relevance(
     scores: pandas.DataFrame 
         DataFrame with scores for each location, category and dimension.
 
-    preferences: dict
-        Dictionary with respective importance and direction for each category.
+    precomputed: pandas.DataFrame
+        Mean distances of the new locations (not normalized) for some
+        categories (see DistanceTables.mean_distances), only the other
+        categories are computed from the scores.
 
     Returns:
     --------
-    relevance: pandas.Series
-        Array of relevance scores.
+    distances: pandas.DataFrame
+        Mean distances normalized to [0, 1] per category (new locations x
+        categories).
     """
 
+    # Only compute the categories without precomputed distances (for the
+    # same locations)
+    if precomputed is not None and len(precomputed.columns) > 0:
+        location_ids = np.unique(scores['location_id'].to_numpy())
+        scores = scores[~scores['category_id'].isin(precomputed.columns)]
+    else:
+        precomputed = None
+
     # Pivot scores (from long to wide)
     scores = scores.pivot(
         index='location_id',
         columns=['category_id', 'dimension_id'],
         values='score'
     )
+    if precomputed is not None:
+        scores = scores.reindex(location_ids)
 
     # Impute missing values with column means
     # (i.e. mean of scores in the respective dimension)
-    scores = scores.fillna(scores.mean())
+    values = scores.to_numpy(dtype=float)
+    values = np.where(np.isnan(values), scores.mean().to_numpy(), values)
+    scores = pd.DataFrame(values, index=scores.index, columns=scores.columns)
 
     # Compute average scores for previous countries
     if len(previous_countries) > 0:
         score_previous_countries = []
-        for location_ids in previous_countries.values():
+        for country_location_ids in previous_countries.values():
             score_previous_countries.append(
-                scores.loc[location_ids].mean(axis=0).to_frame().T
+                scores.loc[country_location_ids].mean(axis=0).to_frame().T
             )
         scores_previous_countries = pd.concat(score_previous_countries)
 
@@ -59,32 +134,63 @@ def compute_relevance(
         scores_previous = pd.concat([scores_previous, scores_previous_countries])
     scores_new = scores.drop(previous_locations)
 
-    # Loop over categories and compute relevance
-    relevance = 0
-    importance_sum = 0
-    for category in scores.columns.levels[0]:
+    # Compute mean distances (over previous locations) for all categories
+    categories = scores.columns.levels[0]
+    mean_dist = mean_category_distances(
+        scores_previous.to_numpy(dtype=float),
+        scores_new.to_numpy(dtype=float),
+        column_categories=scores.columns.get_level_values(0).to_numpy(),
+        categories=categories.to_numpy()
+    )
+
+    # Add precomputed categories (in the order of the categories)
+    if precomputed is not None:
+        mean_dist = np.concatenate([mean_dist, precomputed.reindex(scores_new.index).to_numpy(dtype=float).T])
+        categories = categories.append(pd.Index(precomputed.columns, name=categories.name))
+        order = np.argsort(categories.to_numpy(), kind='stable')
+        mean_dist, categories = mean_dist[order], categories[order]
+
+    # Normalize to [0, 1] (per category)
+    mean_dist_min = mean_dist.min(axis=1, keepdims=True)
+    mean_dist_max = mean_dist.max(axis=1, keepdims=True)
+    mean_dist = (mean_dist - mean_dist_min) / (mean_dist_max - mean_dist_min)
 
-        # Retrieve scores for category
-        cat_scores_previous = scores_previous.loc[:,category]
-        cat_scores_new = scores_new.loc[:,category]
+    return pd.DataFrame(mean_dist.T, index=scores_new.index, columns=categories)
 
-        # Compute mean distances (over previous locations)
-        dist = pairwise_distances(
-            cat_scores_previous, cat_scores_new, metric='euclidean'
-        )
-        mean_dist = dist.mean(axis=0)
 
-        # Normalize to [0, 1]
-        mean_dist = (mean_dist - mean_dist.min()) / (mean_dist.max() - mean_dist.min())
+def weight_category_distances(
+        distances: pd.DataFrame,
+        preferences: dict,
+        factor: float = 100.
+    ) -> pd.Series:
+    """
+    Compute the relevance score from the category distances and the
+    preferences (cheap, to rerank when only the preferences change).
 
-        # Invert (if preference if for similarity, i.e. direction=False)
-        if not preferences[f'direction_{category}']:
-            mean_dist = 1 - mean_dist
+    Args:
+    -----
+    distances: pandas.DataFrame
+        Normalized mean distances (see compute_category_distances).
 
-        # Weight by importance
-        weight = preferences[f'importance_{category}']
-        relevance += weight * mean_dist
-        importance_sum += weight
+    preferences: dict
+        Dictionary with respective importance and direction for each category.
+
+    Returns:
+    --------
+    relevance: pandas.Series
+        Array of relevance scores.
+    """
+    categories = distances.columns
+    mean_dist = np.ascontiguousarray(distances.to_numpy(dtype=float).T)
+
+    # Invert (if preference if for similarity, i.e. direction=False)
+    directions = np.array([bool(preferences[f'direction_{category}']) for category in categories])
+    mean_dist = np.where(directions[:, np.newaxis], mean_dist, 1 - mean_dist)
+
+    # Weight by importance
+    weights = [preferences[f'importance_{category}'] for category in categories]
+    relevance = (np.array(weights, dtype=float)[:, np.newaxis] * mean_dist).sum(axis=0)
+    importance_sum = sum(weights)
 
     # Normalize to [0, 1]
     relevance = relevance / importance_sum
@@ -92,4 +198,37 @@ def compute_relevance(
     # Scale to [0, factor]
     relevance = factor * relevance
 
-    return pd.Series(relevance, index=scores_new.index, name='relevance')
+    return pd.Series(relevance, index=distances.index, name='relevance')
+
+
+def compute_relevance(
+        previous_locations: list[int],
+        previous_countries: dict,
+        scores: pd.DataFrame,
+        preferences: dict,
+        factor: float = 100.
+    ) -> pd.Series:
+    """
+    Compute relevance score for each location in scores.
+
+    Args:
+    -----
+    previous_locations: list[int] 
+        List of location IDs.
+
+    previous_countries: dict
+        Dictionary with country names and respective locations (ids).
+
+    scores: pandas.DataFrame 
+        DataFrame with scores for each location, category and dimension.
+
+    preferences: dict
+        Dictionary with respective importance and direction for each category.
+
+    Returns:
+    --------
+    relevance: pandas.Series
+        Array of relevance scores.
+    """
+    distances = compute_category_distances(previous_locations, previous_countries, scores)
+    return weight_category_distances(distances, preferences, factor)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+
+def compute_weighted_scores(
+        scores: pd.DataFrame,
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp
+    ) -> pd.DataFrame:
+    """
+    Average scores over the travel interval, weighted by the number of days
+    each score interval overlaps with it.
+
+    Args:
+    -----
+    scores: pandas.DataFrame
+        DataFrame with location_id, category_id, dimension_id, start_date,
+        end_date (datetime64), score and raw_value.
+
+    start_date, end_date: pandas.Timestamp
+        Travel interval.
+
+    Returns:
+    --------
+    scores: pandas.DataFrame
+        DataFrame with location_id, category_id, dimension_id, score and
+        raw_value. Missing values propagate (i.e. if any overlapping raw_value
+        is missing, the average is missing as well).
+    """
+    one_day = np.timedelta64(1, 'D')
+
+    # Calculate the number of days each score interval overlaps
+    # with the given travel interval
+    overlap_days = (
+        np.minimum(scores['end_date'].to_numpy(dtype='datetime64[ns]'), pd.Timestamp(end_date).to_datetime64())
+        - np.maximum(scores['start_date'].to_numpy(dtype='datetime64[ns]'), pd.Timestamp(start_date).to_datetime64())
+        + one_day
+    ) // one_day
+
+    # Calculate the sum of the weighted scores
+    value_cols = ['score', 'raw_value']
+    weighted = scores[value_cols].mul(overlap_days, axis=0)
+    weighted['overlap_days'] = overlap_days
+    keys = [scores['location_id'], scores['category_id'], scores['dimension_id']]
+    sums = weighted.groupby(keys).sum()
+
+    # Propagate missing values (sum with skipna=False)
+    sums[value_cols] = sums[value_cols].mask(
+        weighted[value_cols].isna().groupby(keys).any()
+    )
+
+    # Divide by the total number of overlapping days
+    for col in value_cols:
+        sums[col] /= sums['overlap_days']
+
+    return sums.drop(columns=['overlap_days']).reset_index()
@@ -0,0 +1,256 @@
+"""
+Process-level caches for data that is expensive to load but rarely changes.
+
+Each cache is loaded lazily by the first request of a worker process and
+reloaded once the underlying tables change.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from django.conf import settings
+from django.db.models import Count, Max
+from django_pandas.io import read_frame
+import pandas as pd
+from .models import CoreLocations, CoreRefStartLocations, CoreScores, CoreSliderHistograms
+from .distance_tables import DistanceTables
+from .score_cube import ScoreCube
+from .slider_histograms import SliderHistograms, create_hist_for_slider
+from .spatial_index import SpatialIndex
+
+
+_lock = threading.Lock()
+_score_cube = None
+_score_cube_checked_at = 0.
+_score_cube_snapshot = None
+_distance_tables = None
+_spatial_indexes = {}
+_spatial_indexes_checked_at = {}
+_select2_payload = None
+_slider_histograms = None
+_slider_histograms_checked_at = 0.
+_population_histogram = None
+
+
+def get_score_cube() -> ScoreCube:
+    """
+    Get the score cube of this process.
+
+    The version (max(core_scores.updated_at)) is checked at most every
+    SCORE_CUBE_REFRESH_INTERVAL seconds, the cube is rebuilt if it changed.
+
+    If SCORE_SNAPSHOT_DIR is set (and a snapshot has been published), the
+    cube is memory-mapped from the snapshot published by the scoring pipeline
+    instead (shared by all processes, no database query), and remapped once
+    the symlink 'current' points to a new version.
+    """
+    global _score_cube, _score_cube_checked_at, _score_cube_snapshot, _distance_tables
+
+    if (
+        _score_cube is not None
+        and time.monotonic() - _score_cube_checked_at < settings.SCORE_CUBE_REFRESH_INTERVAL
+    ):
+        return _score_cube
+
+    current = os.path.join(settings.SCORE_SNAPSHOT_DIR or '', 'current')
+    if settings.SCORE_SNAPSHOT_DIR and os.path.exists(current):
+        with _lock:
+            snapshot = os.path.realpath(current)
+            if _score_cube is None or _score_cube_snapshot != snapshot:
+                _score_cube = ScoreCube.from_snapshot(snapshot)
+                _distance_tables = DistanceTables.from_snapshot(snapshot)
+                _score_cube_snapshot = snapshot
+            _score_cube_checked_at = time.monotonic()
+        return _score_cube
+
+    with _lock:
+        version = CoreScores.objects.aggregate(version=Max('updated_at'))['version']
+        if _score_cube is None or _score_cube.version != version:
+            fields = [
+                'location_id', 'category_id', 'dimension_id', 'start_date',
+                'end_date', 'ref_start_location_id', 'score', 'raw_value'
+            ]
+            scores = pd.DataFrame(
+                CoreScores.objects.values_list(*fields), columns=fields
+            )
+            _score_cube = ScoreCube.from_frame(scores, version=version)
+            _distance_tables = None
+        _score_cube_checked_at = time.monotonic()
+
+    return _score_cube
+
+
+def get_distance_tables() -> DistanceTables:
+    """
+    Get the distance tables of the relevance of this process (memory-mapped
+    from the score snapshot, see get_score_cube). None without snapshot or if
+    DISTANCE_TABLES_ENABLED is off.
+    """
+    if not settings.DISTANCE_TABLES_ENABLED:
+        return None
+    get_score_cube()
+    return _distance_tables
+
+
+def get_slider_histograms() -> SliderHistograms:
+    """
+    Get the precomputed slider histograms of this process.
+
+    The version (max(core_slider_histograms.updated_at)) is checked at most
+    every SCORE_CUBE_REFRESH_INTERVAL seconds, the histograms are reloaded if
+    it changed.
+    """
+    global _slider_histograms, _slider_histograms_checked_at
+
+    if (
+        _slider_histograms is not None
+        and time.monotonic() - _slider_histograms_checked_at < settings.SCORE_CUBE_REFRESH_INTERVAL
+    ):
+        return _slider_histograms
+
+    with _lock:
+        version = CoreSliderHistograms.objects.aggregate(version=Max('updated_at'))['version']
+        if _slider_histograms is None or _slider_histograms.version != version:
+            fields = ['ref_start_location_id', 'month', 'histogram', 'bin_edges', 'heights']
+            histograms = pd.DataFrame(
+                CoreSliderHistograms.objects.values_list(*fields), columns=fields
+            )
+            _slider_histograms = SliderHistograms(histograms, version=version)
+        _slider_histograms_checked_at = time.monotonic()
+
+    return _slider_histograms
+
+
+def get_spatial_index(model, fields: list[str]) -> SpatialIndex:
+    """
+    Get the spatial index of this process over the rows of a location table.
+
+    The version (max(updated_at) and number of rows) is checked at most every
+    SPATIAL_INDEX_REFRESH_INTERVAL seconds, the index is rebuilt if it changed.
+
+    Args:
+    -----
+    model: django.db.models.Model
+        Location model (with lat, lon and updated_at).
+
+    fields: list[str]
+        Fields returned by the queries of the index.
+    """
+    name = model.__name__
+    index = _spatial_indexes.get(name)
+    if (
+        index is not None
+        and time.monotonic() - _spatial_indexes_checked_at[name] < settings.SPATIAL_INDEX_REFRESH_INTERVAL
+    ):
+        return index
+
+    with _lock:
+        version = model.objects.aggregate(updated_at=Max('updated_at'), count=Count('pk'))
+        version = (version['updated_at'], version['count'])
+        index = _spatial_indexes.get(name)
+        if index is None or index.version != version:
+            index = SpatialIndex(read_frame(model.objects.values(*fields)), version=version)
+            _spatial_indexes[name] = index
+        _spatial_indexes_checked_at[name] = time.monotonic()
+
+    return index
+
+
+def get_ref_start_location_index() -> SpatialIndex:
+    """Get the spatial index over the reference start locations."""
+    return get_spatial_index(
+        CoreRefStartLocations,
+        ['location_id', 'city', 'country', 'lat', 'lon', 'mapped_start_airport']
+    )
+
+
+def get_location_index() -> SpatialIndex:
+    """Get the spatial index over all locations."""
+    return get_spatial_index(
+        CoreLocations,
+        ['location_id', 'city', 'country', 'country_code', 'lat', 'lon', 'population']
+    )
+
+
+def get_data_version() -> dict:
+    """
+    Get the versions of the data a location list is computed from (part of
+    the location list cache keys, see result_cache): score cube or snapshot
+    (None if SCORE_CUBE_ENABLED is off), location index and slider
+    histograms.
+    """
+    return {
+        'scores': get_score_cube().version if settings.SCORE_CUBE_ENABLED else None,
+        'locations': get_location_index().version,
+        'slider_histograms': get_slider_histograms().version
+    }
+
+
+def get_locations_for_select2() -> dict:
+    """
+    Get the locations grouped by country for use in Select2.
+
+    The payload is built from the location index once per version of the
+    index (see get_location_index).
+
+    Returns:
+    --------
+    payload: dict
+        content (JSON as bytes), content_gzip (gzip compressed content),
+        etag (hash of the content) and last_modified (max(updated_at) of the
+        locations).
+    """
+    global _select2_payload
+
+    index = get_location_index()
+    payload = _select2_payload
+    if payload is not None and payload['version'] == index.version:
+        return payload
+
+    # Countries in order of their first location, each with its locations
+    grouped_locations = []
+    locations = index.locations
+    for country, group in locations.groupby('country', sort=False, dropna=False):
+        country = None if pd.isna(country) else country
+        grouped_locations.append({
+            'id': group['country_code'].iloc[0],
+            'text': country,
+            'isCountry': True,
+            'children': [
+                {'id': location_id, 'text': city, 'isCountry': False, 'parent': country}
+                for location_id, city in zip(group['location_id'].tolist(), group['city'].tolist())
+            ]
+        })
+    content = json.dumps(grouped_locations, separators=(',', ':')).encode()
+
+    payload = {
+        'version': index.version,
+        'content': content,
+        'content_gzip': gzip.compress(content, compresslevel=9, mtime=0),
+        'etag': hashlib.sha256(content).hexdigest()[:32],
+        'last_modified': index.version[0]
+    }
+    _select2_payload = payload
+    return payload
+
+
+def get_population_histogram() -> dict:
+    """
+    Get the histogram of the population of all locations (see
+    create_hist_for_slider), computed once per version of the location index.
+    """
+    global _population_histogram
+
+    index = get_location_index()
+    histogram = _population_histogram
+    if histogram is not None and histogram['version'] == index.version:
+        return histogram['histogram']
+
+    histogram = {
+        'version': index.version,
+        'histogram': create_hist_for_slider(index.locations['population'])
+    }
+    _population_histogram = histogram
+    return histogram['histogram']
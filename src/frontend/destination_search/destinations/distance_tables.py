@@ -0,0 +1,184 @@
+"""
+Precomputed distance tables of the relevance (written with the score snapshot
+by the scoring pipeline, see src/backend/database/internal/distance_tables.py).
+
+Per category, reference start location and time bucket (the scores of the
+category do not change within a bucket), a table holds the distances of all
+locations and previous countries (rows) to all locations (columns, plus one
+column for the mean vector of locations without scores). If the travel
+interval lies within one time bucket of a category, the mean distances of the
+new locations to the previous locations of that category are a gather of the
+rows of the previous locations and a mean, instead of the pivot, imputation
+and distance computation in compute_category_distances.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+
+
+class DistanceTables:
+    """Memory-mapped distance tables of a score snapshot."""
+
+    def __init__(self, location_ids: np.ndarray, row_countries: np.ndarray, tables: pd.DataFrame, arrays: dict):
+        """
+        Args:
+        -----
+        location_ids: numpy.ndarray
+            Location axis (sorted), rows and columns of the tables.
+
+        row_countries: numpy.ndarray
+            Countries of the rows after the locations (sorted).
+
+        tables: pandas.DataFrame
+            Index of the tables (category_id, ref_start_location_id,
+            start_date, end_date, table).
+
+        arrays: dict
+            Table name -> array (rows x columns).
+        """
+        self.location_ids = location_ids
+        self.row_countries = row_countries
+        self.arrays = arrays
+
+        # (category, reference start location) -> time buckets (sorted) and tables
+        self.buckets = {}
+        tables = tables.sort_values('start_date')
+        for (category_id, ref_start_location_id), group in tables.groupby(['category_id', 'ref_start_location_id']):
+            self.buckets[(category_id, ref_start_location_id)] = (
+                pd.to_datetime(group['start_date']).to_numpy(dtype='datetime64[ns]'),
+                pd.to_datetime(group['end_date']).to_numpy(dtype='datetime64[ns]'),
+                group['table'].tolist()
+            )
+        self.categories = sorted({category_id for category_id, _ in self.buckets})
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> 'DistanceTables':
+        """
+        Load the distance tables of a published score snapshot (None if the
+        snapshot has none).
+
+        Args:
+        -----
+        path: str
+            Directory of a snapshot version.
+        """
+        distances_path = os.path.join(path, 'distances')
+        if not os.path.exists(os.path.join(distances_path, 'manifest.json')):
+            return None
+        with open(os.path.join(distances_path, 'manifest.json')) as file:
+            manifest = json.load(file)
+        arrays = {
+            name: np.load(os.path.join(distances_path, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+            for name in manifest['arrays']
+        }
+        tables = pd.DataFrame(
+            manifest['tables'],
+            columns=['category_id', 'ref_start_location_id', 'start_date', 'end_date', 'table']
+        )
+        return cls(
+            np.load(os.path.join(path, 'location_ids.npy'), allow_pickle=False),
+            np.asarray(arrays.pop('row_countries')),
+            tables,
+            arrays
+        )
+
+    def select(self, start_date: pd.Timestamp, end_date: pd.Timestamp, ref_start_location_id: int) -> dict:
+        """
+        Get the tables of the categories whose scores do not change within
+        the travel interval.
+
+        Args:
+        -----
+        start_date, end_date: pandas.Timestamp
+            Travel interval.
+
+        ref_start_location_id: int
+            Reference start location.
+
+        Returns:
+        --------
+        tables: dict
+            Category -> table (categories without a table for the whole
+            travel interval are missing).
+        """
+        # Days of the travel interval (the default interval starts with the
+        # current time of day)
+        start_date = pd.Timestamp(start_date).normalize().to_datetime64()
+        end_date = pd.Timestamp(end_date).normalize().to_datetime64()
+        tables = {}
+        for category_id in self.categories:
+            # Tables of the reference start location if it has scores in the category
+            buckets = self.buckets.get((category_id, ref_start_location_id))
+            if buckets is None:
+                buckets = self.buckets.get((category_id, -1))
+            if buckets is None:
+                continue
+            starts, ends, names = buckets
+            pos = np.searchsorted(starts, start_date, side='right') - 1
+            if pos >= 0 and end_date <= ends[pos]:
+                tables[category_id] = self.arrays[names[pos]]
+        return tables
+
+    def mean_distances(
+            self,
+            previous_locations: list[int],
+            previous_countries: dict,
+            location_ids: np.ndarray,
+            start_date: pd.Timestamp,
+            end_date: pd.Timestamp,
+            ref_start_location_id: int
+        ) -> pd.DataFrame:
+        """
+        Get the mean distances of the new locations to the previous locations
+        (and countries) for the categories with a table for the travel
+        interval (not normalized, see compute_category_distances).
+
+        Args:
+        -----
+        previous_locations: list[int]
+            List of location IDs.
+
+        previous_countries: dict
+            Dictionary with country names and respective locations (ids).
+
+        location_ids: numpy.ndarray
+            Locations of the scores (the new locations are all but the
+            previous locations).
+
+        start_date, end_date: pandas.Timestamp
+            Travel interval.
+
+        ref_start_location_id: int
+            Reference start location.
+
+        Returns:
+        --------
+        mean_dist: pandas.DataFrame
+            Mean distances (new locations x categories), without columns if
+            the previous locations are not in the tables.
+        """
+        new_location_ids = np.setdiff1d(location_ids, previous_locations)
+
+        # Rows of the previous locations and countries
+        location_rows = np.searchsorted(self.location_ids, previous_locations)
+        country_rows = len(self.location_ids) + np.searchsorted(self.row_countries, list(previous_countries))
+        if (
+            np.any(location_rows >= len(self.location_ids))
+            or np.any(self.location_ids[np.minimum(location_rows, len(self.location_ids) - 1)] != previous_locations)
+            or not np.isin(list(previous_countries), self.row_countries).all()
+        ):
+            return pd.DataFrame(index=pd.Index(new_location_ids, name='location_id'))
+        rows = np.concatenate([location_rows, country_rows]).astype(np.intp)
+
+        # Columns of the new locations (mean vector column for locations without scores)
+        columns = np.searchsorted(self.location_ids, new_location_ids)
+        in_axis = columns < len(self.location_ids)
+        in_axis[in_axis] = self.location_ids[columns[in_axis]] == new_location_ids[in_axis]
+        columns[~in_axis] = len(self.location_ids)
+
+        mean_dist = {
+            category_id: table[rows][:, columns].mean(axis=0, dtype=float)
+            for category_id, table in self.select(start_date, end_date, ref_start_location_id).items()
+        }
+        return pd.DataFrame(mean_dist, index=pd.Index(new_location_ids, name='location_id'))
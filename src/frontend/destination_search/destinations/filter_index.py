@@ -0,0 +1,264 @@
+"""
+Filter and ranking index over a location list (see LocationsListView).
+
+Every filterable column is sorted once when the index is built. A range
+predicate (min <= value <= max) then only needs two binary searches, and the
+rows outside the range (the heads and tails of the sorted column) are cleared
+in one bitmap over all rows. All predicates are ANDed into that bitmap, so the
+location list itself is neither filtered nor copied per predicate.
+
+The rows in the bitmap are ranked by a sort column without sorting the
+location list: the first pages of a numeric order are selected with
+argpartition, further pages use the permutation of the sort column (sorted
+once per location list). Ties are ordered by row position, i.e. every page
+of a ranking is a slice of the same order. Only the rows of the requested
+page are converted to dicts (see RankedLocations).
+
+Indexes are kept per location list key in a small LRU cache of the process
+(the cached location list is decoded per request, the row order is stable)
+and only reused for the same version of the location list, i.e. an index is
+rebuilt once the list is recomputed.
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+
+_lock = threading.Lock()
+_filter_indexes = OrderedDict()
+
+# Rank with argpartition if the requested rows are at most this share of the
+# filtered rows (and the permutation of the sort column is not built yet)
+PARTIAL_RANKING_SHARE = 0.125
+
+
+class FilterIndex:
+    """
+    Presorted numeric columns of a location list for range and presence
+    filters, and sort columns for rankings.
+
+    Missing values (NaN) never satisfy a range predicate (as comparisons
+    with NaN in pandas) and are ranked last.
+    """
+
+    def __init__(self, locations: pd.DataFrame, columns: list[str], sort_columns: list[str] = None, version=None):
+        """
+        Args:
+        -----
+        locations: pandas.DataFrame
+            Location list (rows are referenced by position).
+
+        columns: list[str]
+            Numeric columns to index (columns not in locations are skipped).
+
+        sort_columns: list[str]
+            Columns to rank by (numeric or strings).
+
+        version: any
+            Version of the location list.
+        """
+        self.n_rows = len(locations)
+        self.version = version
+        self.sort_values = {column: locations[column].reset_index(drop=True) for column in sort_columns or []}
+        self.permutations = {}
+        self.order = {}
+        self.sorted_values = {}
+        self.present = {}
+        for column in columns:
+            if column not in locations.columns:
+                continue
+            values = locations[column].to_numpy(dtype=float)
+            present = ~np.isnan(values)
+            order = np.argsort(values, kind='stable')  # NaN last
+            self.order[column] = order
+            self.sorted_values[column] = values[order[:present.sum()]]
+            self.present[column] = present
+
+    def filter_mask(self, ranges: dict = None, any_present: list[str] = None) -> np.ndarray:
+        """
+        Get the bitmap of the rows that satisfy all predicates.
+
+        Args:
+        -----
+        ranges: dict
+            Column -> (min, max), either bound may be None (no bound).
+
+        any_present: list[str]
+            Columns of which at least one has to be present (not NaN), no
+            predicate if empty.
+
+        Returns:
+        --------
+        mask: numpy.ndarray
+            Boolean array over the rows of the location list.
+        """
+        bitmap = np.ones(self.n_rows, dtype=bool)
+
+        for column, (min_value, max_value) in (ranges or {}).items():
+            if min_value is None and max_value is None:
+                continue
+            order = self.order[column]
+            sorted_values = self.sorted_values[column]
+            start = 0 if min_value is None else np.searchsorted(sorted_values, min_value, side='left')
+            end = len(sorted_values) if max_value is None else np.searchsorted(sorted_values, max_value, side='right')
+            # Clear the rows below, above (and without) the range
+            bitmap[order[:start]] = False
+            bitmap[order[max(end, start):]] = False
+
+        if any_present:
+            bitmap &= np.logical_or.reduce([self.present[column] for column in any_present])
+
+        return bitmap
+
+    def filter(self, ranges: dict = None, any_present: list[str] = None) -> np.ndarray:
+        """Get the positions of the rows that satisfy all predicates (see filter_mask), ascending."""
+        return np.flatnonzero(self.filter_mask(ranges, any_present))
+
+    def permutation(self, column: str, ascending: bool) -> np.ndarray:
+        """Get the positions of all rows sorted by a column (stable, missing values last), built on first use."""
+        key = (column, ascending)
+        permutation = self.permutations.get(key)
+        if permutation is None:
+            permutation = self.sort_values[column].sort_values(
+                ascending=ascending, kind='stable', na_position='last'
+            ).index.to_numpy()
+            self.permutations[key] = permutation
+        return permutation
+
+    def rank(self, mask: np.ndarray, column: str, ascending: bool, stop: int = None) -> np.ndarray:
+        """
+        Get the positions of the rows in a bitmap in the order of a column.
+
+        Args:
+        -----
+        mask: numpy.ndarray
+            Bitmap of the rows to rank (see filter_mask).
+
+        column: str
+            Sort column.
+
+        ascending: bool
+            Sort order.
+
+        stop: int
+            Number of rows needed (None: all rows).
+
+        Returns:
+        --------
+        rows: numpy.ndarray
+            Positions of the first stop rows (all rows if stop is None) in the
+            location list, in ranking order.
+        """
+        values = self.sort_values[column]
+        n_selected = int(mask.sum())
+        stop = n_selected if stop is None else min(stop, n_selected)
+
+        # First pages of a numeric order: select the first rows with argpartition
+        if (
+            (column, ascending) not in self.permutations
+            and values.dtype.kind in 'iuf'
+            and stop <= PARTIAL_RANKING_SHARE * n_selected
+        ):
+            rows = np.flatnonzero(mask)
+            if stop == 0:
+                return rows[:0]
+            keys = values.to_numpy(dtype=float)[rows]
+            keys = np.where(np.isnan(keys), np.inf, keys if ascending else -keys)
+            threshold = keys[np.argpartition(keys, stop - 1)[stop - 1]]
+            # All rows before the threshold and the first rows (by position) at the threshold
+            first = np.flatnonzero(keys < threshold)
+            first = np.concatenate([first, np.flatnonzero(keys == threshold)[:stop - len(first)]])
+            # Order by key, then by position (as the stable permutation)
+            return rows[first[np.lexsort((first, keys[first]))]]
+
+        permutation = self.permutation(column, ascending)
+        return permutation[mask[permutation]][:stop]
+
+
+class RankedLocations:
+    """
+    Lazy sequence of the ranked rows of a location list (as object_list of a
+    Paginator): rows are only converted to dicts (with their rank) when a
+    slice is requested.
+    """
+
+    def __init__(self, locations: pd.DataFrame, index: FilterIndex, mask: np.ndarray, column: str, ascending: bool):
+        """
+        Args:
+        -----
+        locations: pandas.DataFrame
+            Location list the index was built on.
+
+        index: FilterIndex
+            Index of the location list.
+
+        mask: numpy.ndarray
+            Bitmap of the rows to rank (see FilterIndex.filter_mask).
+
+        column: str
+            Sort column.
+
+        ascending: bool
+            Sort order.
+        """
+        self.locations = locations
+        self.index = index
+        self.mask = mask
+        self.column = column
+        self.ascending = ascending
+        self.n_rows = int(mask.sum())
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        start, stop, _ = key.indices(self.n_rows)
+        if start >= stop:
+            return []
+        rows = self.index.rank(self.mask, self.column, self.ascending, stop=stop)[start:]
+        page = self.locations.iloc[rows]
+        page.insert(0, 'rank', np.arange(start + 1, stop + 1))
+        return page.to_dict('records')
+
+
+def get_filter_index(key: str, locations: pd.DataFrame, columns: list[str], sort_columns: list[str] = None, version=None) -> FilterIndex:
+    """
+    Get the filter index of a location list (built on first use).
+
+    Args:
+    -----
+    key: str
+        Cache key of the location list (see result_cache.get_locations_list_key).
+
+    locations: pandas.DataFrame
+        Location list.
+
+    columns: list[str]
+        Numeric columns to index.
+
+    sort_columns: list[str]
+        Columns to rank by.
+
+    version: any
+        Version of the location list (stored with the cached list), an index
+        of another version is rebuilt.
+    """
+    with _lock:
+        index = _filter_indexes.get(key)
+        if index is not None and index.version == version and index.n_rows == len(locations):
+            _filter_indexes.move_to_end(key)
+            return index
+
+    index = FilterIndex(locations, columns, sort_columns, version=version)
+
+    with _lock:
+        _filter_indexes[key] = index
+        _filter_indexes.move_to_end(key)
+        while len(_filter_indexes) > settings.FILTER_INDEX_CACHE_SIZE:
+            _filter_indexes.popitem(last=False)
+
+    return index
@@ -211,3 +211,25 @@ class SearchLocationForm(TravellersInputForm):
 
         for field in ['start_date', 'end_date', 'start_location', 'start_location_lat', 'start_location_lon']:
             self.fields[field].required = False
+
+
+class SimilarLocationsForm(forms.Form):
+    k = forms.IntegerField(required=False, min_value=1, max_value=100)
+    category_id = forms.IntegerField(required=False)
+    start_date = forms.DateField(required=False)
+    end_date = forms.DateField(required=False)
+    exact = forms.BooleanField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        if cleaned_data.get('k') is None:
+            cleaned_data['k'] = 10
+
+        start_date, end_date = cleaned_data.get('start_date'), cleaned_data.get('end_date')
+        if (start_date is None) != (end_date is None):
+            raise forms.ValidationError('Provide both start_date and end_date (or none).')
+        if start_date is not None and start_date > end_date:
+            raise forms.ValidationError('start_date must not be after end_date.')
+
+        return cleaned_data
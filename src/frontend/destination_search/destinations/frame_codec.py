@@ -0,0 +1,101 @@
+"""
+Compact binary encoding of DataFrames (NumPy .npz with typed columns).
+
+Used for the cached location lists instead of JSON: columns of the same dtype
+are stored together as one 2D array (as pandas does internally) and string
+columns as UTF-8 joined by NUL characters (which PostgreSQL text cannot
+contain), so encoding and decoding only copy buffers.
+"""
+import io
+import numpy as np
+import pandas as pd
+
+
+SEPARATOR = '\x00'
+
+
+def encode_frame(frame: pd.DataFrame) -> bytes:
+    """
+    Encode a DataFrame as .npz (the index is not stored).
+
+    Args:
+    -----
+    frame: pandas.DataFrame
+        DataFrame with numeric, boolean, datetime or string (object) columns.
+        Missing values of string columns (None, NaN or pandas.NA) are stored
+        in a mask and decoded as None.
+
+    Returns:
+    --------
+    data: bytes
+
+    Raises:
+    -------
+    TypeError
+        If an object column holds values other than strings (they would be
+        decoded as strings).
+    """
+    arrays = {}
+    blocks = {}
+    layout = []  # per column: (block, position in block), block -1 for strings
+    texts = []
+    missing = []
+    for _, column in frame.items():
+        values = column.to_numpy()
+        if values.dtype == object:
+            if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+                raise TypeError(f'Column {column.name!r} has values other than strings and missing values.')
+
+            # Strings (missing values masked)
+            is_missing = pd.isna(values)
+            texts.extend(np.where(is_missing, '', values).astype(str).tolist())
+            missing.append(is_missing)
+            layout.append((-1, len(missing) - 1))
+        else:
+            block = blocks.setdefault(values.dtype.str, [])
+            layout.append((list(blocks).index(values.dtype.str), len(block)))
+            block.append(values)
+
+    for k, block in enumerate(blocks.values()):
+        arrays[f'block_{k}'] = np.stack(block) if len(frame) else np.empty((len(block), 0), dtype=block[0].dtype)
+    if missing:
+        arrays['text'] = np.frombuffer(SEPARATOR.join(texts).encode(), dtype=np.uint8)
+        arrays['missing'] = np.stack(missing)
+    arrays['columns'] = np.array([str(column) for column in frame.columns])
+    arrays['layout'] = np.array(layout, dtype=np.int64).reshape(-1, 2)
+    arrays['length'] = np.array(len(frame))
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def decode_frame(data: bytes) -> pd.DataFrame:
+    """
+    Decode a DataFrame encoded with encode_frame.
+
+    Args:
+    -----
+    data: bytes
+
+    Returns:
+    --------
+    frame: pandas.DataFrame
+        DataFrame with a RangeIndex, string columns as object dtype.
+    """
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+
+    length = int(arrays['length'])
+    if 'text' in arrays:
+        texts = arrays['text'].tobytes().decode().split(SEPARATOR) if length else []
+        texts = np.array(texts, dtype=object).reshape(len(arrays['missing']), length)
+        texts[arrays['missing']] = None
+
+    columns = {}
+    for name, (block, position) in zip(arrays['columns'].tolist(), arrays['layout']):
+        if block >= 0:
+            columns[name] = arrays[f'block_{block}'][position]
+        else:
+            columns[name] = texts[position]
+    return pd.DataFrame(columns, index=pd.RangeIndex(length))
@@ -0,0 +1,306 @@
+"""
+Date-independent data of LocationDetailView, loaded in one round of
+concurrent queries and cached.
+
+The location bundle (location, image, categories, weather, travel warning,
+money text, top attractions, destination airport) is cached per location, the
+reachability bundle (texts, reference start airport, routes) per location and
+reference start location. Only the scores depend on the travel dates and are
+computed per request.
+
+The cache keys include the version of the underlying tables (max(updated_at)
+and number of rows), which is checked at most every
+LOCATION_DETAIL_REFRESH_INTERVAL seconds, i.e. the bundles are reloaded after
+a data refresh.
+"""
+import contextvars
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.db.models import Case, Count, Max, Prefetch, Q, Subquery, When
+from django_pandas.io import read_frame
+from .models import *
+
+
+BUNDLE_MODELS = [
+    CoreLocations, CoreLocationsImages, CoreCategories, CoreDimensions, CoreTexts,
+    CoreAirports, RawWeatherClimatology, RawTravelWarnings, RawCurrencyTexts,
+    RawCultureSights, RawReachabilityLand
+]
+MONTHS = {
+    1: 'Jan', 2: 'Feb', 3: 'Mar', 4: 'Apr', 5: 'May',
+    6: 'Jun', 7: 'Jul', 8: 'Aug', 9: 'Sep', 10: 'Oct',
+    11: 'Nov', 12: 'Dec'
+}
+
+_lock = threading.Lock()
+_version = None
+_version_checked_at = 0.
+_executor_lock = threading.Lock()
+_executor = None
+
+
+def get_version() -> str:
+    """
+    Get the version of the tables of the bundles (hash of max(updated_at) and
+    number of rows per table), checked at most every
+    LOCATION_DETAIL_REFRESH_INTERVAL seconds.
+
+    Only one thread of the process checks the version, requests in the
+    meantime get the previous version (and only wait for the first check).
+    """
+    global _version, _version_checked_at
+
+    if (
+        _version is not None
+        and time.monotonic() - _version_checked_at < settings.LOCATION_DETAIL_REFRESH_INTERVAL
+    ):
+        return _version
+
+    if not _lock.acquire(blocking=_version is None):
+        return _version
+    try:
+        if (
+            _version is not None
+            and time.monotonic() - _version_checked_at < settings.LOCATION_DETAIL_REFRESH_INTERVAL
+        ):
+            return _version
+        versions = run_concurrently({
+            model.__name__: (
+                lambda model=model: model.objects.aggregate(updated_at=Max('updated_at'), count=Count('pk'))
+            )
+            for model in BUNDLE_MODELS
+        })
+        _version = hashlib.sha256(
+            json.dumps(versions, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+        _version_checked_at = time.monotonic()
+    finally:
+        _lock.release()
+
+    return _version
+
+
+def run_in_worker(function):
+    """
+    Run a query function in a worker thread. The database connection of the
+    thread is kept open for the next queries, connections that are older
+    than CONN_MAX_AGE or unusable (e.g. after errors) are closed before and
+    after the function (as Django does per request).
+    """
+    close_old_connections()
+    try:
+        return function()
+    finally:
+        close_old_connections()
+
+
+def run_concurrently(functions: dict) -> dict:
+    """
+    Run independent query functions concurrently.
+
+    Args:
+    -----
+    functions: dict
+        Names and functions without arguments.
+
+    Returns:
+    --------
+    results: dict
+        Names and return values of the functions.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.LOCATION_DETAIL_MAX_WORKERS,
+                thread_name_prefix='location_bundle'
+            )
+    # Each function runs in a copy of the context of the request (e.g. its
+    # profile, see profiling.py), one copy per function as a context can only
+    # be entered by one thread at a time
+    futures = {
+        name: _executor.submit(contextvars.copy_context().run, run_in_worker, function)
+        for name, function in functions.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+
+def get_airport(query) -> dict:
+    """Get airport data (None if there is no airport)."""
+    airport = (
+        query
+        .values('iata_code', 'airport_name', 'city', 'lat', 'lon')
+        .first()
+    )
+    if airport is None:
+        return None
+    for col in ['lat', 'lon']:
+        airport[col] = float(airport[col])
+    return airport
+
+
+def get_weather_data(location_id: int):
+    """Get monthly averages of the historical weather (from the climatology) and the years covered."""
+    weather_cols = ['temperature_max', 'temperature_min', 'precipitation_sum']
+    climatology = list(
+        RawWeatherClimatology.objects
+        .filter(location_id=location_id)
+        .order_by('month')
+        .values(
+            'month', 'year_min', 'year_max',
+            *[f'{col}_{agg}' for col in weather_cols for agg in ['sum', 'count']]
+        )
+    )
+    weather_data = [
+        {
+            'month': MONTHS[row['month']],
+            **{
+                col: float(row[f'{col}_sum']) / row[f'{col}_count'] if row[f'{col}_count'] > 0 else float('nan')
+                for col in weather_cols
+            }
+        }
+        for row in climatology
+    ]
+    weather_data_years = {
+        col: climatology[0][col] if len(climatology) > 0 else None
+        for col in ['year_min', 'year_max']
+    }
+    return weather_data, weather_data_years
+
+
+def load_location_bundle(location_id: int) -> dict:
+    """Load the location bundle from the database (see get_location_bundle)."""
+    location = CoreLocations.objects.filter(location_id=location_id)
+    bundle = run_concurrently({
+        'location': lambda: location.first(),
+        'image': lambda: (
+            CoreLocationsImages.objects
+            .filter(location_id=location_id)
+            .values_list('img_url', flat=True)
+            .first()
+        ),
+        'categories_with_dimensions': lambda: list(
+            CoreCategories.objects.order_by('display_order').prefetch_related(
+                Prefetch('coredimensions_set', queryset=CoreDimensions.objects.order_by('dimension_id'))
+            )
+        ),
+        'weather': lambda: get_weather_data(location_id),
+        'travel_warning': lambda: (
+            RawTravelWarnings
+            .objects
+            .filter(country_code=Subquery(location.values('country_code')[:1]))
+            .values('warning_text', 'link')
+            .first()
+        ),
+        'money_text': lambda: (
+            RawCurrencyTexts
+            .objects
+            .filter(location_id=location_id)
+            .values_list('text', flat=True)
+            .first()
+        ),
+        'top_attractions': lambda: list(
+            RawCultureSights
+            .objects
+            .filter(location_id=location_id)
+            .order_by('sight_rank')
+            .values_list('sight', flat=True)
+        ),
+        'destination_airport': lambda: get_airport(
+            CoreAirports.objects.filter(iata_code=Subquery(location.values('airport_1')[:1]))
+        ),
+    })
+    bundle['weather_data'], bundle['weather_data_years'] = bundle.pop('weather')
+    return bundle
+
+
+def load_reachability_bundle(location_id: int, reference_start_location: dict) -> dict:
+    """Load the reachability bundle from the database (see get_reachability_bundle)."""
+    ref_start_location_id = reference_start_location['location_id']
+    bundle = run_concurrently({
+        'texts': lambda: read_frame(
+            CoreTexts.objects.filter(
+                Q(location_id=location_id)
+                & Q(ref_start_location_id__in=[-1, ref_start_location_id])
+            ).values('category_id', 'text_general', 'text_anomaly')
+        ),
+        'reference_start_airport': lambda: get_airport(
+            CoreAirports.objects.filter(
+                iata_code=reference_start_location['mapped_start_airport'].strip() #FIXME no FK + strip needed
+            )
+        ),
+        'routes': lambda: (
+            RawReachabilityLand.objects
+            .filter(
+                Q(location_id=location_id)
+                & Q(ref_start_location_id=ref_start_location_id)
+            )
+            .values(
+                'car_route_levels', 'pt_route_levels',
+                # GeoJSON only for rows without route levels
+                car_geojson_without_levels=Case(When(car_route_levels__isnull=True, then='car_geojson')),
+                pt_geojson_without_levels=Case(When(pt_route_levels__isnull=True, then='pt_geojson'))
+            )
+            .first()
+        ),
+    })
+    routes = bundle.pop('routes') or {}
+
+    # The route levels are stored as JSON and passed through to the map as is
+    bundle['route_levels'] = '{%s}' % ','.join(
+        f'"{mode}":{routes.get(f"{mode}_route_levels") or "null"}' for mode in ['car', 'pt']
+    )
+    bundle['routes'] = {
+        f'{mode}_geojson': json.loads(routes[f'{mode}_geojson_without_levels']) for mode in ['car', 'pt']
+        if routes.get(f'{mode}_geojson_without_levels') is not None
+    }
+    return bundle
+
+
+def get_location_bundle(location_id: int) -> dict:
+    """
+    Get the date-independent data of a location.
+
+    Returns:
+    --------
+    bundle: dict
+        location (CoreLocations, None if the location does not exist), image,
+        categories_with_dimensions, weather_data, weather_data_years,
+        travel_warning, money_text, top_attractions and destination_airport.
+    """
+    cache = caches['location_detail']
+    key = f'location:{get_version()}:{location_id}'
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = load_location_bundle(location_id)
+        if bundle['location'] is not None:
+            cache.set(key, bundle)
+    return bundle
+
+
+def get_reachability_bundle(location_id: int, reference_start_location: dict) -> dict:
+    """
+    Get the data of a location that depends on the reference start location.
+
+    Returns:
+    --------
+    bundle: dict
+        texts (DataFrame), reference_start_airport, route_levels (JSON of
+        the car and public transport route levels, null if missing) and
+        routes (parsed car_geojson and pt_geojson of routes without route
+        levels).
+    """
+    cache = caches['location_detail']
+    key = f'reachability:{get_version()}:{location_id}:{reference_start_location["location_id"]}'
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = load_reachability_bundle(location_id, reference_start_location)
+        cache.set(key, bundle)
+    return bundle
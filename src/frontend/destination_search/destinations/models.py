@@ -125,6 +125,20 @@ class CoreScores(models.Model):
         unique_together = (('location_id', 'category_id', 'dimension_id', 'start_date', 'end_date'),)
 
 
+class CoreSliderHistograms(models.Model):
+    ref_start_location_id = models.IntegerField(primary_key=True)
+    month = models.DateField()
+    histogram = models.CharField(max_length=255)
+    bin_edges = models.JSONField()
+    heights = models.JSONField()
+    updated_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'core_slider_histograms'
+        unique_together = (('ref_start_location_id', 'month', 'histogram'),)
+
+
 class CoreTexts(models.Model):
     location_id = models.OneToOneField(CoreLocations, models.DO_NOTHING, primary_key=True, db_column='location_id')
     category_id = models.ForeignKey(CoreCategories, models.DO_NOTHING, db_column='category_id')
@@ -164,6 +178,38 @@ class RawWeatherHistorical(models.Model):
         db_table = 'raw_weather_historical'
         unique_together = (('location_id', 'year', 'month'),)
 
+
+class RawWeatherClimatology(models.Model):
+    location_id = models.OneToOneField(CoreLocations, models.DO_NOTHING, primary_key=True, db_column='location_id')
+    month = models.IntegerField()
+    year_count = models.IntegerField()
+    year_min = models.IntegerField(blank=True, null=True)
+    year_max = models.IntegerField(blank=True, null=True)
+    temperature_max_sum = models.DecimalField(max_digits=65535, decimal_places=65535)
+    temperature_max_count = models.IntegerField()
+    temperature_min_sum = models.DecimalField(max_digits=65535, decimal_places=65535)
+    temperature_min_count = models.IntegerField()
+    sunshine_duration_sum = models.DecimalField(max_digits=65535, decimal_places=65535)
+    sunshine_duration_count = models.IntegerField()
+    daylight_duration_sum = models.DecimalField(max_digits=65535, decimal_places=65535)
+    daylight_duration_count = models.IntegerField()
+    precipitation_duration_sum = models.DecimalField(max_digits=65535, decimal_places=65535)
+    precipitation_duration_count = models.IntegerField()
+    precipitation_sum_sum = models.DecimalField(max_digits=65535, decimal_places=65535)
+    precipitation_sum_count = models.IntegerField()
+    rain_sum_sum = models.DecimalField(max_digits=65535, decimal_places=65535)
+    rain_sum_count = models.IntegerField()
+    snowfall_sum_sum = models.DecimalField(max_digits=65535, decimal_places=65535)
+    snowfall_sum_count = models.IntegerField()
+    wind_speed_max_sum = models.DecimalField(max_digits=65535, decimal_places=65535)
+    wind_speed_max_count = models.IntegerField()
+    updated_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'raw_weather_climatology'
+        unique_together = (('location_id', 'month'),)
+
 class RawTravelWarnings(models.Model):
     country_code = models.CharField(primary_key=True, max_length=2)
     country_name = models.CharField(max_length=64, blank=True, null=True)
@@ -213,6 +259,8 @@ class RawReachabilityLand(models.Model):
     pt_polyline = models.TextField(blank=True, null=True)
     pt_geojson = models.TextField(blank=True, null=True)
     pt_total_transfers = models.IntegerField(blank=True, null=True)
+    car_route_levels = models.TextField(blank=True, null=True)
+    pt_route_levels = models.TextField(blank=True, null=True)
     updated_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
@@ -0,0 +1,228 @@
+"""
+Lightweight per-stage instrumentation of the views.
+
+Stages of a request are wrapped in named spans:
+
+    with span('get_scores'):
+        ...
+
+For every span the wall time, the number and duration of SQL queries and
+(optionally) the peak of allocated memory are recorded. ProfilingMiddleware
+sends them as Server-Timing header (shown in the network tab of the browser's
+developer tools) and writes one log line per span (logger destinations.profiling).
+
+Profiling is toggled by the PROFILING_ENABLED setting. If disabled, the
+middleware is not used and span() returns a shared no-op context manager, so
+the spans cost a context variable lookup only.
+
+The middleware supports sync (WSGI) and async (ASGI) requests. Queries are
+counted by an execute wrapper installed on every database connection of the
+process, which records them in the profile of the current context (also in
+the threads sync views and sync_to_async functions of async requests run in,
+and in the worker threads of location_bundle.run_concurrently).
+"""
+import asyncio
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+import tracemalloc
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+_profile = contextvars.ContextVar('profile', default=None)
+_no_span = contextlib.nullcontext()
+
+
+class Span:
+    """Timings of one named stage of a request."""
+
+    def __init__(self, profile, name: str):
+        self.profile = profile
+        self.name = name
+        self.depth = 0
+        self.duration = 0.
+        self.sql_count = 0
+        self.sql_time = 0.
+        self.memory_start = 0
+        self.memory_peak = 0
+
+    def __enter__(self):
+        stack = self.profile.stack
+        self.depth = len(stack)
+        self.profile.spans.append(self)
+        if self.profile.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Keep the peak of the enclosing span before resetting it
+                stack[-1].memory_peak = max(stack[-1].memory_peak, peak)
+            tracemalloc.reset_peak()
+            self.memory_start = self.memory_peak = current
+        stack.append(self)
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.perf_counter() - self.started_at
+        stack = self.profile.stack
+        stack.pop()
+        if self.profile.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            self.memory_peak = max(self.memory_peak, peak)
+            if stack:
+                stack[-1].memory_peak = max(stack[-1].memory_peak, self.memory_peak)
+            tracemalloc.reset_peak()
+        return False
+
+    @property
+    def memory_peak_allocated(self) -> int:
+        """Peak of memory allocated during the span (bytes)."""
+        return self.memory_peak - self.memory_start
+
+
+class Profile:
+    """Spans of one request."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.stack = []
+        # Queries of worker threads are recorded concurrently
+        self._lock = threading.Lock()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Count queries and their duration in all open spans (see connection.execute_wrapper)."""
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started_at
+            with self._lock:
+                for open_span in self.stack:
+                    open_span.sql_count += 1
+                    open_span.sql_time += duration
+
+    def server_timing(self) -> str:
+        """Spans in the format of the Server-Timing header."""
+        metrics = []
+        for s in self.spans:
+            description = f'{s.sql_count} queries {s.sql_time*1000:.1f} ms'
+            if self.trace_memory:
+                description += f', peak {s.memory_peak_allocated/2**20:.1f} MB'
+            metrics.append(f'{s.name};dur={s.duration*1000:.1f};desc="{description}"')
+        return ', '.join(metrics)
+
+    def log(self, request) -> None:
+        """Write one log line per span."""
+        for s in self.spans:
+            fields = {
+                'method': request.method,
+                'path': request.path,
+                'span': s.name,
+                'depth': s.depth,
+                'duration_ms': round(s.duration*1000, 2),
+                'sql_count': s.sql_count,
+                'sql_ms': round(s.sql_time*1000, 2),
+            }
+            if self.trace_memory:
+                fields['peak_kb'] = round(s.memory_peak_allocated/1024, 1)
+            logger.info(
+                ' '.join(f'{key}={value}' for key, value in fields.items()),
+                extra={'profiling': fields}
+            )
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """Record a query in the profile of the current request (see Profile.execute_wrapper)."""
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile.execute_wrapper(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(sender=None, connection=None, **kwargs):
+    """Install execute_wrapper on a database connection (on connection_created)."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def span(name: str):
+    """
+    Record a named stage of the current request.
+
+    Args:
+    -----
+    name: str
+        Name of the stage (token, i.e. without spaces, commas or semicolons).
+
+    Returns:
+    --------
+    context manager
+        Span of the current profile (no-op if the request is not profiled).
+    """
+    profile = _profile.get()
+    if profile is None:
+        return _no_span
+    return Span(profile, name)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests (see module docstring).
+
+    The peak memory traced with PROFILING_TRACE_MEMORY is process-wide, i.e.
+    it includes allocations of concurrent requests in other threads.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.trace_memory = settings.PROFILING_TRACE_MEMORY
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        # Count the queries of all connections (opened so far and later)
+        connection_created.connect(install_execute_wrapper, dispatch_uid=__name__)
+        for connection in connections.all():
+            install_execute_wrapper(connection=connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        profile = Profile(trace_memory=self.trace_memory)
+        token = _profile.set(profile)
+        try:
+            with Span(profile, 'total'):
+                response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = Profile(trace_memory=self.trace_memory)
+        token = _profile.set(profile)
+        try:
+            with Span(profile, 'total'):
+                response = await self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.finish(request, response, profile)
+
+    def finish(self, request, response, profile: Profile):
+        """Add the Server-Timing header and log the spans."""
+        response['Server-Timing'] = profile.server_timing()
+        profile.log(request)
+        return response
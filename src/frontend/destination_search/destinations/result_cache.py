@@ -0,0 +1,131 @@
+"""
+Shared cache of computed location lists.
+
+The location list (and the data shown next to it, e.g. slider histograms) only
+depends on the travellers input, the preferences and the version of the
+underlying data (see data_cache.get_data_version), so it is shared between
+all users with the same input. The session only holds the cache key. Lists
+of previous data versions are not found anymore once the scores or locations
+are refreshed (and expire from the caches).
+
+The part of a location list that does not depend on the preferences (with
+the category distances of the relevance) is cached under a key of the
+travellers input only, so that a change of the preferences only reweights
+the category distances (see LocationsListView.get).
+
+Entries are looked up in a local-memory cache of the process first (LRU) and
+in a file-based cache shared by all processes second. The location list and
+the category distances are stored in the compact binary encoding of
+frame_codec.
+"""
+import hashlib
+import json
+import pandas as pd
+from django.core.cache import caches
+from .frame_codec import encode_frame, decode_frame
+
+
+KEY_PREFIX = 'locations_list_npz'
+BASE_KEY_PREFIX = 'locations_list_base_npz'
+
+
+def canonical(value):
+    """Canonical form of form data (sorted keys, lists in sorted order)."""
+    if isinstance(value, dict):
+        return {str(key): canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return sorted((canonical(item) for item in value), key=lambda x: json.dumps(x, sort_keys=True, default=str))
+    return value
+
+
+def get_locations_list_key(travellers_input: dict, preferences: dict, data_version: dict = None) -> str:
+    """
+    Get the cache key of a location list.
+
+    Args:
+    -----
+    travellers_input: dict
+        Cleaned data of the TravellersInputForm.
+
+    preferences: dict
+        Cleaned data of the PreferencesForm.
+
+    data_version: dict
+        Versions of the underlying data (see data_cache.get_data_version).
+
+    Returns:
+    --------
+    key: str
+        Hash of the canonical JSON representation of the inputs and the data
+        version.
+    """
+    payload = json.dumps(
+        canonical({
+            'travellers_input': travellers_input,
+            'preferences': preferences or {},
+            'data_version': data_version or {}
+        }),
+        sort_keys=True, default=str
+    )
+    return f'{KEY_PREFIX}:{hashlib.sha256(payload.encode()).hexdigest()}'
+
+
+def get_locations_list_base_key(travellers_input: dict, data_version: dict = None) -> str:
+    """
+    Get the cache key of the preference independent part of a location list
+    (stored with get/set_locations_list as well).
+
+    Args:
+    -----
+    travellers_input: dict
+        Cleaned data of the TravellersInputForm.
+
+    data_version: dict
+        Versions of the underlying data (see data_cache.get_data_version).
+
+    Returns:
+    --------
+    key: str
+        Hash of the canonical JSON representation of the travellers input and
+        the data version.
+    """
+    payload = json.dumps(
+        canonical({'travellers_input': travellers_input, 'data_version': data_version or {}}),
+        sort_keys=True, default=str
+    )
+    return f'{BASE_KEY_PREFIX}:{hashlib.sha256(payload.encode()).hexdigest()}'
+
+
+def encode_category_distances(distances: pd.DataFrame) -> bytes:
+    """Encode category distances (location_id x category_id, see compute_category_distances) with encode_frame."""
+    return encode_frame(distances.reset_index())
+
+
+def decode_category_distances(data: bytes) -> pd.DataFrame:
+    """Decode category distances encoded with encode_category_distances."""
+    distances = decode_frame(data).set_index('location_id')
+    distances.columns = pd.Index(distances.columns.astype(int), name='category_id')
+    return distances
+
+
+def get_locations_list(key: str):
+    """Get a cached location list (None if not cached)."""
+    result = caches['locations_list'].get(key)
+    if result is None:
+        result = caches['locations_list_shared'].get(key)
+        if result is None:
+            return None
+        caches['locations_list'].set(key, result)
+    result = {**result, 'locations_list': decode_frame(result['locations_list'])}
+    if 'category_distances' in result:
+        result['category_distances'] = decode_category_distances(result['category_distances'])
+    return result
+
+
+def set_locations_list(key: str, result) -> None:
+    """Cache a location list."""
+    result = {**result, 'locations_list': encode_frame(result['locations_list'])}
+    if 'category_distances' in result:
+        result['category_distances'] = encode_category_distances(result['category_distances'])
+    caches['locations_list'].set(key, result)
+    caches['locations_list_shared'].set(key, result)
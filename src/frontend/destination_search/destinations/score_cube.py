@@ -0,0 +1,228 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+
+CELL_COLUMNS = ['category_id', 'dimension_id', 'start_date', 'end_date', 'ref_start_location_id']
+ONE_DAY = np.timedelta64(1, 'D')
+
+
+class ScoreCube:
+    """
+    In-memory cube of core_scores indexed by
+    (location, dimension, time bucket, ref_start_location).
+
+    Most dimensions only exist for a few time buckets and reference start
+    locations, so the last three axes are stored flattened to the occupied
+    cells: every column of the (location x cell) matrices holds exactly one
+    (category, dimension, start_date, end_date, ref_start_location) combination.
+    Cells are sorted by category and dimension, which lets a date window be
+    answered with a column selection and one weighted reduction per dimension.
+
+    Missing scores are stored as 0 with `present` set to False, NULL raw
+    values of existing rows are stored as NaN (and propagate, as in SQL).
+    """
+
+    def __init__(
+            self,
+            location_ids: np.ndarray,
+            cells: pd.DataFrame,
+            score: np.ndarray,
+            raw_value: np.ndarray,
+            present: np.ndarray,
+            version=None
+        ):
+        self.location_ids = location_ids
+        self.cells = cells
+        self.score = score
+        self.raw_value = raw_value
+        self.present = present
+        self.version = version
+
+        # Cell attributes as plain arrays (used on every request)
+        self.cell_category_id = cells['category_id'].to_numpy(dtype=np.int64)
+        self.cell_dimension_id = cells['dimension_id'].to_numpy(dtype=np.int64)
+        self.cell_start_date = cells['start_date'].to_numpy(dtype='datetime64[ns]')
+        self.cell_end_date = cells['end_date'].to_numpy(dtype='datetime64[ns]')
+        self.cell_ref_start_location_id = cells['ref_start_location_id'].to_numpy(dtype=np.int64)
+
+        # Lookup of location_id -> row
+        self.location_index = pd.Index(location_ids)
+
+    @classmethod
+    def from_frame(cls, scores: pd.DataFrame, version=None) -> 'ScoreCube':
+        """
+        Build the cube from core_scores in long format.
+
+        Args:
+        -----
+        scores: pandas.DataFrame
+            DataFrame with the columns location_id, category_id, dimension_id,
+            start_date, end_date, ref_start_location_id, score and raw_value.
+
+        version: any
+            Version of the underlying data (e.g. max(core_scores.updated_at)).
+
+        Returns:
+        --------
+        cube: ScoreCube
+        """
+        scores = scores.astype({
+            'location_id': np.int64,
+            'category_id': np.int64,
+            'dimension_id': np.int64,
+            'ref_start_location_id': np.int64,
+            'score': float,
+            'raw_value': float
+        })
+        scores['start_date'] = pd.to_datetime(scores['start_date'])
+        scores['end_date'] = pd.to_datetime(scores['end_date'])
+
+        # Row (location) and column (cell) positions of each score
+        location_ids, location_pos = np.unique(
+            scores['location_id'].to_numpy(), return_inverse=True
+        )
+        cells = (
+            scores[CELL_COLUMNS]
+            .drop_duplicates()
+            .sort_values(CELL_COLUMNS)
+            .reset_index(drop=True)
+        )
+        cell_pos = (
+            pd.MultiIndex.from_frame(cells)
+            .get_indexer(pd.MultiIndex.from_frame(scores[CELL_COLUMNS]))
+        )
+
+        # Fill dense matrices
+        shape = (len(location_ids), len(cells))
+        score = np.zeros(shape)
+        raw_value = np.zeros(shape)
+        present = np.zeros(shape, dtype=bool)
+        score[location_pos, cell_pos] = scores['score'].to_numpy()
+        raw_value[location_pos, cell_pos] = scores['raw_value'].to_numpy()
+        present[location_pos, cell_pos] = True
+
+        return cls(location_ids, cells, score, raw_value, present, version=version)
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> 'ScoreCube':
+        """
+        Load the cube from a published score snapshot (written by the scoring
+        pipeline, see src/backend/database/internal/score_snapshot.py).
+
+        The matrices are memory-mapped read-only, i.e. they are shared by all
+        processes on the host (page cache) instead of copied per process.
+
+        Args:
+        -----
+        path: str
+            Directory of a snapshot version (with manifest.json and one .npy
+            file per array).
+
+        Returns:
+        --------
+        cube: ScoreCube
+        """
+        with open(os.path.join(path, 'manifest.json')) as file:
+            manifest = json.load(file)
+        arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+            for name in manifest['arrays']
+        }
+        cells = pd.DataFrame({
+            'category_id': arrays['cell_category_id'],
+            'dimension_id': arrays['cell_dimension_id'],
+            'start_date': arrays['cell_start_date'],
+            'end_date': arrays['cell_end_date'],
+            'ref_start_location_id': arrays['cell_ref_start_location_id']
+        })
+        return cls(
+            np.asarray(arrays['location_ids']), cells, arrays['score'], arrays['raw_value'], arrays['present'],
+            version=manifest['version']
+        )
+
+    def aggregate(
+            self,
+            start_date: pd.Timestamp,
+            end_date: pd.Timestamp,
+            ref_start_location_id: int,
+            location_id: int|list[int] = None
+        ) -> pd.DataFrame:
+        """
+        Average scores over the travel interval, weighted by the number of days
+        each score interval overlaps with it (same result as the SQL + groupby
+        path in views.get_scores).
+
+        Args:
+        -----
+        start_date, end_date: pandas.Timestamp
+            Travel interval.
+
+        ref_start_location_id: int
+            Reference start location (scores with -1 are always included).
+
+        location_id: int or list[int]
+            Restrict to these locations (all locations if None).
+
+        Returns:
+        --------
+        scores: pandas.DataFrame
+            DataFrame with location_id, category_id, dimension_id, score and
+            raw_value.
+        """
+        start_date = pd.Timestamp(start_date)
+        end_date = pd.Timestamp(end_date)
+
+        # Select cells overlapping with the travel interval (compared by date
+        # as in the database query) and valid for the reference start location
+        selected = np.flatnonzero(
+            (self.cell_start_date <= end_date.normalize().to_datetime64())
+            & (self.cell_end_date >= start_date.normalize().to_datetime64())
+            & np.isin(self.cell_ref_start_location_id, [-1, ref_start_location_id])
+        )
+
+        # Select locations
+        if location_id is None:
+            rows = np.arange(len(self.location_ids))
+        else:
+            location_ids = [location_id] if isinstance(location_id, (int, np.integer)) else location_id
+            rows = self.location_index.get_indexer(location_ids)
+            rows = np.unique(rows[rows >= 0])
+
+        if len(selected) == 0 or len(rows) == 0:
+            return pd.DataFrame(columns=['location_id', 'category_id', 'dimension_id', 'score', 'raw_value'])
+
+        # Number of days each cell overlaps with the travel interval
+        overlap_days = (
+            np.minimum(self.cell_end_date[selected], end_date.to_datetime64())
+            - np.maximum(self.cell_start_date[selected], start_date.to_datetime64())
+            + ONE_DAY
+        ) // ONE_DAY
+
+        # Weighted sums per dimension (cells are sorted by dimension)
+        dimension_ids = self.cell_dimension_id[selected]
+        group_starts = np.flatnonzero(np.r_[True, dimension_ids[1:] != dimension_ids[:-1]])
+        present = self.present[np.ix_(rows, selected)]
+
+        def weighted_sum(values: np.ndarray) -> np.ndarray:
+            return np.add.reduceat(
+                values[np.ix_(rows, selected)] * overlap_days, group_starts, axis=1
+            )
+
+        score = weighted_sum(self.score)
+        raw_value = weighted_sum(self.raw_value)
+        overlap_days = np.add.reduceat(present * overlap_days, group_starts, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            score = score / overlap_days
+            raw_value = raw_value / overlap_days
+
+        # Back to long format (only existing location/dimension combinations)
+        row_pos, group_pos = np.nonzero(np.add.reduceat(present, group_starts, axis=1))
+        return pd.DataFrame({
+            'location_id': self.location_ids[rows][row_pos],
+            'category_id': self.cell_category_id[selected][group_starts][group_pos],
+            'dimension_id': dimension_ids[group_starts][group_pos],
+            'score': score[row_pos, group_pos],
+            'raw_value': raw_value[row_pos, group_pos]
+        })
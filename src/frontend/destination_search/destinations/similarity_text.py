@@ -0,0 +1,236 @@
+"""
+Similarity texts (comparison of a target destination with previous
+destinations, see openai_proxy), streamed to the client as server-sent events.
+
+Completed texts are cached (cache 'similarity_text') under a hash of the
+canonical prompt input, so repeated requests neither rebuild the prompt nor
+call the completion API. Concurrent requests for the same prompt input share
+one upstream call: the first request starts the completion in a task of the
+event loop, all requests replay and follow its chunks. Under ASGI all requests
+of a process share the event loop of the server (stream_similarity_text),
+under WSGI they share an event loop of the process running in a background
+thread (iterate_similarity_text).
+
+The completion API is called with openai.AsyncOpenAI, i.e. it can be pointed
+to another (e.g. a local fake) server with the environment variable
+OPENAI_BASE_URL.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import queue
+import threading
+import weakref
+from django.core.cache import caches
+from openai import AsyncOpenAI
+
+
+COMPLETION_PARAMS = {
+    'model': 'gpt-3.5-turbo',
+    'temperature': 0.8,
+    'frequency_penalty': 0.4,
+    'max_tokens': 400
+}
+
+logger = logging.getLogger(__name__)
+
+# Running completions per event loop and key
+_in_flight = weakref.WeakKeyDictionary()
+
+# Event loop of the process for WSGI workers (see get_event_loop)
+_loop_lock = threading.Lock()
+_loop = None
+
+
+def get_prompt_key(prompt_input: dict) -> str:
+    """
+    Get the cache key of a prompt input.
+
+    Args:
+    -----
+    prompt_input: dict
+        JSON serializable values that determine the prompt (in canonical form,
+        e.g. sorted lists).
+
+    Returns:
+    --------
+    key: str
+        Hash of the prompt input and the completion parameters.
+    """
+    content = json.dumps(
+        {'prompt_input': prompt_input, 'completion_params': COMPLETION_PARAMS},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return 'similarity_text:' + hashlib.sha256(content.encode()).hexdigest()
+
+
+def format_event(data: dict) -> bytes:
+    """Format a server-sent event (data as JSON)."""
+    return f'data: {json.dumps(data)}\n\n'.encode()
+
+
+class CompletionStream:
+    """
+    Chunks of a running completion, replayed to and followed by any number of
+    consumers.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.warning = None
+        self.error = None
+        self.done = False
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        """Wake up all waiting consumers."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def push(self, chunk: str):
+        """Add a chunk of the text."""
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Exception = None):
+        """Mark the completion as done (or failed)."""
+        self.error = error
+        self.done = True
+        self._notify()
+
+    async def follow(self):
+        """Iterate over all chunks (so far and future ones) until the completion is done."""
+        i = 0
+        while True:
+            while i < len(self.chunks):
+                yield self.chunks[i]
+                i += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+async def run_completion(key: str, stream: CompletionStream, get_messages):
+    """
+    Build the prompt, stream the completion into the stream and cache the
+    completed text.
+    """
+    try:
+        messages, stream.warning = await get_messages()
+        client = AsyncOpenAI()
+        try:
+            response = await client.chat.completions.create(
+                messages=messages,
+                stream=True,
+                **COMPLETION_PARAMS
+            )
+            async for chunk in response:
+                if len(chunk.choices) > 0 and chunk.choices[0].delta.content:
+                    stream.push(chunk.choices[0].delta.content)
+        finally:
+            await client.close()
+        await caches['similarity_text'].aset(key, {'text': ''.join(stream.chunks), 'warning': stream.warning})
+        stream.finish()
+    except Exception as error:
+        logger.exception('Similarity text failed')
+        stream.finish(error)
+    finally:
+        _in_flight[asyncio.get_running_loop()].pop(key, None)
+
+
+def get_completion_stream(key: str, get_messages) -> CompletionStream:
+    """
+    Get the running completion of a key or start it (in a task of the running
+    event loop).
+    """
+    in_flight = _in_flight.setdefault(asyncio.get_running_loop(), {})
+    stream = in_flight.get(key)
+    if stream is None:
+        stream = CompletionStream()
+        in_flight[key] = stream
+        stream.task = asyncio.create_task(run_completion(key, stream, get_messages))
+    return stream
+
+
+async def stream_similarity_text(key: str, get_messages):
+    """
+    Stream the similarity text of a prompt input as server-sent events.
+
+    Events (data as JSON): {'warning': ...} first, then {'text': ...} per
+    chunk of the text and finally {'done': true}, or {'error': ...} if the
+    completion failed.
+
+    Args:
+    -----
+    key: str
+        Cache key of the prompt input (see get_prompt_key).
+
+    get_messages: coroutine function
+        Returns the messages of the prompt and the warning (only called if the
+        text is neither cached nor being completed).
+    """
+    cached = await caches['similarity_text'].aget(key)
+    if cached is not None:
+        yield format_event({'warning': cached['warning']})
+        yield format_event({'text': cached['text']})
+        yield format_event({'done': True})
+        return
+
+    stream = get_completion_stream(key, get_messages)
+    try:
+        warning_sent = False
+        async for chunk in stream.follow():
+            if not warning_sent:
+                yield format_event({'warning': stream.warning})
+                warning_sent = True
+            yield format_event({'text': chunk})
+        if not warning_sent:
+            yield format_event({'warning': stream.warning})
+        yield format_event({'done': True})
+    except Exception as error:
+        yield format_event({'error': type(error).__name__})
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the event loop of the process for sync callers (runs in a daemon thread, started on first use)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='similarity_text', daemon=True).start()
+    return _loop
+
+
+def iterate_similarity_text(key: str, get_messages):
+    """
+    Same as stream_similarity_text as a sync iterator (for WSGI, where
+    StreamingHttpResponse only streams sync iterators).
+
+    The events are produced on the event loop of the process (see
+    get_event_loop), so requests in all threads of the process share one
+    upstream call per prompt input. If the client disconnects, only the
+    consumer stops, the completion is still cached.
+    """
+    events = queue.Queue()
+
+    async def produce():
+        try:
+            async for event in stream_similarity_text(key, get_messages):
+                events.put(event)
+        finally:
+            events.put(None)
+
+    future = asyncio.run_coroutine_threadsafe(produce(), get_event_loop())
+    try:
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield event
+        future.result()
+    finally:
+        future.cancel()
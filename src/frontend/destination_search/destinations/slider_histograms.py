@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+
+ONE_DAY = np.timedelta64(1, 'D')
+
+
+def create_hist_for_slider(data: pd.Series, bins:  int = 30):
+    hist, bin_edges = np.histogram(data.dropna(), bins=30)  #FIXME drop missings?
+    return {'heights': hist.tolist(), 'binLimits': bin_edges.tolist()}
+
+
+class SliderHistograms:
+    """
+    Precomputed histograms of the raw values shown above the sliders of the
+    list filters (core_slider_histograms, filled after the scores), per
+    histogram, reference start location and month.
+
+    All months of a histogram and reference start location share the same
+    bin edges, so the histogram of a travel interval is the sum of the
+    histograms of its months, weighted by the number of overlapping days.
+    """
+
+    def __init__(self, histograms: pd.DataFrame, version=None):
+        """
+        Args:
+        -----
+        histograms: pandas.DataFrame
+            Rows of core_slider_histograms (ref_start_location_id, month,
+            histogram, bin_edges and heights as lists).
+
+        version: any
+            Version of the underlying data.
+        """
+        self.version = version
+        self.histograms = {}
+        for (histogram, ref_start_location_id), group in histograms.groupby(['histogram', 'ref_start_location_id']):
+            group = group.sort_values('month')
+            months = pd.to_datetime(group['month']).to_numpy(dtype='datetime64[D]')
+            self.histograms[histogram, ref_start_location_id] = {
+                'start_date': months,
+                'end_date': (months.astype('datetime64[M]') + 1).astype('datetime64[D]') - ONE_DAY,
+                'bin_edges': np.asarray(group['bin_edges'].iloc[0], dtype=float),
+                'heights': np.array(group['heights'].tolist(), dtype=float)
+            }
+
+    def merge(
+            self,
+            histogram: str,
+            ref_start_location_id: int,
+            start_date: pd.Timestamp,
+            end_date: pd.Timestamp
+        ) -> dict|None:
+        """
+        Merge the monthly histograms over a travel interval.
+
+        Days before the first (after the last) month are counted for the
+        first (last) month. Empty bins at both ends are dropped.
+
+        Args:
+        -----
+        histogram: str
+            Name of the histogram (travel_cost, accommodation_cost or
+            best_reachability).
+
+        ref_start_location_id: int
+            Reference start location (histograms without reference start
+            location specific values are stored for -1).
+
+        start_date, end_date: pandas.Timestamp
+            Travel interval.
+
+        Returns:
+        --------
+        histogram: dict|None
+            heights (average number of locations per bin over the travel
+            interval) and binLimits, as create_hist_for_slider, or None if
+            there is no histogram.
+        """
+        months = self.histograms.get((histogram, ref_start_location_id))
+        if months is None:
+            months = self.histograms.get((histogram, -1))
+        if months is None:
+            return None
+
+        # Number of days of the travel interval per month
+        start_date = pd.Timestamp(start_date).to_datetime64().astype('datetime64[D]')
+        end_date = pd.Timestamp(end_date).to_datetime64().astype('datetime64[D]')
+        month_start = months['start_date'].copy()
+        month_end = months['end_date'].copy()
+        month_start[0] = min(month_start[0], start_date)
+        month_end[-1] = max(month_end[-1], end_date)
+        overlap_days = np.maximum(
+            (np.minimum(month_end, end_date) - np.maximum(month_start, start_date) + ONE_DAY) // ONE_DAY, 0
+        )
+        if overlap_days.sum() == 0:
+            return None
+
+        heights = overlap_days @ months['heights'] / overlap_days.sum()
+
+        # Drop empty bins at both ends
+        nonempty = np.flatnonzero(heights > 0)
+        if len(nonempty) == 0:
+            return None
+        first, last = nonempty[0], nonempty[-1]
+
+        return {
+            'heights': heights[first:last + 1].round(2).tolist(),
+            'binLimits': months['bin_edges'][first:last + 2].tolist()
+        }
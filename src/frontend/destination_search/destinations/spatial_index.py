@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+from .compute_haversine import haversine, EARTH_RADIUS_KM
+
+
+class SpatialIndex:
+    """
+    Ball tree (haversine metric) over a set of locations for nearest
+    neighbour and radius queries.
+
+    Locations without (valid) coordinates are kept in `locations` but are
+    not part of the tree.
+    """
+
+    def __init__(self, locations: pd.DataFrame, version=None):
+        """
+        Args:
+        -----
+        locations: pandas.DataFrame
+            DataFrame with location_id, lat and lon (text or numeric) and
+            further attributes returned by the queries.
+
+        version: any
+            Version of the underlying data.
+        """
+        self.locations = locations.reset_index(drop=True)
+        self.version = version
+
+        # Coordinates as float (as used by haversine)
+        self.lat = pd.to_numeric(self.locations['lat'], errors='coerce').to_numpy(dtype=float)
+        self.lon = pd.to_numeric(self.locations['lon'], errors='coerce').to_numpy(dtype=float)
+
+        self.valid = np.flatnonzero(~(np.isnan(self.lat) | np.isnan(self.lon)))
+        self.tree = BallTree(
+            np.radians(np.column_stack([self.lat[self.valid], self.lon[self.valid]])),
+            metric='haversine'
+        ) if len(self.valid) > 0 else None
+
+    def distances(self, lat: float, lon: float) -> np.ndarray:
+        """Distances (km) of all locations to a point (NaN without coordinates)."""
+        return haversine(lon1=float(lon), lat1=float(lat), lon2=self.lon, lat2=self.lat)
+
+    def nearest(self, lat: float, lon: float) -> dict:
+        """
+        Get the location closest to a point.
+
+        Returns:
+        --------
+        location: dict
+            Attributes of the location and its distance (km) to the point
+            (None if there are no locations with coordinates).
+        """
+        if self.tree is None:
+            return None
+        _, ind = self.tree.query(np.radians([[float(lat), float(lon)]]), k=1)
+        pos = self.valid[ind[0, 0]]
+        location = self.locations.loc[pos].to_dict()
+        location['distance'] = float(haversine(
+            lon1=float(lon), lat1=float(lat), lon2=self.lon[pos], lat2=self.lat[pos]
+        ))
+        return location
+
+    def within(self, lat: float, lon: float, radius_km: float) -> pd.DataFrame:
+        """
+        Get all locations within a radius around a point.
+
+        Returns:
+        --------
+        locations: pandas.DataFrame
+            Attributes of the locations and their distance (km) to the point,
+            sorted by distance.
+        """
+        if self.tree is None:
+            return self.locations.iloc[[]].assign(distance=pd.Series(dtype=float))
+        ind = self.tree.query_radius(
+            np.radians([[float(lat), float(lon)]]), r=radius_km / EARTH_RADIUS_KM
+        )[0]
+        pos = self.valid[ind]
+        return (
+            self.locations.iloc[pos]
+            .assign(distance=self.distances(lat, lon)[pos])
+            .sort_values('distance')
+        )
@@ -10,4 +10,6 @@ urlpatterns = [
     path('compare/', CompareView.as_view(), name='compare'),
     path('about/', AboutView.as_view(), name='about'),
     path('api/openai', openai_proxy),
+    path('api/locations/select2', locations_for_select2, name='locations_for_select2'),
+    path('api/locations/<int:location_id>/similar', similar_locations, name='similar_locations'),
 ]
\ No newline at end of file
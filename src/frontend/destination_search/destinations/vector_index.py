@@ -0,0 +1,238 @@
+"""
+Vector index over the score vectors of all locations for the similar
+destinations endpoint (see views.similar_locations).
+
+The vectors are the scores of the dimensions averaged over a date window,
+missing scores imputed with the mean of the dimension (as in
+compute_relevance), of one category or of all categories (concatenated).
+Locations are similar if the Euclidean distance of their vectors is small.
+
+The exact search computes the distances of the query to all vectors in
+blocks (squared norms of the vectors precomputed) and keeps the k smallest
+per block. From VECTOR_INDEX_IVF_MIN_LOCATIONS locations on, an inverted
+file index (IVF) is built as well: the vectors are clustered with k-means
+(about sqrt(n) lists, stored contiguously per list) and a query only
+searches the lists of the VECTOR_INDEX_IVF_PROBES closest centroids.
+
+Indexes are kept per score cube version, date window and category in a
+small LRU cache of the process, i.e. they are rebuilt once the scores are
+refreshed.
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from sklearn.cluster import KMeans
+from .score_cube import ScoreCube
+
+
+_lock = threading.Lock()
+_vector_indexes = OrderedDict()
+
+# Vectors per block of the exact search (bounds the memory of the distances)
+BLOCK_ROWS = 16384
+
+
+def pivot_score_vectors(scores: pd.DataFrame, category_id: int = None) -> pd.DataFrame:
+    """
+    Pivot aggregated scores to one vector per location.
+
+    Args:
+    -----
+    scores: pandas.DataFrame
+        DataFrame with location_id, category_id, dimension_id and score (see
+        ScoreCube.aggregate).
+
+    category_id: int
+        Only the dimensions of this category (all categories if None).
+
+    Returns:
+    --------
+    vectors: pandas.DataFrame
+        Scores (locations x dimensions, sorted), missing scores imputed with
+        the mean of the dimension.
+    """
+    if category_id is not None:
+        scores = scores[scores['category_id'] == category_id]
+    vectors = scores.pivot(index='location_id', columns='dimension_id', values='score').sort_index(axis=1)
+    values = vectors.to_numpy(dtype=float)
+    values = np.where(np.isnan(values), vectors.mean().to_numpy(), values)
+    return pd.DataFrame(values, index=vectors.index, columns=vectors.columns)
+
+
+class VectorIndex:
+    """
+    Exact (blocked) and approximate (IVF) nearest neighbour search over the
+    score vectors of the locations.
+    """
+
+    def __init__(self, vectors: pd.DataFrame, n_lists: int = None, version=None, seed: int = 0):
+        """
+        Args:
+        -----
+        vectors: pandas.DataFrame
+            Score vectors (location_id as index, see pivot_score_vectors).
+
+        n_lists: int
+            Number of lists of the IVF index (exact search only if None or
+            0).
+
+        version: any
+            Version of the underlying data.
+
+        seed: int
+            Seed of the k-means clustering.
+        """
+        self.location_ids = vectors.index.to_numpy()
+        self.location_index = pd.Index(self.location_ids)
+        self.vectors = np.ascontiguousarray(vectors.to_numpy(dtype=float))
+        self.norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        self.version = version
+
+        # Inverted file index (vectors sorted by list, list i is
+        # list_offsets[i]:list_offsets[i + 1])
+        self.n_lists = min(n_lists or 0, len(self.vectors))
+        if self.n_lists > 1:
+            kmeans = KMeans(n_clusters=self.n_lists, n_init=1, random_state=seed).fit(self.vectors)
+            self.centroids = kmeans.cluster_centers_
+            self.list_rows = np.argsort(kmeans.labels_, kind='stable')
+            self.list_offsets = np.searchsorted(kmeans.labels_[self.list_rows], np.arange(self.n_lists + 1))
+            self.list_vectors = self.vectors[self.list_rows]
+            self.list_norms = self.norms[self.list_rows]
+        else:
+            self.n_lists = 0
+
+    def __len__(self) -> int:
+        return len(self.location_ids)
+
+    def exact_search(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the k vectors closest to the query (all vectors).
+
+        Returns:
+        --------
+        rows, distances: numpy.ndarray
+            Rows of the vectors and their distances, sorted by distance.
+        """
+        return self._search(query, k, self.vectors, self.norms, np.arange(len(self.vectors)))
+
+    def approximate_search(self, query: np.ndarray, k: int, n_probes: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the k vectors closest to the query among the lists of the n_probes
+        closest centroids (exact search without IVF index).
+
+        Returns:
+        --------
+        rows, distances: numpy.ndarray
+            Rows of the vectors and their distances, sorted by distance.
+        """
+        if self.n_lists == 0 or n_probes >= self.n_lists:
+            return self.exact_search(query, k)
+
+        centroid_dist = np.einsum('ij,ij->i', self.centroids - query, self.centroids - query)
+        lists = np.argpartition(centroid_dist, n_probes - 1)[:n_probes]
+        slices = [slice(self.list_offsets[i], self.list_offsets[i + 1]) for i in np.sort(lists)]
+        return self._search(
+            query, k,
+            np.concatenate([self.list_vectors[s] for s in slices]),
+            np.concatenate([self.list_norms[s] for s in slices]),
+            np.concatenate([self.list_rows[s] for s in slices])
+        )
+
+    def _search(self, query: np.ndarray, k: int, vectors: np.ndarray, norms: np.ndarray, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Blocked exact search over the given vectors (rows: their rows in the index)."""
+        query = np.asarray(query, dtype=float)
+        k = min(k, len(vectors))
+        if k == 0:
+            return np.empty(0, dtype=int), np.empty(0)
+        query_norm = query @ query
+
+        # k closest per block, then of all blocks
+        candidates, candidate_dist = [], []
+        for start in range(0, len(vectors), BLOCK_ROWS):
+            dist = norms[start:start + BLOCK_ROWS] - 2 * (vectors[start:start + BLOCK_ROWS] @ query) + query_norm
+            block_k = min(k, len(dist))
+            pos = np.argpartition(dist, block_k - 1)[:block_k]
+            candidates.append(rows[start + pos])
+            candidate_dist.append(dist[pos])
+        candidates, candidate_dist = np.concatenate(candidates), np.concatenate(candidate_dist)
+
+        # Sort by distance (ties by row)
+        order = np.lexsort((candidates, candidate_dist))[:k]
+        return candidates[order], np.sqrt(np.maximum(candidate_dist[order], 0))
+
+    def similar(self, location_id: int, k: int = 10, exact: bool = False) -> pd.DataFrame:
+        """
+        Get the k locations most similar to a location (without itself).
+
+        Args:
+        -----
+        location_id: int
+            Location to compare with.
+
+        k: int
+            Number of locations.
+
+        exact: bool
+            Exact search even if there is an IVF index.
+
+        Returns:
+        --------
+        similar: pandas.DataFrame
+            location_id and distance of the k most similar locations, sorted
+            by distance (None if the location has no scores).
+        """
+        row = self.location_index.get_indexer([location_id])[0]
+        if row < 0:
+            return None
+        if exact:
+            rows, distances = self.exact_search(self.vectors[row], k + 1)
+        else:
+            rows, distances = self.approximate_search(self.vectors[row], k + 1, settings.VECTOR_INDEX_IVF_PROBES)
+        keep = rows != row
+        return pd.DataFrame({
+            'location_id': self.location_ids[rows[keep]][:k],
+            'distance': distances[keep][:k]
+        })
+
+
+def get_vector_index(cube: ScoreCube, start_date: pd.Timestamp, end_date: pd.Timestamp, category_id: int = None) -> VectorIndex:
+    """
+    Get the vector index of a date window and category (built on first use).
+
+    Args:
+    -----
+    cube: ScoreCube
+        Score cube of the process (see data_cache.get_score_cube).
+
+    start_date, end_date: pandas.Timestamp
+        Date window the scores are averaged over.
+
+    category_id: int
+        Category (all categories if None).
+    """
+    key = (cube.version, pd.Timestamp(start_date), pd.Timestamp(end_date), category_id)
+    with _lock:
+        index = _vector_indexes.get(key)
+        if index is not None:
+            _vector_indexes.move_to_end(key)
+            return index
+
+    # Scores independent of the reference start location (as the relevance
+    # without travel costs)
+    scores = cube.aggregate(start_date=start_date, end_date=end_date, ref_start_location_id=-1)
+    vectors = pivot_score_vectors(scores, category_id=category_id)
+    n_lists = int(np.sqrt(len(vectors))) if len(vectors) >= settings.VECTOR_INDEX_IVF_MIN_LOCATIONS else None
+    index = VectorIndex(vectors, n_lists=n_lists, version=cube.version)
+
+    with _lock:
+        # Indexes of previous versions of the scores are not used anymore
+        for stale_key in [stale_key for stale_key in _vector_indexes if stale_key[0] != cube.version]:
+            del _vector_indexes[stale_key]
+        _vector_indexes[key] = index
+        _vector_indexes.move_to_end(key)
+        while len(_vector_indexes) > settings.VECTOR_INDEX_CACHE_SIZE:
+            _vector_indexes.popitem(last=False)
+
+    return index
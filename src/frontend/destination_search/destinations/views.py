@@ -1,24 +1,39 @@
+import django
 from django.views import View
 from django.views.generic import TemplateView, FormView
 from django.views.generic.detail import DetailView
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.core.paginator import Paginator
-from django.http import HttpResponseRedirect, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
+from django.conf import settings
 from django.db.models import Q, Prefetch
 from django.forms.models import model_to_dict
 from .models import *
 from .forms import *
-from .compute_relevance import compute_relevance
-from .compute_haversine import haversine
+from .compute_relevance import compute_category_distances, weight_category_distances
+from .compute_weighted_scores import compute_weighted_scores
+from .compare_data import get_compare_data
+from .data_cache import get_data_version, get_score_cube, get_distance_tables, get_ref_start_location_index, get_location_index, get_locations_for_select2, get_slider_histograms, get_population_histogram
+from . import result_cache
+from .location_bundle import get_location_bundle, get_reachability_bundle
+from .filter_index import get_filter_index, RankedLocations
+from .profiling import span
+from .similarity_text import get_prompt_key, iterate_similarity_text, stream_similarity_text
+from .slider_histograms import create_hist_for_slider
+from .vector_index import get_vector_index
 import numpy as np
 import pandas as pd
 from urllib.parse import urlencode
 from django_pandas.io import read_frame
 import json
+import uuid
 from django.views.decorators.csrf import csrf_exempt
-from openai import OpenAI
+from django.views.decorators.http import condition, require_GET
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from asgiref.sync import sync_to_async
 from dotenv import load_dotenv, find_dotenv
 from .create_similarity_text_prompt import create_similarity_text_prompt
 
@@ -26,19 +41,6 @@ from .create_similarity_text_prompt import create_similarity_text_prompt
 load_dotenv(find_dotenv())
 
 
-def get_locations_for_select2():
-    """Get locations for use in Select2."""
-    locations = CoreLocations.objects.values('location_id', 'city', 'country', 'country_code')
-    grouped_locations = []
-    for location in locations:
-        group = next((group for group in grouped_locations if group['text'] == location['country']), None)
-        if group is None:
-            group = {'id': location['country_code'], 'text': location['country'], 'isCountry': True, 'children': []}
-            grouped_locations.append(group)
-        group['children'].append({'id': location['location_id'], 'text': location['city'], 'isCountry': False, 'parent': location['country']})
-    return json.dumps(grouped_locations)
-
-
 def clean_id(s: pd.Series) -> pd.Series:
     """Get the value from an object."""
     return s.fillna(0).astype(int) #FIXME fillna is just a hot fix
@@ -67,53 +69,28 @@ def get_comparison_params(session: dict) -> str:
     return encode_url_parameters(params)
 
 
-def create_hist_for_slider(data: pd.Series, bins:  int = 30):
-    hist, bin_edges = np.histogram(data.dropna(), bins=30)  #FIXME drop missings?
-    return {'heights': hist.tolist(), 'binLimits': bin_edges.tolist()}
-
-
-def get_scores(
-        start_date: str,
-        end_date: str,
-        start_location_lat: float|str,
-        start_location_lon: float|str,
-        location_id: int = None,
-        retrieve_text: bool = False
-    ):
-    
-    # Convert start and end date to datatime  ---------------------------------
+def get_travel_interval(start_date: str, end_date: str):
+    """Convert start and end date to datetime (default: one year from today)."""
     if start_date is not None:
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
     else:
         start_date = pd.to_datetime('today')
         end_date = start_date + pd.Timedelta(days=365)
-    
-    # Get closest reference location for start location -----------------------
-    if start_location_lat is not None and start_location_lon is not None:
-        # Find closest reference location
-        reference_start_locations = read_frame(
-            CoreRefStartLocations
-            .objects
-            .values('location_id', 'city', 'country', 'lat', 'lon', 'mapped_start_airport')
-        )
-        reference_start_locations['distance'] = haversine(
-            lon1=float(start_location_lon),
-            lat1=float(start_location_lat),
-            lon2=reference_start_locations['lon'].astype(float),
-            lat2=reference_start_locations['lat'].astype(float)
-        )
-        reference_start_location = reference_start_locations.loc[
-            reference_start_locations['distance'].idxmin()
-        ].to_dict()
-    else:
-        # Use Frankfurt as reference start locations
-        reference_start_location = (
-            CoreRefStartLocations.objects
-            .filter(location_id=121553680)
-            .values('location_id', 'city', 'country', 'country_code', 'lat', 'lon', 'mapped_start_airport')
-            .first()
-        )
+    return start_date, end_date
+
+
+def query_scores(
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp,
+        ref_start_location_id: int,
+        location_id: int|list[int] = None
+    ) -> pd.DataFrame:
+    """
+    Get scores from the database and average them over the travel interval
+    (weighted by the number of overlapping days).
+    Only used if the score cube is disabled (see SCORE_CUBE_ENABLED).
+    """
 
     # Get filtered scores -----------------------------------------------------
 
@@ -122,7 +99,7 @@ def get_scores(
         Q(start_date__lte=end_date) & Q(end_date__gte=start_date)
     )
     query = query.filter(
-        ref_start_location_id__in=[-1, reference_start_location['location_id']]
+        ref_start_location_id__in=[-1, ref_start_location_id]
     )
 
     if location_id is not None:
@@ -143,44 +120,68 @@ def get_scores(
     scores['end_date'] = pd.to_datetime(scores['end_date'])
 
     # Average scores for multiple time intervals ------------------------------
+    scores = compute_weighted_scores(scores, start_date, end_date)
 
-    # Calculate the number of days each score interval overlaps
-    # with the given travel interval
-    scores['overlap_days'] = scores.apply(
-        lambda row: min(row['end_date'], end_date) - 
-                    max(row['start_date'], start_date) + 
-                    pd.Timedelta(days=1), 
-        axis=1
-    ).dt.days
-
-    # Calculate the sum of the weighted scores
-    value_cols = ['score', 'raw_value']
-    for col in value_cols:
-        scores[col] *= scores['overlap_days']
-    scores = (
-        scores
-        .groupby(['location_id', 'category_id', 'dimension_id'])
-        .agg({
-            'score': lambda x: x.sum(skipna=False),
-            'raw_value': lambda x: x.sum(skipna=False),
-            'overlap_days': lambda x: x.sum(skipna=False)
-        })
-    )
-    for col in value_cols:
-        scores[col] /= scores['overlap_days']
-    scores.drop(columns=['overlap_days'], inplace=True)
-    scores.reset_index(inplace=True)
+    return scores
+
+
+def get_scores(
+        start_date: str,
+        end_date: str,
+        start_location_lat: float|str,
+        start_location_lon: float|str,
+        location_id: int = None,
+        retrieve_text: bool = False
+    ):
+    
+    # Convert start and end date to datatime  ---------------------------------
+    start_date, end_date = get_travel_interval(start_date, end_date)
+    
+    # Get closest reference location for start location -----------------------
+    with span('reference_start_location'):
+        if start_location_lat is not None and start_location_lon is not None:
+            # Find closest reference location
+            reference_start_location = get_ref_start_location_index().nearest(
+                lat=start_location_lat,
+                lon=start_location_lon
+            )
+        else:
+            # Use Frankfurt as reference start locations
+            reference_start_location = (
+                CoreRefStartLocations.objects
+                .filter(location_id=121553680)
+                .values('location_id', 'city', 'country', 'country_code', 'lat', 'lon', 'mapped_start_airport')
+                .first()
+            )
+
+    # Get scores averaged over the travel interval ----------------------------
+    with span('aggregate_scores'):
+        if settings.SCORE_CUBE_ENABLED:
+            scores = get_score_cube().aggregate(
+                start_date=start_date,
+                end_date=end_date,
+                ref_start_location_id=reference_start_location['location_id'],
+                location_id=location_id
+            )
+        else:
+            scores = query_scores(
+                start_date=start_date,
+                end_date=end_date,
+                ref_start_location_id=reference_start_location['location_id'],
+                location_id=location_id
+            )
 
     # Get text ---------------------------------------------------------------
     if retrieve_text:
         if type(location_id) == list:
             raise ValueError('Text retrieval ony possible for one location_id.')
         else:
-            texts = CoreTexts.objects.filter(
-                Q(location_id=location_id)
-                & Q(ref_start_location_id__in=[-1, reference_start_location['location_id']])
-            ).values('category_id', 'text_general', 'text_anomaly')
-            texts = read_frame(texts)
+            with span('texts'):
+                texts = CoreTexts.objects.filter(
+                    Q(location_id=location_id)
+                    & Q(ref_start_location_id__in=[-1, reference_start_location['location_id']])
+                ).values('category_id', 'text_general', 'text_anomaly')
+                texts = read_frame(texts)
 
         return scores, texts, reference_start_location
     
@@ -208,6 +209,81 @@ def clean_previous_locations(previous_locations: list[str], locations: pd.DataFr
     return selected_locations, selected_countries
 
 
+def accepts_gzip(request) -> bool:
+    """Check whether the client accepts gzip encoded responses."""
+    return 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+
+@require_GET
+@condition(
+    etag_func=lambda request: get_locations_for_select2()['etag'] + ('-gzip' if accepts_gzip(request) else ''),
+    last_modified_func=lambda request: get_locations_for_select2()['last_modified']
+)
+def locations_for_select2(request):
+    """
+    Locations grouped by country for Select2 (see initializeSelect2 in base.html).
+
+    The payload is precomputed and compressed once per version of the
+    locations. Pages request it with the version (ETag) as parameter, so it
+    can be cached by browsers until the locations change.
+    """
+    payload = get_locations_for_select2()
+    if accepts_gzip(request):
+        response = HttpResponse(payload['content_gzip'], content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(payload['content'], content_type='application/json')
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if request.GET.get('v') == payload['etag']:
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 30, immutable=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+@require_GET
+def similar_locations(request, location_id: int):
+    """
+    The k locations most similar to a location (closest score vectors, see
+    vector_index.py), of all categories or one category (category_id),
+    averaged over a date window (start_date and end_date, default: one year
+    from today). The search is approximate for large catalogues unless
+    exact is set.
+    """
+    form = SimilarLocationsForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    data = form.cleaned_data
+    start_date, end_date = get_travel_interval(data['start_date'], data['end_date'])
+    start_date, end_date = start_date.normalize(), end_date.normalize()
+
+    with span('vector_index'):
+        index = get_vector_index(get_score_cube(), start_date, end_date, category_id=data['category_id'])
+    with span('search'):
+        similar = index.similar(location_id, k=data['k'], exact=data['exact'])
+    if similar is None:
+        raise Http404('No scores for the location.')
+
+    locations = get_location_index().locations.set_index('location_id')
+    similar = similar.join(locations[['city', 'country', 'country_code']], on='location_id', how='inner')
+    return JsonResponse({
+        'location_id': location_id,
+        'category_id': data['category_id'],
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'locations': [
+            {
+                'location_id': int(location.location_id),
+                'city': location.city,
+                'country': location.country,
+                'country_code': location.country_code,
+                'distance': float(location.distance)
+            }
+            for location in similar.itertuples()
+        ]
+    })
+
+
 class HomeView(TemplateView):
     template_name = 'home.html'
 
@@ -234,7 +310,7 @@ class DiscoverView(FormView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['travellers_input_form'] = context.pop('form')
-        context['grouped_locations'] = get_locations_for_select2()
+        context['select2_version'] = get_locations_for_select2()['etag']
         context['preselected_previous_locations'] = (
             self.request.session
             .get('travellers_input_form_data', {})
@@ -279,7 +355,7 @@ class SearchView(FormView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search_location_form'] = context.pop('form')
-        context['grouped_locations'] = get_locations_for_select2()
+        context['select2_version'] = get_locations_for_select2()['etag']
         context['searched_location'] = self.request.session.get('travellers_input_form_data', {}).get('location', [])
         return context
 
@@ -318,7 +394,6 @@ class CompareView(View):
             scores
             .filter(['location_id', 'dimension_id', 'score', 'raw_value'])
             .assign(dimension_id=clean_id(scores.dimension_id))
-            .set_index(['location_id', 'dimension_id'])
         )
 
         # Get categories with related dimensions (in correct order)
@@ -329,51 +404,12 @@ class CompareView(View):
             .prefetch_related(Prefetch('coredimensions_set', queryset=CoreDimensions.objects.order_by('-dimension_id')))
         )
 
-        def get_value(location_id: int, dimension_id: int, col: str):
-            """Get row from scores."""
-            try:
-                return scores.loc[(location_id, dimension_id), col].item()
-            except:
-                return None
-
-        def format_raw_value(location, dimension) -> str:
-            """Format raw value."""
-            raw_value = get_value(location['location_id'], dimension.dimension_id, 'raw_value')
-            if pd.isna(raw_value):
-                return ''
-            return f' ({raw_value:.{dimension.raw_value_decimals}f}{dimension.raw_value_unit})'
-        
         # Convert to json structure
-        data = json.dumps([
-            {
-                'category_id': category.category_id,
-                'category_name': category.category_name,
-                'category_description': category.description,
-                'axis_title': category.axis_title,
-                'axis_label_low': category.axis_label_low,
-                'axis_label_high': category.axis_label_high,
-                'locations': [
-                    {
-                        'location_id': location.get('location_id'),
-                        'city': location.get('city'),
-                        'country': location.get('country'),
-                        'dimensions': [
-                            {
-                                'dimension_id': dimension.dimension_id,
-                                'dimension_name': dimension.dimension_name,
-                                'dimension_description': dimension.description,
-                                'dimension_icon_url': dimension.icon_url,
-                                'score': get_value(location.get('location_id'), dimension.dimension_id, 'score'),
-                                'raw_value_formatted': format_raw_value(location, dimension),
-                            }
-                            for dimension in category.coredimensions_set.all()
-                        ]
-                    }
-                    for location in locations
-                ],
-            }
-            for category in categories_with_dimensions
-        ])
+        data = json.dumps(get_compare_data(
+            categories=categories_with_dimensions,
+            locations=locations,
+            scores=scores
+        ))
 
         return {'locations': list(locations), 'data': data}
 
@@ -408,75 +444,108 @@ class LocationsListView(View):
                 return True
             return False
         
-        # Check if forms changed compared to session (will update session)
-        # Using two separate staements to call both functions
-        # Otherwise if first is True, second will not be called
-        ti_form_changed = compare_form_with_session(
-            self.travellers_input_form, 'travellers_input_form_data'
-        )
-        preferences_form_changed = compare_form_with_session(
-            self.preferences_form, 'preferences_form_data', check_validity=False
-        )
-        forms_changed = ti_form_changed or preferences_form_changed
-
-        # If location list not in session or parameters changed
-        if 'locations_list' not in self.request.session or forms_changed:
-            self.locations_list = self.get_locations_list()
-            self.request.session['locations_list'] = self.locations_list.to_dict(orient='list')
-        # Otherwise get location list from session
-        else:
-            self.locations_list = pd.DataFrame(self.request.session['locations_list'])
+        # Update form data in session
+        with span('session'):
+            compare_form_with_session(
+                self.travellers_input_form, 'travellers_input_form_data'
+            )
+            compare_form_with_session(
+                self.preferences_form, 'preferences_form_data', check_validity=False
+            )
 
-        # Filter locations
-        if compare_form_with_session(self.filters_form, 'filters_form_data'):
+        # Get location list from the shared cache (same travellers input and
+        # preferences give the same list) or compute it
+        with span('locations_list_cache'):
+            data_version = get_data_version()
+            locations_list_key = result_cache.get_locations_list_key(
+                travellers_input=self.request.session['travellers_input_form_data'],
+                preferences=self.request.session.get('preferences_form_data'),
+                data_version=data_version
+            )
+            self.list_data = result_cache.get_locations_list(locations_list_key)
+        if self.list_data is None:
+            # Get the preference independent part from the shared cache (if
+            # only the preferences changed) or compute it
+            with span('locations_list_base_cache'):
+                base_key = result_cache.get_locations_list_base_key(
+                    travellers_input=self.request.session['travellers_input_form_data'],
+                    data_version=data_version
+                )
+                self.list_data = result_cache.get_locations_list(base_key)
+            if self.list_data is None:
+                self.list_data = {}
+                with span('get_locations_list'):
+                    self.list_data['locations_list'] = self.get_locations_list()
+                with span('locations_list_base_cache_set'):
+                    result_cache.set_locations_list(base_key, self.list_data)
+
+            # Compute relevance score from the category distances (weighted
+            # by the preferences) and add to the location list
+            with span('compute_relevance'):
+                category_distances = self.list_data.pop('category_distances')
+                relevance = weight_category_distances(
+                    distances=category_distances,
+                    preferences=self.request.session.get('preferences_form_data')
+                )
+                self.list_data['locations_list']['relevance'] = (
+                    relevance.reindex(self.list_data['locations_list']['location_id']).to_numpy()
+                )
+            # New version of the list (the filter index is rebuilt)
+            self.list_data['version'] = uuid.uuid4().hex
+            with span('locations_list_cache_set'):
+                result_cache.set_locations_list(locations_list_key, self.list_data)
+        self.request.session['locations_list_key'] = locations_list_key
+        self.locations_list = self.list_data['locations_list']
+
+        # Filter locations (on every request, the location list is unfiltered)
+        with span('filter_locations'):
+            compare_form_with_session(self.filters_form, 'filters_form_data')
             self.filter_locations()
         
-        # Sort locations based on the sort parameter
-        self.sort_param = self.request.GET.get('sort', 'relevance_desc')
-        sort_options = {
-            'relevance_desc': ('relevance', False),
-            'distance_asc': ('distance_to_start', True),
-            'distance_desc': ('distance_to_start', False),
-            'name_asc': ('city', True),
-            'name_desc': ('city', False),
-        }
-        sort_column, sort_order = sort_options.get(self.sort_param)
-        self.locations_list = self.locations_list.sort_values(
-            by=sort_column, ascending=sort_order, ignore_index=True
-        )
-
-        # Convert to object_list (add rank)
-        object_list = (
-            self.locations_list
-            .reset_index().rename(columns={'index': 'rank'})
-            .assign(rank=lambda x: x['rank'] + 1)
-            .to_dict('records')
-        )
-
-        # Create Paginator and get page
-        self.page = Paginator(
-            object_list=object_list,
-            per_page=36
-        ).get_page(self.request.GET.get('page'))
+        # Rank locations based on the sort parameter
+        with span('sort'):
+            self.sort_param = self.request.GET.get('sort', 'relevance_desc')
+            sort_options = {
+                'relevance_desc': ('relevance', False),
+                'distance_asc': ('distance_to_start', True),
+                'distance_desc': ('distance_to_start', False),
+                'name_asc': ('city', True),
+                'name_desc': ('city', False),
+            }
+            sort_column, sort_order = sort_options.get(self.sort_param)
+
+        # Create Paginator and get page (only the rows of the page are ranked
+        # and converted to dicts, with their rank)
+        with span('paginate'):
+            object_list = RankedLocations(
+                locations=self.locations_list,
+                index=self.filter_index,
+                mask=self.filter_mask,
+                column=sort_column,
+                ascending=sort_order
+            )
+            self.page = Paginator(
+                object_list=object_list,
+                per_page=36
+            ).get_page(self.request.GET.get('page'))
 
         # Assemble context
-        context = self.get_context_data()
+        with span('context'):
+            context = self.get_context_data()
 
-        return render(request, self.template_name, context)
+        with span('render'):
+            return render(request, self.template_name, context)
 
     def get_locations_list(self):
-        """Get list of locations and their respective relevance scores."""
+        """Get list of locations (without relevance score, see get) and the distances per category."""
 
         # Get parameters from travellers input form
         ti_form_data = self.request.session.get('travellers_input_form_data', {})
 
         # Get locations
-        cols = [
-            'location_id','city', 'country', 'country_code', 'lat', 'lon',
-            'population'
-        ]
-        locations = read_frame(CoreLocations.objects.values(*cols))
-        locations.set_index('location_id', inplace=True)
+        with span('location_index'):
+            location_index = get_location_index()
+        locations = location_index.locations.set_index('location_id')
 
         # Get previous locations
         previous_locations = ti_form_data['previous_locations']
@@ -484,43 +553,43 @@ class LocationsListView(View):
             previous_locations, locations
         )
 
-        # Store population histogram data
-        self.request.session['population_hist_data'] = create_hist_for_slider(locations['population'])
+        # Store population histogram data (same for all users)
+        self.list_data['population_hist_data'] = get_population_histogram()
 
         # Compute distance to start location
-        locations['distance_to_start'] = haversine(
-            lon1=ti_form_data['start_location_lon'],
-            lat1=ti_form_data['start_location_lat'],
-            lon2=locations['lon'].astype(float), #FIXME dtype
-            lat2=locations['lat'].astype(float) #FIXME dtype
+        locations['distance_to_start'] = location_index.distances(
+            lat=ti_form_data['start_location_lat'],
+            lon=ti_form_data['start_location_lon']
         ).round(0)  # Round to km
         locations = locations.loc[locations['distance_to_start'] > 1] # Only locations further than 1 km
-        self.request.session['distance_to_start_hist_data'] = create_hist_for_slider(locations['distance_to_start'])
+        self.list_data['distance_to_start_hist_data'] = create_hist_for_slider(locations['distance_to_start'])
 
         # Get scores
-        scores, reference_start_location = get_scores(
-            start_date=ti_form_data['start_date'],
-            end_date=ti_form_data['end_date'],
-            start_location_lat=ti_form_data['start_location_lat'],
-            start_location_lon=ti_form_data['start_location_lon']
-        )
+        with span('get_scores'):
+            scores, reference_start_location = get_scores(
+                start_date=ti_form_data['start_date'],
+                end_date=ti_form_data['end_date'],
+                start_location_lat=ti_form_data['start_location_lat'],
+                start_location_lon=ti_form_data['start_location_lon']
+            )
 
         # Extract raw_values (for filters, only for a few dimensions), to do so:
 
-        # Store raw values format in session
+        # Store raw values format
         relevant_dimensions = [21, 22, 41, 42, 61, 62, 63]
-        raw_values_format = read_frame(
-            CoreDimensions.objects
-            .filter(dimension_id__in=relevant_dimensions)
-            .values('dimension_id', 'raw_value_decimals', 'raw_value_unit')
-        ).set_index('dimension_id')
+        with span('raw_values_format'):
+            raw_values_format = read_frame(
+                CoreDimensions.objects
+                .filter(dimension_id__in=relevant_dimensions)
+                .values('dimension_id', 'raw_value_decimals', 'raw_value_unit')
+            ).set_index('dimension_id')
         mapping = {
             21: 'temperature',
             41: 'travel',
             42: 'accommodation',
             61: 'best_reachability'
         }
-        self.request.session['raw_values_format'] = (
+        self.list_data['raw_values_format'] = (
             raw_values_format
             .assign(dimension = lambda x: x.index.map(mapping))
             .dropna()
@@ -530,13 +599,14 @@ class LocationsListView(View):
         )
 
         # Pivot raw values
-        raw_values = (
-            scores
-            .assign(dimension_id=clean_id(scores['dimension_id']))
-            .query('dimension_id in @relevant_dimensions')
-            .pivot(columns='dimension_id', index='location_id', values='raw_value')
-            .query('index not in @previous_locations')
-        )
+        with span('raw_values'):
+            raw_values = (
+                scores
+                .assign(dimension_id=clean_id(scores['dimension_id']))
+                .query('dimension_id in @relevant_dimensions')
+                .pivot(columns='dimension_id', index='location_id', values='raw_value')
+                .query('index not in @previous_locations')
+            )
 
         # Add possibly missing columns + round raw values
         for dimension_id in relevant_dimensions:
@@ -555,14 +625,30 @@ class LocationsListView(View):
         # Add to locations (joined by pandas index)
         locations = locations.join(raw_values.astype(float), how='left')
 
-        # Create histogram data for raw values
-        self.request.session[f'travel_cost_hist_data'] = create_hist_for_slider(locations['dim_41'])
-        self.request.session[f'accommodation_cost_hist_data'] = create_hist_for_slider(locations['dim_42'])
-        self.request.session[f'best_reachability_hist_data'] = create_hist_for_slider(locations['best_reachability'])
+        # Get histogram data for raw values (merged from the precomputed monthly
+        # histograms of the reference start location, computed from the raw
+        # values if there are none)
+        with span('slider_histograms'):
+            slider_histograms = get_slider_histograms()
+            start_date, end_date = get_travel_interval(ti_form_data['start_date'], ti_form_data['end_date'])
+            for histogram, column in [
+                ('travel_cost', 'dim_41'),
+                ('accommodation_cost', 'dim_42'),
+                ('best_reachability', 'best_reachability')
+            ]:
+                hist_data = slider_histograms.merge(
+                    histogram=histogram,
+                    ref_start_location_id=reference_start_location['location_id'],
+                    start_date=start_date,
+                    end_date=end_date
+                )
+                if hist_data is None:
+                    hist_data = create_hist_for_slider(locations[column])
+                self.list_data[f'{histogram}_hist_data'] = hist_data
 
         # Store temperature range limits
         temperature = raw_values[['dim_21', 'dim_22']].values
-        self.request.session['temperature_range_limits'] = {
+        self.list_data['temperature_range_limits'] = {
             'min': temperature.min(),
             'max': temperature.max()
         }
@@ -576,17 +662,31 @@ class LocationsListView(View):
         )
         scores = pd.concat([scores, distance_to_start_scores])
 
-        # Compute relevance score and add to DataFrame
-        # (correctly joined by pandas index)
-        locations['relevance'] = compute_relevance(
-            previous_locations=previous_locations,
-            previous_countries=previous_countries,
-            scores=scores,
-            preferences=self.request.session.get('preferences_form_data')
-        )
+        # Compute the distances per category for the relevance score (the
+        # preferences only weight them, see get), gathered from the distance
+        # tables for categories whose scores do not change within the travel
+        # interval
+        with span('category_distances'):
+            distance_tables = get_distance_tables()
+            precomputed = None
+            if distance_tables is not None:
+                precomputed = distance_tables.mean_distances(
+                    previous_locations=previous_locations,
+                    previous_countries=previous_countries,
+                    location_ids=scores['location_id'].unique(),
+                    start_date=start_date,
+                    end_date=end_date,
+                    ref_start_location_id=reference_start_location['location_id']
+                )
+            self.list_data['category_distances'] = compute_category_distances(
+                previous_locations=previous_locations,
+                previous_countries=previous_countries,
+                scores=scores,
+                precomputed=precomputed
+            )
 
         # Separate previous locations
-        self.request.session['previous_locations_list'] = (
+        self.list_data['previous_locations_list'] = (
             locations
             .loc[previous_locations, :]
             .reset_index()
@@ -604,53 +704,35 @@ class LocationsListView(View):
 
         # Histogram value filters
         hist_value_filters = {
-            'min': {
-                'distance': 'distance_to_start',
-                'population': 'population',
-                'travel_cost': 'dim_41',
-                'accommodation_cost': 'dim_42',
-                'best_reachability': 'best_reachability'
-            },
-            'max': {
-                'distance': 'distance_to_start',
-                'population': 'population',
-                'travel_cost': 'dim_41',
-                'accommodation_cost': 'dim_42',
-                'best_reachability': 'best_reachability'
-            }
+            'distance': 'distance_to_start',
+            'population': 'population',
+            'travel_cost': 'dim_41',
+            'accommodation_cost': 'dim_42',
+            'best_reachability': 'best_reachability'
+        }
+        ranges = {
+            variable: (filters_form_data.get(f'min_{filter_name}'), filters_form_data.get(f'max_{filter_name}'))
+            for filter_name, variable in hist_value_filters.items()
         }
-        for filter_name, variable in hist_value_filters['min'].items():
-            value = filters_form_data.get(f'min_{filter_name}')
-            if value is not None:
-                self.locations_list = self.locations_list[
-                    self.locations_list[variable] >= value
-                ]
-        for filter_name, variable in hist_value_filters['max'].items():
-            value = filters_form_data.get(f'max_{filter_name}')
-            if value is not None:
-                self.locations_list = self.locations_list[
-                    self.locations_list[variable] <= value
-                ]
 
         # Temperature
-        min_temperature = filters_form_data['min_temperature']
-        if min_temperature is not None:
-            self.locations_list = self.locations_list[
-                self.locations_list['dim_22'] >= min_temperature
-            ]
-        max_temperature = filters_form_data['max_temperature']
-        if max_temperature is not None:
-            self.locations_list = self.locations_list[
-                self.locations_list['dim_21'] <= max_temperature
-            ]
+        ranges['dim_22'] = (filters_form_data['min_temperature'], None)
+        ranges['dim_21'] = (None, filters_form_data['max_temperature'])
 
-        # Mode of transport
+        # Mode of transport: reachable (i.e. notna) by at least one of the
+        # selected modes
         mode_of_transport = filters_form_data.get('mode_of_transport')
-        if len(mode_of_transport) > 0:
-            self.locations_list = self.locations_list[
-                # Reachable (i.e. notna) by at least one of the selected modes
-                self.locations_list[mode_of_transport].notna().any(axis=1)
-            ]
+
+        # Get the bitmap of the remaining rows from the filter index of the
+        # location list (the location list itself is not filtered)
+        self.filter_index = get_filter_index(
+            key=self.request.session['locations_list_key'],
+            locations=self.locations_list,
+            columns=list(ranges) + [mode for mode, _ in self.filters_form.fields['mode_of_transport'].choices],
+            sort_columns=['relevance', 'distance_to_start', 'city'],
+            version=self.list_data.get('version')
+        )
+        self.filter_mask = self.filter_index.filter_mask(ranges=ranges, any_present=mode_of_transport)
     
     def get_context_data(self, **kwargs):
         """Assemble context for template."""
@@ -660,21 +742,21 @@ class LocationsListView(View):
 
         context = {
             'locations_list': self.page,
-            'previous_locations_list': self.request.session['previous_locations_list'],
+            'previous_locations_list': self.list_data['previous_locations_list'],
             'current_sort_order': self.sort_param,
             'travellers_input_form': self.travellers_input_form,
             'filters_form': self.filters_form,
             'preferences_form': self.preferences_form,
-            'distance_to_start_hist_data': self.request.session['distance_to_start_hist_data'],
-            'population_hist_data': self.request.session['population_hist_data'],
-            'travel_cost_hist_data': self.request.session['travel_cost_hist_data'],
-            'accommodation_cost_hist_data': self.request.session['accommodation_cost_hist_data'],
-            'best_reachability_hist_data': self.request.session['best_reachability_hist_data'],
-            'temperature_range_limits': self.request.session['temperature_range_limits'],
-            'raw_values_format': self.request.session['raw_values_format'],
+            'distance_to_start_hist_data': self.list_data['distance_to_start_hist_data'],
+            'population_hist_data': self.list_data['population_hist_data'],
+            'travel_cost_hist_data': self.list_data['travel_cost_hist_data'],
+            'accommodation_cost_hist_data': self.list_data['accommodation_cost_hist_data'],
+            'best_reachability_hist_data': self.list_data['best_reachability_hist_data'],
+            'temperature_range_limits': self.list_data['temperature_range_limits'],
+            'raw_values_format': self.list_data['raw_values_format'],
             'query_parameters': query_parameters,
             'comparison_params': get_comparison_params(self.request.session),
-            'grouped_locations': get_locations_for_select2(),
+            'select2_version': get_locations_for_select2()['etag'],
             'preselected_previous_locations': self.request.session['travellers_input_form_data']['previous_locations']
         }
 
@@ -687,34 +769,46 @@ class LocationDetailView(DetailView):
     pk_url_kwarg = 'location_id'
     context_object_name = 'location'
 
+    def get_object(self, queryset=None):
+        """Get location with its date-independent data (see location_bundle)."""
+        with span('location_bundle'):
+            self.bundle = get_location_bundle(self.kwargs['location_id'])
+        if self.bundle['location'] is None:
+            raise Http404('Location not found.')
+        return self.bundle['location']
+
+    def render_to_response(self, context, **response_kwargs):
+        """Render the template response right away (to time it)."""
+        response = super().render_to_response(context, **response_kwargs)
+        with span('render'):
+            return response.render()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         # Get location
-        location = get_object_or_404(CoreLocations, pk=self.kwargs['location_id'])
-
-        # Get image
-        image = read_frame(
-            CoreLocationsImages.objects
-            .filter(location_id=location.location_id)
-            .values('img_url')
-        ).img_url.item()
+        location = self.object
 
-        # Get scores and texts
-        scores, texts, reference_start_location = get_scores(
-            start_date=self.request.GET.get('start_date'),
-            end_date=self.request.GET.get('end_date'),
-            start_location_lat=self.request.GET.get('start_location_lat'),
-            start_location_lon=self.request.GET.get('start_location_lon'),
-            location_id=location.location_id,
-            retrieve_text=True
-        )
+        # Get scores
+        with span('get_scores'):
+            scores, reference_start_location = get_scores(
+                start_date=self.request.GET.get('start_date'),
+                end_date=self.request.GET.get('end_date'),
+                start_location_lat=self.request.GET.get('start_location_lat'),
+                start_location_lon=self.request.GET.get('start_location_lon'),
+                location_id=location.location_id
+            )
         scores = (
             scores
             .filter(['dimension_id', 'score', 'raw_value'])
             .assign(dimension_id=clean_id(scores.dimension_id))
             .set_index('dimension_id')
         )
+
+        # Get texts, reference start airport and routes
+        with span('reachability_bundle'):
+            reachability_bundle = get_reachability_bundle(location.location_id, reference_start_location)
+        texts = reachability_bundle['texts']
         texts = (
             texts
             .assign(category_id=clean_id(texts.category_id))
@@ -722,9 +816,7 @@ class LocationDetailView(DetailView):
         )
 
         # Get categories with related dimensions (in correct order)
-        categories_with_dimensions = CoreCategories.objects.order_by('display_order').prefetch_related(
-            Prefetch('coredimensions_set', queryset=CoreDimensions.objects.order_by('dimension_id'))
-        )
+        categories_with_dimensions = self.bundle['categories_with_dimensions']
 
         def format_raw_value(dimension: int) -> str:
             """Format raw value."""
@@ -736,145 +828,52 @@ class LocationDetailView(DetailView):
             return f' ({raw_value:.{dimension.raw_value_decimals}f}{dimension.raw_value_unit})'
         
         # Convert to list of dictionaries, with dimensions and scores
-        data = [
-            {
-                'category_id': category.category_id,
-                'category_name': category.category_name,
-                'category_description': category.description,
-                'display_order': category.display_order,
-                'axis_title': category.axis_title,
-                'axis_label_low': category.axis_label_low,
-                'axis_label_high': category.axis_label_high,
-                'text_general': texts.loc[category.category_id, 'text_general'] if category.category_id in texts.index else None,
-                'text_anomaly': texts.loc[category.category_id, 'text_anomaly'] if category.category_id in texts.index else None,
-                'dimensions': [
-                    {
-                        'dimension_id': dimension.dimension_id,
-                        'dimension_name': dimension.dimension_name,
-                        'dimension_description': dimension.description,
-                        'dimension_icon_url': dimension.icon_url,
-                        'score': scores.loc[dimension.dimension_id, 'score'].item() if dimension.dimension_id in scores.index else None,
-                        'raw_value_formatted': format_raw_value(dimension),
-                    }
-                    for dimension in category.coredimensions_set.all()
-                ],
-            }
-            for category in categories_with_dimensions
-        ]
+        with span('categories'):
+            data = [
+                {
+                    'category_id': category.category_id,
+                    'category_name': category.category_name,
+                    'category_description': category.description,
+                    'display_order': category.display_order,
+                    'axis_title': category.axis_title,
+                    'axis_label_low': category.axis_label_low,
+                    'axis_label_high': category.axis_label_high,
+                    'text_general': texts.loc[category.category_id, 'text_general'] if category.category_id in texts.index else None,
+                    'text_anomaly': texts.loc[category.category_id, 'text_anomaly'] if category.category_id in texts.index else None,
+                    'dimensions': [
+                        {
+                            'dimension_id': dimension.dimension_id,
+                            'dimension_name': dimension.dimension_name,
+                            'dimension_description': dimension.description,
+                            'dimension_icon_url': dimension.icon_url,
+                            'score': scores.loc[dimension.dimension_id, 'score'].item() if dimension.dimension_id in scores.index else None,
+                            'raw_value_formatted': format_raw_value(dimension),
+                        }
+                        for dimension in category.coredimensions_set.all()
+                    ],
+                }
+                for category in categories_with_dimensions
+            ]
 
-        # Get weather data
-        weather_fields = ['year', 'month', 'temperature_max', 'temperature_min', 'precipitation_sum']
-        weather_dtypes = {
-            'temperature_max': float,
-            'temperature_min': float,
-            'precipitation_sum': float
-        }
-        weather_data = read_frame(
-            RawWeatherHistorical.objects
-            .filter(location_id=location.location_id)
-            .values(*weather_fields)
-        )
-        weather_data = (
-            weather_data
-            .astype(weather_dtypes)
-            .groupby('month')
-            .agg({
-                'year': ['min', 'max'],
-                'temperature_max': 'mean',
-                'temperature_min':
-                'mean', 'precipitation_sum': 'mean'
-            })
-            .reset_index()
-            .sort_values('month')
-        )
-        weather_data.columns = [
-            '_'.join(col).strip() if col[0] == 'year' else col[0]
-            for col in weather_data.columns.values
-        ]
-        months = {
-            1: 'Jan', 2: 'Feb', 3: 'Mar', 4: 'Apr', 5: 'May', 
-            6: 'Jun', 7: 'Jul', 8: 'Aug', 9: 'Sep', 10: 'Oct', 
-            11: 'Nov', 12: 'Dec'
-        }
-        weather_data['month'] = weather_data['month'].map(months)
-        weather_data_years = {
-            col: weather_data.pop(col).iloc[0] for col in ['year_min', 'year_max']
-        }
-        weather_data = weather_data.to_dict('records')
-
-        # Get travel warnings
-        travel_warning = (
-            RawTravelWarnings
-            .objects
-            .filter(country_code=location.country_code)
-            .values('warning_text', 'link')
-            .first()
-        )
-        if travel_warning:
-            context['travel_warning'] = travel_warning
-
-        # Get money text
-        money_text = (
-            RawCurrencyTexts
-            .objects
-            .filter(location_id=location.location_id)
-            .values('text')
-            .first()
-        )
-        if money_text:
-            context['money_text'] = money_text['text']
-
-        # Get top attractions
-        top_attractions = list(
-            RawCultureSights
-            .objects
-            .filter(location_id=location.location_id)
-            .order_by('sight_rank')
-            .values_list('sight', flat=True)
-        )
-        if len(top_attractions) > 0:
-            context['top_attractions'] = top_attractions
-
-        # Get reference start location and destination airport
-        def get_airport(iata_code: str) -> dict:
-            """Get airport data."""
-            airport = (
-                CoreAirports
-                .objects
-                .values('iata_code', 'airport_name', 'city', 'lat', 'lon')
-                .filter(iata_code=iata_code)
-                .first()
-            )
-            for col in ['lat', 'lon']:
-                airport[col] = float(airport[col])
-            return airport
-        
-        reference_start_airport = get_airport(
-            iata_code=reference_start_location['mapped_start_airport'].strip() #FIXME no FK + strip needed
-        )
-        destination_airport = get_airport(iata_code=location.airport_1)
-
-        # Get geojson for routes (reachabilty map)
-        reachability_map_data = (
-            RawReachabilityLand.objects
-            .filter(
-                Q(location_id=location.location_id)
-                & Q(ref_start_location_id=reference_start_location['location_id'])
-            )
-            .values('car_geojson', 'pt_geojson')
-            .first()
-        )
+        # Travel warnings, money text and top attractions
+        if self.bundle['travel_warning']:
+            context['travel_warning'] = self.bundle['travel_warning']
+        if self.bundle['money_text']:
+            context['money_text'] = self.bundle['money_text']
+        if len(self.bundle['top_attractions']) > 0:
+            context['top_attractions'] = self.bundle['top_attractions']
+
+        # Routes, reference start location and airports (reachability map)
+        reference_start_airport = reachability_bundle['reference_start_airport']
         reachability_map_data = {
-            key: json.loads(value) for key, value in reachability_map_data.items()
-            if value is not None
-        }
-        reachability_map_data.update({
+            **reachability_bundle['routes'],
             'reference_start_location': reference_start_location,
             'reference_start_airport': reference_start_airport,
-            'destination_airport': destination_airport,
+            'destination_airport': self.bundle['destination_airport'],
             'destination': {'lat': location.lat, 'lon': location.lon, 'city': location.city, 'country': location.country}
-        })
+        }
         context['reachability_map_data'] = json.dumps(reachability_map_data)
+        context['route_levels'] = reachability_bundle['route_levels']
 
         # Location ids for similarity tab (current+previous)
         previous_locations = self.request.GET.getlist('previous_locations', [])
@@ -898,24 +897,47 @@ class LocationDetailView(DetailView):
             'start_location': self.request.GET.get('start_location'),
             'reference_start_location': reference_start_location,
             'reference_start_airport': reference_start_airport,
-            'image': image,
+            'image': self.bundle['image'],
             'location': location,
             'data': data,
-            'weather_data': weather_data,
-            'weather_data_years': weather_data_years,
+            'weather_data': self.bundle['weather_data'],
+            'weather_data_years': self.bundle['weather_data_years'],
             'comparison_params': get_comparison_params(self.request.session),
         })
 
         return context
 
-@csrf_exempt
-def openai_proxy(request):
+def get_similarity_text_input(data: dict) -> dict:
+    """
+    Get the canonical prompt input of a similarity text request (cache key,
+    see similarity_text.get_prompt_key).
+    """
+    locations = data.get('locations')
+    start_date = data.get('start_date')
+    end_date = data.get('end_date')
 
-    # Set up client
-    client = OpenAI()
+    # Reference start location as in get_scores
+    if data.get('start_location_lat') is not None and data.get('start_location_lon') is not None:
+        ref_start_location_id = get_ref_start_location_index().nearest(
+            lat=data.get('start_location_lat'),
+            lon=data.get('start_location_lon')
+        )['location_id']
+    else:
+        ref_start_location_id = 121553680
+
+    return {
+        'location_id': int(locations.get('location_id')),
+        'previous_locations': sorted(str(location) for location in locations.get('previous_locations', [])),
+        'start_date': start_date and pd.to_datetime(start_date).date().isoformat(),
+        'end_date': end_date and pd.to_datetime(end_date).date().isoformat(),
+        'ref_start_location_id': int(ref_start_location_id),
+        'scores_version': get_score_cube().version if settings.SCORE_CUBE_ENABLED else None
+    }
+
+
+def get_similarity_text_messages(data: dict):
+    """Get the prompt (messages) and warning of a similarity text request."""
 
-    # Get data from request
-    data = json.loads(request.body)
     locations = data.get('locations')
     start_date = data.get('start_date')
     end_date = data.get('end_date')
@@ -991,8 +1013,8 @@ def openai_proxy(request):
         .drop(columns=['category_id', 'dimension_id', 'city', 'country'])
     )
 
-    # Create prompt and get completion ----------------------------------------
-    messages, warning = create_similarity_text_prompt(
+    # Create prompt ----------------------------------------------------------
+    return create_similarity_text_prompt(
         data=promp_input_data,
         start_date=start_date,
         end_date=end_date,
@@ -1000,16 +1022,29 @@ def openai_proxy(request):
         ref_start_location_country=reference_start_location['country']
     )
 
-    completion = client.chat.completions.create(
-        model='gpt-3.5-turbo',
-        messages=messages,
-        temperature=0.8,
-        frequency_penalty=0.4,
-        max_tokens=400
-    )
 
-    return JsonResponse({
-        'text': completion.choices[0].message.content,
-        'warning': warning
-    })
+@csrf_exempt
+def openai_proxy(request):
+    """
+    Similarity text of a target destination compared with the previous
+    destinations, streamed as server-sent events (see
+    similarity_text.stream_similarity_text).
+
+    Under ASGI the events are streamed from the event loop of the server,
+    under WSGI (and before Django 4.2, which streams async iterators only
+    from then on) from the event loop of the process (see
+    similarity_text.iterate_similarity_text).
+    """
+    data = json.loads(request.body)
+    key = get_prompt_key(get_similarity_text_input(data))
+    get_messages = sync_to_async(lambda: get_similarity_text_messages(data))
+
+    if isinstance(request, ASGIRequest) and django.VERSION >= (4, 2):
+        events = stream_similarity_text(key, get_messages)
+    else:
+        events = iterate_similarity_text(key, get_messages)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 